@@ -1,22 +1,110 @@
+import importlib
+import json
+import logging
+import os
 from flask import Blueprint
 from flask_restx import Api
 
-# Main Blueprint for all API routes
-api_bp = Blueprint('api', __name__, url_prefix='/api')
+logger = logging.getLogger(__name__)
 
-# Flask-RESTx Api instance
-api = Api(
-    api_bp,
+# Options of the Flask-RESTx Api of each application (see create_api)
+API_OPTIONS = dict(
     version='1.0',  # API version
     title='Garage API',  # Title displayed in the Swagger documentation
     description='API Swagger documentation',  # Description displayed in the Swagger documentation
-    doc='/docs'  # Documentation URL (http://127.0.0.1:5000/api/docs)
+    doc='/docs',  # Documentation URL (http://127.0.0.1:5000/api/docs)
+    authorizations={'Bearer': {'type': 'apiKey', 'in': 'header', 'name': 'Authorization'}}  # "Bearer <token>" header
 )
 
-# Import and register sub-Blueprints (namespaces)
-from .client import clients_ns
-from .employee import employees_ns
+# Sub-Blueprints (namespaces): name -> (module, namespace attribute, URL path).
+# Modules are only imported when their namespace is enabled (see create_api).
+NAMESPACES = {
+    'client': ('.client', 'clients_ns', '/client'),  # Routes for client operations
+    'employee': ('.employee', 'employees_ns', '/employee'),  # Routes for employee operations
+    'vehicle': ('.vehicle', 'vehicles_ns', '/vehicle'),  # Routes for vehicle operations
+    'work': ('.work', 'works_ns', '/work'),  # Routes for work operations
+    'job': ('.job', 'jobs_ns', '/job'),  # Routes for background jobs
+    'webhook': ('.webhook', 'webhooks_ns', '/webhook'),  # Routes for webhook subscriptions
+    'import': ('.importer', 'imports_ns', '/import'),  # Routes for bulk imports
+    'export': ('.export', 'exports_ns', '/export'),  # Routes for columnar exports
+    'auth': ('.auth', 'auth_ns', '/auth'),  # Routes for login and access tokens
+    'health': ('.health', 'health_ns', '/health'),  # Liveness and readiness probes
+    'profiling': ('.profiling', 'profiling_ns', '/profiling'),  # Sampling profiler (admins only)
+}
 
-# Add namespaces to the Swagger documentation and API
-api.add_namespace(clients_ns, path='/client')  # Routes for client operations
-api.add_namespace(employees_ns, path='/employee')  # Routes for employee operations
\ No newline at end of file
+class GarageApi(Api):
+    """
+    Api serving a specification generated at build time (`flask openapi`), when one is
+    given, from /api/swagger.json instead of building it on the first request.
+    """
+
+    def __init__(self, *args, spec=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spec = spec
+
+    @property
+    def __schema__(self):
+        return self.spec or super().__schema__
+
+
+def create_api(names=None, spec_path=None):
+    """
+    Create the API blueprint of an application, with the enabled namespaces and the Swagger
+    documentation. Each application gets its own Blueprint and Api, so applications created
+    with other namespaces (e.g. in tests or benchmarks) do not see each other's routes.
+
+    :param names: Names of the namespaces to enable (all of them when empty)
+    :param spec_path: Specification generated at build time (see load_openapi_spec)
+    :return: tuple: (Blueprint to register on the application, its Api)
+    """
+    blueprint = Blueprint('api', __name__, url_prefix='/api')
+    api = GarageApi(blueprint, **API_OPTIONS)
+    for name in dict.fromkeys(names or NAMESPACES):
+        if name not in NAMESPACES:
+            raise ValueError(f"Unknown API namespace '{name}'. Available: {', '.join(NAMESPACES)}.")
+        module_name, attribute, path = NAMESPACES[name]
+        namespace = getattr(importlib.import_module(module_name, __name__), attribute)
+        api.add_namespace(namespace, path=path)
+    api.spec = load_openapi_spec(api, spec_path)
+    return blueprint, api
+
+
+def build_openapi_spec(api):
+    """
+    Build the Swagger/OpenAPI specification of the namespaces of an Api.
+    :param api: The Api of the application (app.extensions['api'])
+    :return: dict: The specification (as served by /api/swagger.json)
+    """
+    from flask_restx import Swagger
+
+    return Swagger(api).as_dict()
+
+
+def load_openapi_spec(api, path):
+    """
+    Load a specification generated at build time (`flask openapi`), to be served instead of
+    building it on the first /api/swagger.json request. The file is ignored when it is older
+    than the API or model sources it was generated from, or was generated for other namespaces.
+
+    :param api: The Api the specification documents
+    :param path: Path of the JSON specification
+    :return: dict: The specification, or None if it cannot be used
+    """
+    if not path or not os.path.exists(path):
+        return None
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sources = [
+        os.path.join(root, folder, filename)
+        for folder in ('api', 'models')
+        for filename in os.listdir(os.path.join(root, folder))
+        if filename.endswith('.py')
+    ]
+    if max(os.path.getmtime(source) for source in sources) > os.path.getmtime(path):
+        logger.warning(f"Ignoring stale OpenAPI spec {path}; regenerate it with `flask openapi`.")
+        return None
+    with open(path, encoding='utf-8') as spec_file:
+        spec = json.load(spec_file)
+    if {tag['name'] for tag in spec.get('tags', [])} != {ns.name for ns in api.namespaces if ns.resources}:
+        logger.warning(f"Ignoring OpenAPI spec {path}; it was generated for other namespaces.")
+        return None
+    return spec
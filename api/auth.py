@@ -0,0 +1,102 @@
+import logging
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import HTTPException
+from services.auth_service import login, logout
+from utils.auth import current_employee, roles_required
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for authentication
+auth_ns = Namespace('auth', description='Employee login and access tokens')
+
+login_model = auth_ns.model('Login', {
+    'email': fields.String(required=True, description='Employee e-mail'),
+    'password': fields.String(required=True, description='Employee password'),
+})
+
+token_model = auth_ns.model('Token', {
+    'access_token': fields.String(description='Token to send as "Authorization: Bearer <token>"'),
+    'token_type': fields.String,
+    'expires_in': fields.Integer(description='Lifetime of the token in seconds'),
+    'employee_id': fields.Integer,
+    'role': fields.String,
+    'tenant_id': fields.Integer(description='Tenant (garage) the token is scoped to'),
+})
+
+claims_model = auth_ns.model('TokenClaims', {
+    'employee_id': fields.Integer(attribute='sub'),
+    'role': fields.String,
+    'tenant_id': fields.Integer(attribute='tenant'),
+    'issued_at': fields.Integer(attribute='iat'),
+    'expires_at': fields.Integer(attribute='exp'),
+})
+
+
+@auth_ns.route('/login')
+class Login(Resource):
+    """
+    Exchanges employee credentials for an access token.
+    """
+
+    @auth_ns.doc('login')
+    @auth_ns.expect(login_model, validate=True)
+    @auth_ns.marshal_with(token_model)
+    @auth_ns.response(401, 'Invalid credentials')
+    def post(self):
+        """
+        Log in with e-mail and password.
+        :return: The access token
+        """
+        data = auth_ns.payload
+        try:
+            token = login(data["email"], data["password"])
+            if not token:
+                auth_ns.abort(401, "Invalid e-mail or password.")
+            return token
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error logging in: {e}")
+            auth_ns.abort(500, "An error occurred while logging in.")
+
+
+@auth_ns.route('/logout')
+class Logout(Resource):
+    """
+    Revokes the access token used for the request.
+    """
+
+    @auth_ns.doc('logout', security='Bearer')
+    @auth_ns.response(204, 'Token revoked')
+    @roles_required()
+    def post(self):
+        """
+        Log out by revoking the current access token.
+        :return: HTTP 204 status code
+        """
+        try:
+            logout(current_employee())
+            return '', 204
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error logging out: {e}")
+            auth_ns.abort(500, "An error occurred while logging out.")
+
+
+@auth_ns.route('/me')
+class Me(Resource):
+    """
+    Describes the employee authenticated by the access token.
+    """
+
+    @auth_ns.doc('me', security='Bearer')
+    @auth_ns.marshal_with(claims_model)
+    @roles_required()
+    def get(self):
+        """
+        Retrieve the claims of the current access token.
+        :return: The token claims
+        """
+        return current_employee()
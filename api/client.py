@@ -1,19 +1,31 @@
 import logging
-from flask_restx import Namespace, Resource
+from flask_restx import Namespace, Resource, fields
 from werkzeug.exceptions import HTTPException
 from services.client_service import (
     get_all_clients,
     get_client,
     create_client,
     update_client,
+    patch_client,
     delete_client
 )
-from utils.utils import generate_swagger_model
-from models.client import Client
+from utils.utils import (
+    generate_swagger_model,
+    marshal_with_fields,
+    selected_fields,
+    if_match_version,
+    patch_changes,
+    version_etag,
+    IDEMPOTENCY_KEY_PARAM_DOC,
+    IF_MATCH_PARAM_DOC
+)
+from services.dedup_service import get_duplicate_candidates, merge_clients
+from utils.auth import MANAGEMENT_ROLES, roles_required
+from models.client import Client, DEDUP_COLUMNS
+from utils.response_cache import cached_response
 
 
 # Initialize logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Namespace for managing clients
@@ -23,10 +35,28 @@ clients_ns = Namespace('client', description='CRUD operations for managing clien
 client_model = generate_swagger_model(
     api=clients_ns,        # Namespace to associate with the model
     model=Client,          # SQLAlchemy model representing the client resource
-    exclude_fields=[],     # No excluded fields in this model
-    readonly_fields=['client_id']  # Fields that cannot be modified
+    exclude_fields=['deleted_at', 'tenant_id', *DEDUP_COLUMNS],  # Soft-delete flag (always null here), tenant (implied by the request) and derived keys
+    readonly_fields=['client_id', 'created_at', 'version']  # Fields that cannot be modified
 )
 
+duplicate_model = clients_ns.model('ClientDuplicate', {
+    'client_id': fields.Integer(description='ID of the probable duplicate'),
+    'name': fields.String(description='Its name'),
+    'score': fields.Float(description='Similarity, from DEDUP_MIN_SCORE to 1'),
+    'reasons': fields.List(fields.String, description='What the two clients have in common'),
+})
+
+merge_request_model = clients_ns.model('ClientMergeRequest', {
+    'duplicate_ids': fields.List(fields.Integer, required=True, min_items=1, description='Clients merged into this one'),
+})
+
+merge_result_model = clients_ns.model('ClientMergeResult', {
+    'client': fields.Nested(client_model, description='The kept client'),
+    'merged_client_ids': fields.List(fields.Integer, description='Clients merged (now soft-deleted)'),
+    'vehicles_moved': fields.Integer(description='Vehicles moved to the kept client'),
+    'webhook_subscriptions_moved': fields.Integer(description='Webhook subscriptions moved to the kept client'),
+})
+
 
 @clients_ns.route('/')
 class ClientList(Resource):
@@ -36,7 +66,8 @@ class ClientList(Resource):
     """
 
     @clients_ns.doc('get_all_clients')
-    @clients_ns.marshal_list_with(client_model)
+    @cached_response('client')
+    @marshal_with_fields(clients_ns, client_model, as_list=True)
     def get(self):
         """
         Retrieve all clients.
@@ -44,7 +75,7 @@ class ClientList(Resource):
         """
         try:
             # Fetch all clients from the service layer
-            return get_all_clients()
+            return get_all_clients(fields=selected_fields(client_model))
         except HTTPException as http_err:
             # Allow HTTP exceptions to propagate their status codes and messages
             logger.error(f"HTTP error while retrieving clients: {http_err}")
@@ -54,7 +85,8 @@ class ClientList(Resource):
             logger.error(f"Error retrieving clients: {e}")
             clients_ns.abort(500, "An error occurred while retrieving the clients.")
 
-    @clients_ns.doc('create_client')
+    @clients_ns.doc('create_client', params=IDEMPOTENCY_KEY_PARAM_DOC)
+    @clients_ns.response(409, 'Client name already in use')
     @clients_ns.expect(client_model, validate=True)
     @clients_ns.marshal_with(client_model, code=201)
     def post(self):
@@ -84,7 +116,7 @@ class Client(Resource):
     """
 
     @clients_ns.doc('get_client')
-    @clients_ns.marshal_with(client_model)
+    @marshal_with_fields(clients_ns, client_model)
     def get(self, client_id):
         """
         Retrieve a client by ID.
@@ -93,11 +125,13 @@ class Client(Resource):
         """
         try:
             # Fetch client by ID
-            client = get_client(client_id)
+            client = get_client(client_id, fields=selected_fields(client_model))
             if not client:
                 # Return a 404 error if client does not exist
                 clients_ns.abort(404, f"Client with ID {client_id} not found.")
-            return client
+            # The version doubles as the ETag sent back in If-Match on updates
+            headers = {'ETag': version_etag(client['version'])} if 'version' in client else {}
+            return client, 200, headers
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving client with ID {client_id}: {http_err}")
             raise http_err
@@ -106,7 +140,8 @@ class Client(Resource):
             logger.error(f"Error retrieving client with ID {client_id}: {e}")
             clients_ns.abort(500, "An error occurred while retrieving the client.")
 
-    @clients_ns.doc('update_client')
+    @clients_ns.doc('update_client', params=IF_MATCH_PARAM_DOC)
+    @clients_ns.response(409, 'Client modified since the If-Match version')
     @clients_ns.expect(client_model, validate=True)
     @clients_ns.marshal_with(client_model)
     def put(self, client_id):
@@ -118,11 +153,14 @@ class Client(Resource):
         data = clients_ns.payload  # Extract JSON payload
         try:
             # Call the service to update the client
-            client = update_client(client_id, data["name"],data["email"],data["phone"],data["address"])
+            client = update_client(
+                client_id, data["name"], data["email"], data["phone"], data["address"],
+                expected_version=if_match_version()
+            )
             if not client:
                 # Return a 404 error if client does not exist
                 clients_ns.abort(404, f"Client with ID {client_id} not found.")
-            return client
+            return client, 200, {'ETag': version_etag(client['version'])}
         except HTTPException as http_err:
             logger.error(f"HTTP error while updating client with ID {client_id}: {http_err}")
             raise http_err
@@ -131,7 +169,32 @@ class Client(Resource):
             logger.error(f"Error updating client with ID {client_id}: {e}")
             clients_ns.abort(500, "An error occurred while updating the client.")
 
-    @clients_ns.doc('delete_client')
+    @clients_ns.doc('patch_client', params=IF_MATCH_PARAM_DOC)
+    @clients_ns.response(400, 'Unknown, read-only or invalid fields')
+    @clients_ns.response(409, 'Client modified since the If-Match version')
+    @clients_ns.expect(client_model)
+    @clients_ns.marshal_with(client_model)
+    def patch(self, client_id):
+        """
+        Partially update a client by ID.
+        Only the fields sent are changed (null clears a field), with a single UPDATE statement.
+        :param client_id: The ID of the client
+        :return: The updated client details or 404 if not found
+        """
+        try:
+            client = patch_client(client_id, patch_changes(client_model), expected_version=if_match_version())
+            if not client:
+                clients_ns.abort(404, f"Client with ID {client_id} not found.")
+            return client, 200, {'ETag': version_etag(client['version'])}
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while patching client with ID {client_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error patching client with ID {client_id}: {e}")
+            clients_ns.abort(500, "An error occurred while updating the client.")
+
+    @clients_ns.doc('delete_client', params=IF_MATCH_PARAM_DOC)
+    @clients_ns.response(409, 'Client modified since the If-Match version, or still owning vehicles')
     @clients_ns.response(204, 'Client successfully deleted')
     def delete(self, client_id):
         """
@@ -141,7 +204,7 @@ class Client(Resource):
         """
         try:
             # Call the service to delete the client
-            client = delete_client(client_id)
+            client = delete_client(client_id, expected_version=if_match_version())
             if not client:
                 # Return a 404 error if client does not exist
                 clients_ns.abort(404, f"Client with ID {client_id} not found.")
@@ -152,4 +215,67 @@ class Client(Resource):
         except Exception as e:
             # Log error and return a 500 status code
             logger.error(f"Error deleting client with ID {client_id}: {e}")
-            clients_ns.abort(500, "An error occurred while deleting the client.")
\ No newline at end of file
+            clients_ns.abort(500, "An error occurred while deleting the client.")
+
+
+@clients_ns.route('/<int:client_id>/duplicates')
+@clients_ns.param('client_id', 'The ID of the client')
+class ClientDuplicates(Resource):
+    """
+    Handles the detection of the probable duplicates of a client.
+    """
+
+    @clients_ns.doc('get_client_duplicates')
+    @clients_ns.marshal_list_with(duplicate_model)
+    def get(self, client_id):
+        """
+        Find the clients that are probably the same person: same normalised phone or e-mail,
+        or same phonetic name, scored on the phone, e-mail, name and address.
+        The whole table is checked by the find_duplicate_clients background job.
+        :param client_id: The ID of the client
+        :return: The probable duplicates, best first, or 404 if the client is not found
+        """
+        try:
+            duplicates = get_duplicate_candidates(client_id)
+            if duplicates is None:
+                clients_ns.abort(404, f"Client with ID {client_id} not found.")
+            return duplicates
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while finding duplicates of client with ID {client_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error finding duplicates of client with ID {client_id}: {e}")
+            clients_ns.abort(500, "An error occurred while finding the duplicates of the client.")
+
+
+@clients_ns.route('/<int:client_id>/merge')
+@clients_ns.param('client_id', 'The ID of the client to keep')
+class ClientMerge(Resource):
+    """
+    Handles the merge of duplicate clients.
+    """
+
+    @clients_ns.doc('merge_clients', security='Bearer')
+    @clients_ns.response(400, 'Unknown duplicate or client merged into itself')
+    @clients_ns.expect(merge_request_model, validate=True)
+    @clients_ns.marshal_with(merge_result_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def post(self, client_id):
+        """
+        Merge duplicates into a client: their vehicles and webhook subscriptions are moved
+        to it and the duplicates are soft-deleted, in one transaction.
+        :param client_id: The ID of the client to keep
+        :return: The kept client and what was moved, or 404 if the client is not found
+        """
+        data = clients_ns.payload
+        try:
+            result = merge_clients(client_id, data["duplicate_ids"])
+            if not result:
+                clients_ns.abort(404, f"Client with ID {client_id} not found.")
+            return result
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while merging clients into client with ID {client_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error merging clients into client with ID {client_id}: {e}")
+            clients_ns.abort(500, "An error occurred while merging the clients.")
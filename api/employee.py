@@ -1,12 +1,29 @@
 import logging
 from flask_restx import Namespace, Resource, abort
 from models.employee import Employee
-from services.employee_service import get_all_employees, get_employee, create_employee, update_employee, delete_employee
-from utils.utils import generate_swagger_model
-from werkzeug.exceptions import HTTPException, BadRequest, NotFound
+from services.employee_service import (
+    get_all_employees,
+    get_employee,
+    create_employee,
+    update_employee,
+    patch_employee,
+    delete_employee
+)
+from utils.utils import (
+    generate_swagger_model,
+    marshal_with_fields,
+    selected_fields,
+    if_match_version,
+    patch_changes,
+    version_etag,
+    IDEMPOTENCY_KEY_PARAM_DOC,
+    IF_MATCH_PARAM_DOC
+)
+from werkzeug.exceptions import HTTPException, BadRequest, Forbidden, NotFound
+from utils.auth import MANAGEMENT_ROLES, current_employee, roles_required
+from utils.response_cache import cached_response
 
 # Initialize logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Namespace for employees
@@ -16,10 +33,36 @@ employees_ns = Namespace('employee', description='CRUD operations for managing e
 employee_model = generate_swagger_model(
     api=employees_ns,
     model=Employee,
-    exclude_fields=[],
-    readonly_fields=['employee_id', 'created_at']
+    exclude_fields=['password_hash', 'tenant_id'],  # Never expose password hashes; the tenant is implied by the request
+    readonly_fields=['employee_id', 'created_at', 'version']
 )
 
+
+def check_role_change(employee_id, role):
+    """
+    Only admins grant or change roles, and nobody changes their own role, so that an
+    employee cannot promote themselves (the role is carried by their next token).
+    :param employee_id: The employee whose role is set, None for a new employee.
+    :param role: The role requested.
+    :raises Forbidden: If the current employee may not give this role.
+    :raises NotFound: If the employee does not exist.
+    """
+    claims = current_employee()
+    if employee_id is None:
+        if role in MANAGEMENT_ROLES and claims["role"] != "admin":
+            raise Forbidden("Only admins can create admins and managers.")
+        return
+    employee = get_employee(employee_id, fields=["role"])
+    if not employee:
+        raise NotFound(f"Employee with ID {employee_id} not found.")
+    if employee["role"] == role:
+        return
+    if employee_id == claims["sub"]:
+        raise Forbidden("You cannot change your own role.")
+    if claims["role"] != "admin":
+        raise Forbidden("Only admins can change roles.")
+
+
 # Routes for managing employees
 @employees_ns.route('/')
 @employees_ns.response(500, 'Internal Server Error')
@@ -28,14 +71,15 @@ class EmployeeList(Resource):
     Resource for operations on the collection of employees (GET all, POST new).
     """
     @employees_ns.doc('get_all_employees')
-    @employees_ns.marshal_list_with(employee_model)
+    @cached_response('employee')
+    @marshal_with_fields(employees_ns, employee_model, as_list=True)
     def get(self):
         """
         Retrieve all employees.
         :return: List of all employees in dictionary format
         """
         try:
-            employees = get_all_employees()
+            employees = get_all_employees(fields=selected_fields(employee_model))
             return employees
         except HTTPException as http_err:
             # Allow HTTP exceptions to propagate as they are
@@ -45,17 +89,22 @@ class EmployeeList(Resource):
             logger.error(f"Error fetching all employees: {e}")
             employees_ns.abort(500, "Internal Server Error")
 
-    @employees_ns.doc('create_employee')
+    @employees_ns.doc('create_employee', params=IDEMPOTENCY_KEY_PARAM_DOC, security='Bearer')
+    @employees_ns.response(401, 'Authentication required')
+    @employees_ns.response(403, 'Not an admin or manager, or only admins can give this role')
+    @employees_ns.response(409, 'E-mail already in use')
     @employees_ns.expect(employee_model)
     @employees_ns.marshal_with(employee_model, code=201)
     @employees_ns.response(400, 'Bad Request')
+    @roles_required(*MANAGEMENT_ROLES)
     def post(self):
         """
-        Create a new employee.
+        Create a new employee (admins and managers; only admins create admins and managers).
         :return: Dictionary of the created employee with HTTP 201 status code
         """
         try:
             data = employees_ns.payload
+            check_role_change(None, data.get('role'))
             employee = create_employee(data['name'], data['email'], data['phone'], data['role'], data['hired_date'])
             return employee, 201
         except HTTPException as http_err:
@@ -78,18 +127,21 @@ class Employee(Resource):
     @employees_ns.route('/<int:employee_id>')
     class EmployeeResource(Resource):
         @employees_ns.doc('get_employee')
-        @employees_ns.marshal_with(employee_model)
+        @marshal_with_fields(employees_ns, employee_model)
         def get(self, employee_id):
             """
             Retrieve a specific employee by ID.
             """
+            fields = selected_fields(employee_model)  # Validated outside the try so a bad field stays a 400
             try:
                 # Fetch the employee by ID
-                employee = get_employee(employee_id)
+                employee = get_employee(employee_id, fields=fields)
                 if not employee:
                     # Abort with a 404 status and custom message
                     raise NotFound('My custom message')
-                return employee
+                # The version doubles as the ETag sent back in If-Match on updates
+                headers = {'ETag': version_etag(employee['version'])} if 'version' in employee else {}
+                return employee, 200, headers
             # except HTTPException as http_err:
             #     # Allow HTTP exceptions to propagate as they are
             #     raise http_err
@@ -98,22 +150,30 @@ class Employee(Resource):
                 logger.error(f"Error fetching employee {employee_id}: {e}")
                 abort(500, description="Internal Server Error")
 
-    @employees_ns.doc('update_employee')
+    @employees_ns.doc('update_employee', params=IF_MATCH_PARAM_DOC, security='Bearer')
+    @employees_ns.response(401, 'Authentication required')
+    @employees_ns.response(403, 'Not an admin or manager, or not allowed to change the role')
+    @employees_ns.response(409, 'Employee modified since the If-Match version')
     @employees_ns.expect(employee_model)
     @employees_ns.marshal_with(employee_model)
     @employees_ns.response(400, 'Bad Request')
+    @roles_required(*MANAGEMENT_ROLES)
     def put(self, employee_id):
         """
-        Update an employee.
+        Update an employee (admins and managers; only admins change roles, and not their own).
         :param employee_id: The ID of the employee
         :return: Dictionary of the updated employee or a 404 error if not found
         """
         try:
             data = employees_ns.payload
-            updated_employee = update_employee(employee_id, data['name'], data['email'], data['phone'], data['role'], data['hired_date'])
+            check_role_change(employee_id, data.get('role'))
+            updated_employee = update_employee(
+                employee_id, data['name'], data['email'], data['phone'], data['role'], data['hired_date'],
+                expected_version=if_match_version()
+            )
             if not updated_employee:
                 employees_ns.abort(404, f"Employee with ID {employee_id} not found.")
-            return updated_employee
+            return updated_employee, 200, {'ETag': version_etag(updated_employee['version'])}
         except HTTPException as http_err:
             # Allow HTTP exceptions to propagate as they are
             raise http_err
@@ -122,7 +182,41 @@ class Employee(Resource):
             logger.error(f"Error updating employee {employee_id}: {e}")
             employees_ns.abort(400, "Bad Request")
 
-    @employees_ns.doc('delete_employee')
+    @employees_ns.doc('patch_employee', params=IF_MATCH_PARAM_DOC, security='Bearer')
+    @employees_ns.response(400, 'Unknown, read-only or invalid fields')
+    @employees_ns.response(401, 'Authentication required')
+    @employees_ns.response(403, 'Not an admin or manager, or not allowed to change the role')
+    @employees_ns.response(409, 'Employee modified since the If-Match version')
+    @employees_ns.expect(employee_model)
+    @employees_ns.marshal_with(employee_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def patch(self, employee_id):
+        """
+        Partially update an employee by ID (admins and managers; only admins change roles, and not their own).
+        Only the fields sent are changed (null clears a field), with a single UPDATE statement.
+        :param employee_id: The ID of the employee
+        :return: The updated employee details or 404 if not found
+        """
+        try:
+            changes = patch_changes(employee_model)
+            if 'role' in changes:
+                check_role_change(employee_id, changes['role'])
+            employee = patch_employee(employee_id, changes, expected_version=if_match_version())
+            if not employee:
+                employees_ns.abort(404, f"Employee with ID {employee_id} not found.")
+            return employee, 200, {'ETag': version_etag(employee['version'])}
+        except HTTPException as http_err:
+            # Allow HTTP exceptions to propagate as they are
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error patching employee {employee_id}: {e}")
+            employees_ns.abort(500, "Internal Server Error")
+
+    @employees_ns.doc('delete_employee', params=IF_MATCH_PARAM_DOC, security='Bearer')
+    @employees_ns.response(401, 'Authentication required')
+    @employees_ns.response(403, 'Not an admin or manager')
+    @employees_ns.response(409, 'Employee modified since the If-Match version')
+    @roles_required(*MANAGEMENT_ROLES)
     def delete(self, employee_id):
         """
         Delete an employee by ID.
@@ -130,7 +224,7 @@ class Employee(Resource):
         :return: Empty response body with HTTP 204 status code or a 404 error if not found
         """
         try:
-            deleted = delete_employee(employee_id)
+            deleted = delete_employee(employee_id, expected_version=if_match_version())
             if not deleted:
                 employees_ns.abort(404, f"Employee with ID {employee_id} not found.")
             return '', 204
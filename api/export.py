@@ -0,0 +1,75 @@
+import logging
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource
+from werkzeug.exceptions import HTTPException
+from services.export_service import EXPORT_FORMATS, available_export_formats, export_columns
+from utils.auth import MANAGEMENT_ROLES, roles_required
+from utils.utils import FIELDS_PARAM_DOC, selected_fields
+from .client import client_model
+from .vehicle import vehicle_model
+from .work import work_model
+from .employee import employee_model
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for analytics exports
+exports_ns = Namespace('export', description='Columnar binary exports (Arrow IPC, Parquet or msgpack) for analytics')
+
+# Swagger models used to validate the requested fields of each entity
+EXPORT_SWAGGER_MODELS = {
+    'clients': client_model,
+    'vehicles': vehicle_model,
+    'works': work_model,
+    'employees': employee_model,
+}
+
+
+@exports_ns.route('/<string:entity>')
+@exports_ns.param('entity', 'clients, vehicles, works or employees')
+class Export(Resource):
+    """
+    Handles columnar exports of one entity type.
+    """
+
+    @exports_ns.doc('export_data', params=dict(FIELDS_PARAM_DOC, format={
+        'description': 'arrow, parquet or msgpack (defaults to the most efficient installed format)',
+        'in': 'query',
+    }), security='Bearer')
+    @exports_ns.response(200, 'Binary export streamed in batches')
+    @exports_ns.response(400, 'Unknown field or unavailable format')
+    @exports_ns.response(401, 'Authentication required')
+    @exports_ns.response(403, 'Not an admin or manager')
+    @roles_required(*MANAGEMENT_ROLES)
+    def get(self, entity):
+        """
+        Export a whole table in a columnar binary format (admins and managers).
+        :param entity: The entity to export
+        :return: A streamed binary response
+        """
+        if entity not in EXPORT_SWAGGER_MODELS:
+            exports_ns.abort(404, f"Cannot export '{entity}'. Supported: {', '.join(EXPORT_SWAGGER_MODELS)}.")
+
+        available = available_export_formats()
+        if not available:
+            exports_ns.abort(501, "No export format is available. Install pyarrow (Arrow/Parquet) or msgpack.")
+        fmt = request.args.get('format') or available[0]
+        if fmt not in available:
+            exports_ns.abort(400, f"Format '{fmt}' is not available. Available formats: {', '.join(available)}.")
+
+        try:
+            # Only columns exposed by the Swagger model are exported (e.g. never password hashes)
+            fields = selected_fields(EXPORT_SWAGGER_MODELS[entity]) or list(EXPORT_SWAGGER_MODELS[entity].keys())
+            chunks = export_columns(entity, fmt, fields, current_app.config.get('EXPORT_BATCH_SIZE', 50000))
+            extension = {'arrow': 'arrows', 'parquet': 'parquet', 'msgpack': 'msgpack'}[fmt]
+            return Response(
+                stream_with_context(chunks),
+                mimetype=EXPORT_FORMATS[fmt],
+                headers={'Content-Disposition': f'attachment; filename="{entity}.{extension}"'}
+            )
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while exporting {entity}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error exporting {entity}: {e}")
+            exports_ns.abort(500, f"An error occurred while exporting the {entity}.")
@@ -0,0 +1,75 @@
+import logging
+from flask import current_app
+from flask_restx import Namespace, Resource, fields
+from utils.health import pool_stats
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for load balancer and orchestrator probes (no authentication, tenant or rate limit)
+health_ns = Namespace('health', description='Liveness and readiness probes')
+
+liveness_model = health_ns.model('Liveness', {
+    'status': fields.String(description='Always "ok" while the process serves requests'),
+})
+
+database_check_model = health_ns.model('DatabaseCheck', {
+    'status': fields.String(description='"ok", "timeout" or "error"'),
+    'latency_ms': fields.Float(description='Duration of the SELECT 1 round trip'),
+    'error': fields.String(description='Why the check failed'),
+    'checked_at': fields.DateTime(description='When the check ran (results are reused for HEALTH_CACHE_SECONDS)'),
+})
+
+readiness_model = health_ns.model('Readiness', {
+    'status': fields.String(description='"ok" when the database answers, "unavailable" otherwise'),
+    'database': fields.Nested(database_check_model),
+    'pool': fields.Raw(description='Connection pool: class, size, checkedin, checkedout and overflow'),
+    'slow_queries': fields.Raw(description='Statements slower than DB_SLOW_QUERY_MS: recent (within the window) and total'),
+    'caches': fields.Raw(description='Entries, hits and misses of the in-process caches'),
+})
+
+
+@health_ns.route('/live')
+class Liveness(Resource):
+    """
+    Handles the liveness probe.
+    """
+
+    @health_ns.doc('get_liveness')
+    @health_ns.marshal_with(liveness_model)
+    def get(self):
+        """
+        Report that the process is up. Does not touch the database.
+        :return: {"status": "ok"}
+        """
+        return {'status': 'ok'}
+
+
+@health_ns.route('/ready')
+class Readiness(Resource):
+    """
+    Handles the readiness probe.
+    """
+
+    @health_ns.doc('get_readiness')
+    @health_ns.response(503, 'Database unavailable', readiness_model)
+    @health_ns.marshal_with(readiness_model)
+    def get(self):
+        """
+        Check that the database answers, and report the pool, slow query and cache statistics.
+        :return: The checks, with HTTP status 200 when ready and 503 otherwise
+        """
+        health = current_app.extensions['health']
+        database = health['readiness'].check()
+        ready = database['status'] == 'ok'
+        return {
+            'status': 'ok' if ready else 'unavailable',
+            'database': database,
+            'pool': pool_stats(health['engine']),
+            'slow_queries': health['slow_queries'].stats(),
+            'caches': {
+                name: extension.stats()
+                for name, extension in current_app.extensions.items()
+                if name.endswith('_cache') and hasattr(extension, 'stats')
+            },
+        }, 200 if ready else 503
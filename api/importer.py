@@ -0,0 +1,92 @@
+import logging
+from flask import current_app, request, url_for
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import HTTPException
+from services.import_service import (
+    IMPORT_FORMATS,
+    IMPORT_MODELS,
+    detect_format,
+    import_rows,
+    iter_rows,
+    spool_upload
+)
+from services.job_service import submit_job
+from utils.auth import MANAGEMENT_ROLES, roles_required
+from .job import job_detail_model
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for bulk imports
+imports_ns = Namespace('import', description='Bulk import of clients, vehicles and works from CSV/NDJSON files')
+
+row_error_model = imports_ns.model('ImportRowError', {
+    'row': fields.Integer(description='Row number in the file (1-based, header excluded)'),
+    'error': fields.String(description='Why the row was rejected'),
+})
+
+import_report_model = imports_ns.model('ImportReport', {
+    'entity': fields.String,
+    'processed': fields.Integer(description='Number of rows read from the file'),
+    'inserted': fields.Integer(description='Number of rows inserted'),
+    'failed': fields.Integer(description='Number of rows rejected'),
+    'seconds': fields.Float,
+    'rows_per_second': fields.Integer,
+    'errors': fields.List(fields.Nested(row_error_model)),
+})
+
+import_params = {
+    'file': {'description': 'CSV or NDJSON file (multipart upload); the raw request body is used otherwise', 'type': 'file', 'in': 'formData'},
+    'format': {'description': 'csv or ndjson (guessed from the file name or content type when omitted)', 'in': 'query'},
+    'async': {'description': 'Run the import as a background job and return 202', 'in': 'query', 'type': 'boolean'},
+}
+
+
+@imports_ns.route('/<string:entity>')
+@imports_ns.param('entity', 'clients, vehicles or works')
+class Import(Resource):
+    """
+    Handles bulk imports of one entity type.
+    """
+
+    @imports_ns.doc('import_data', params=import_params, security='Bearer')
+    @imports_ns.response(200, 'Import report', import_report_model)
+    @imports_ns.response(202, 'Import queued as a background job')
+    @roles_required(*MANAGEMENT_ROLES)
+    def post(self, entity):
+        """
+        Import a CSV or NDJSON file.
+        :param entity: The entity to import (clients, vehicles or works)
+        :return: The import report, or the queued job with HTTP status code 202
+        """
+        if entity not in IMPORT_MODELS:
+            imports_ns.abort(404, f"Cannot import '{entity}'. Supported: {', '.join(IMPORT_MODELS)}.")
+
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        fmt = request.args.get('format') or detect_format(
+            filename=upload.filename if upload else None,
+            content_type=upload.content_type if upload else request.content_type
+        )
+        if fmt not in IMPORT_FORMATS:
+            imports_ns.abort(400, f"Unsupported format '{fmt}'. Supported: {', '.join(IMPORT_FORMATS)}.")
+
+        batch_size = current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+        max_errors = current_app.config.get('IMPORT_MAX_ERRORS', 1000)
+        try:
+            if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+                # Spool the upload to disk so the worker can read it after the request ends
+                job = submit_job('import_data', {
+                    'entity': entity, 'upload': spool_upload(stream, fmt), 'fmt': fmt,
+                    'batch_size': batch_size, 'max_errors': max_errors
+                }, max_retries=0, internal=True)
+                return imports_ns.marshal(job, job_detail_model), 202, {'Location': url_for('api.job_job', job_id=job['job_id'])}
+
+            return imports_ns.marshal(import_rows(entity, iter_rows(stream, fmt), batch_size, max_errors),
+                                      import_report_model)
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while importing {entity}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error importing {entity}: {e}")
+            imports_ns.abort(500, f"An error occurred while importing the {entity}.")
@@ -0,0 +1,111 @@
+import logging
+from flask import request, url_for
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import HTTPException
+from services.job_service import get_all_jobs, get_job, submit_job, get_task_names
+from utils.utils import generate_swagger_model
+from models.job import Job
+from utils.auth import MANAGEMENT_ROLES, roles_required
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for background jobs
+jobs_ns = Namespace('job', description='Queue background jobs and follow their status')
+
+# Generate the Swagger model for the job resource (the payload and result are JSON documents)
+job_model = generate_swagger_model(
+    api=jobs_ns,
+    model=Job,
+    exclude_fields=['payload', 'result', 'tenant_id'],
+    readonly_fields=['job_id', 'status', 'error', 'attempts', 'created_at', 'started_at', 'finished_at']
+)
+
+job_detail_model = jobs_ns.clone('JobDetail', job_model, {
+    'payload': fields.Raw(description='Keyword arguments passed to the task'),
+    'result': fields.Raw(description='Value returned by the task once it succeeded'),
+})
+
+job_request_model = jobs_ns.model('JobRequest', {
+    'task': fields.String(required=True, description='Name of the registered task'),
+    'payload': fields.Raw(description='Keyword arguments passed to the task'),
+    'max_retries': fields.Integer(description='Number of retries after a failure'),
+})
+
+
+@jobs_ns.route('/')
+class JobList(Resource):
+    """
+    Handles operations on the collection of jobs.
+    Supports listing recent jobs (GET) and queueing a new job (POST).
+    """
+
+    @jobs_ns.doc('get_all_jobs', params={'status': 'Only return jobs with this status'}, security='Bearer')
+    @jobs_ns.marshal_list_with(job_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def get(self):
+        """
+        Retrieve the most recent jobs.
+        :return: List of jobs
+        """
+        try:
+            return get_all_jobs(status=request.args.get('status'))
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving jobs: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving jobs: {e}")
+            jobs_ns.abort(500, "An error occurred while retrieving the jobs.")
+
+    @jobs_ns.doc('submit_job', security='Bearer')
+    @jobs_ns.expect(job_request_model, validate=True)
+    @jobs_ns.marshal_with(job_detail_model, code=202)
+    @roles_required(*MANAGEMENT_ROLES)
+    def post(self):
+        """
+        Queue a background job.
+        :return: The queued job with HTTP status code 202 and its status URL in the Location header
+        """
+        data = jobs_ns.payload
+        try:
+            job = submit_job(data["task"], data.get("payload"), data.get("max_retries"))
+            location = url_for('api.job_job', job_id=job["job_id"])
+            return job, 202, {'Location': location}
+        except ValueError as e:
+            jobs_ns.abort(400, f"{e} Available tasks: {', '.join(get_task_names())}.")
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while submitting job: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error submitting job: {e}")
+            jobs_ns.abort(500, "An error occurred while submitting the job.")
+
+
+@jobs_ns.route('/<int:job_id>')
+@jobs_ns.param('job_id', 'The ID of the job')
+class Job(Resource):
+    """
+    Handles operations on a single job.
+    Supports retrieving its status and result (GET).
+    """
+
+    @jobs_ns.doc('get_job', security='Bearer')
+    @jobs_ns.marshal_with(job_detail_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def get(self, job_id):
+        """
+        Retrieve a job by ID.
+        :param job_id: The ID of the job
+        :return: The job status and result or 404 if not found
+        """
+        try:
+            job = get_job(job_id)
+            if not job:
+                jobs_ns.abort(404, f"Job with ID {job_id} not found.")
+            return job
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving job with ID {job_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving job with ID {job_id}: {e}")
+            jobs_ns.abort(500, "An error occurred while retrieving the job.")
@@ -0,0 +1,117 @@
+import logging
+from flask import Response, current_app
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import Conflict, HTTPException
+from utils.profiling import check_profiling_access
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for the sampling profiler (employees with one of the PROFILING_ROLES only)
+profiling_ns = Namespace('profiling', description='Sample the call stacks of the requests served by this process')
+
+sampler_model = profiling_ns.model('SamplingProfiler', {
+    'running': fields.Boolean(description='Whether the sampler is running'),
+    'pid': fields.Integer(description='Process sampled (each server process has its own sampler)'),
+    'interval': fields.Float(description='Seconds between two samples'),
+    'duration': fields.Float(description='Seconds after which the sampler stops by itself'),
+    'all_threads': fields.Boolean(description='Whether threads not serving a request are sampled too'),
+    'started_at': fields.DateTime(description='Start of the last run'),
+    'stopped_at': fields.DateTime(description='End of the last run'),
+    'samples': fields.Integer(description='Samples taken'),
+    'stacks': fields.Integer(description='Distinct stacks counted'),
+    'dropped': fields.Integer(description='Stacks not counted because PROFILER_MAX_STACKS was reached'),
+    'overhead': fields.Float(description='Share of one CPU spent sampling'),
+})
+
+sampler_request_model = profiling_ns.model('SamplingProfilerRequest', {
+    'interval': fields.Float(description='Seconds between two samples (PROFILER_INTERVAL by default)'),
+    'duration': fields.Float(description='Seconds to sample for (at most PROFILER_MAX_DURATION)'),
+    'all_threads': fields.Boolean(default=False, description='Also sample the threads that are not serving a request'),
+})
+
+
+def _sampler():
+    check_profiling_access()
+    return current_app.extensions['sampling_profiler']
+
+
+@profiling_ns.route('/sampler')
+@profiling_ns.response(401, 'Authentication required')
+@profiling_ns.response(403, 'Not allowed to profile the application')
+class Sampler(Resource):
+    """
+    Handles the sampling profiler of this process.
+    Supports reading its state (GET), starting it (POST) and stopping it (DELETE).
+    """
+
+    @profiling_ns.doc('get_sampler')
+    @profiling_ns.marshal_with(sampler_model)
+    def get(self):
+        """
+        Retrieve the state of the sampling profiler and of its last run.
+        :return: The sampler state
+        """
+        return _sampler().stats()
+
+    @profiling_ns.doc('start_sampler')
+    @profiling_ns.response(400, 'Invalid interval or duration')
+    @profiling_ns.response(409, 'The sampler is already running')
+    @profiling_ns.expect(sampler_request_model, validate=True)
+    @profiling_ns.marshal_with(sampler_model, code=202)
+    def post(self):
+        """
+        Start sampling the stacks of the requests, discarding the previous samples.
+        The stacks are read from /sampler/collapsed, during or after the run.
+        :return: The sampler state with HTTP status code 202
+        """
+        sampler = _sampler()
+        data = profiling_ns.payload or {}
+        config = current_app.config
+        interval = data.get('interval') or config['PROFILER_INTERVAL']
+        duration = data.get('duration') or config['PROFILER_MAX_DURATION']
+        if not 0.001 <= interval <= 1:
+            profiling_ns.abort(400, "The interval must be between 0.001 and 1 second.")
+        if not 0 < duration <= config['PROFILER_MAX_DURATION']:
+            profiling_ns.abort(400, f"The duration must be between 0 and {config['PROFILER_MAX_DURATION']} seconds.")
+        try:
+            if not sampler.start(interval, duration, data.get('all_threads', False)):
+                raise Conflict("The sampler is already running.")
+            logger.info(f"Sampling profiler started for {duration}s every {interval * 1000:.0f} ms")
+            return sampler.stats(), 202
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while starting the sampling profiler: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error starting the sampling profiler: {e}")
+            profiling_ns.abort(500, "An error occurred while starting the sampling profiler.")
+
+    @profiling_ns.doc('stop_sampler')
+    @profiling_ns.marshal_with(sampler_model)
+    def delete(self):
+        """
+        Stop the sampling profiler, keeping its samples.
+        :return: The sampler state
+        """
+        sampler = _sampler()
+        sampler.stop()
+        return sampler.stats()
+
+
+@profiling_ns.route('/sampler/collapsed')
+@profiling_ns.response(401, 'Authentication required')
+@profiling_ns.response(403, 'Not allowed to profile the application')
+class SamplerStacks(Resource):
+    """
+    Handles the stacks counted by the sampling profiler.
+    """
+
+    @profiling_ns.doc('get_sampler_stacks')
+    @profiling_ns.produces(['text/plain'])
+    def get(self):
+        """
+        Retrieve the sampled stacks in the collapsed format ("route;module:function;... count"
+        per line), e.g. for `flamegraph.pl stacks.txt > flamegraph.svg` or speedscope.
+        :return: The stacks, most sampled first
+        """
+        return Response(_sampler().collapsed(), mimetype='text/plain')
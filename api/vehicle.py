@@ -6,13 +6,27 @@ from services.vehicle_service import (
     get_vehicle,
     create_vehicle,
     update_vehicle,
-    delete_vehicle
+    patch_vehicle,
+    delete_vehicle,
+    VEHICLE_EMBEDS
 )
-from utils.utils import generate_swagger_model
+from utils.utils import (
+    generate_swagger_model,
+    generate_swagger_fields,
+    marshal_with_fields,
+    selected_fields,
+    selected_embeds,
+    if_match_version,
+    patch_changes,
+    version_etag,
+    IDEMPOTENCY_KEY_PARAM_DOC,
+    IF_MATCH_PARAM_DOC
+)
+from utils.response_cache import cached_response
 from models.vehicle import Vehicle
+from models.client import Client, DEDUP_COLUMNS
 
 # Initialize logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Namespace for managing vehicles
@@ -22,10 +36,15 @@ vehicles_ns = Namespace('vehicle', description='CRUD operations for managing veh
 vehicle_model = generate_swagger_model(
     api=vehicles_ns,
     model=Vehicle,
-    exclude_fields=[],
-    readonly_fields=['vehicle_id']
+    exclude_fields=['deleted_at', 'tenant_id'],  # Soft-delete flag (always null here) and tenant (implied by the request)
+    readonly_fields=['vehicle_id', 'created_at', 'version']
 )
 
+# Fields of the related records that can be embedded with ?embed=
+vehicle_embeds = {
+    'client': generate_swagger_fields(Client, exclude_fields=['deleted_at', 'tenant_id', *DEDUP_COLUMNS]),
+}
+
 
 @vehicles_ns.route('/')
 class VehicleList(Resource):
@@ -35,14 +54,15 @@ class VehicleList(Resource):
     """
 
     @vehicles_ns.doc('get_all_vehicles')
-    @vehicles_ns.marshal_list_with(vehicle_model)
+    @cached_response('vehicle', embeds=VEHICLE_EMBEDS)
+    @marshal_with_fields(vehicles_ns, vehicle_model, as_list=True, embeds=vehicle_embeds)
     def get(self):
         """
         Retrieve all vehicles.
         :return: List of all vehicles
         """
         try:
-            return get_all_vehicles()
+            return get_all_vehicles(fields=selected_fields(vehicle_model), embed=selected_embeds(VEHICLE_EMBEDS))
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving vehicles: {http_err}")
             raise http_err
@@ -50,7 +70,9 @@ class VehicleList(Resource):
             logger.error(f"Error retrieving vehicles: {e}")
             vehicles_ns.abort(500, "An error occurred while retrieving the vehicles.")
 
-    @vehicles_ns.doc('create_vehicle')
+    @vehicles_ns.doc('create_vehicle', params=IDEMPOTENCY_KEY_PARAM_DOC)
+    @vehicles_ns.response(400, 'Unknown client')
+    @vehicles_ns.response(409, 'License plate already in use')
     @vehicles_ns.expect(vehicle_model, validate=True)
     @vehicles_ns.marshal_with(vehicle_model, code=201)
     def post(self):
@@ -84,7 +106,7 @@ class Vehicle(Resource):
     """
 
     @vehicles_ns.doc('get_vehicle')
-    @vehicles_ns.marshal_with(vehicle_model)
+    @marshal_with_fields(vehicles_ns, vehicle_model, embeds=vehicle_embeds)
     def get(self, vehicle_id):
         """
         Retrieve a vehicle by ID.
@@ -92,10 +114,14 @@ class Vehicle(Resource):
         :return: The vehicle details or 404 if not found
         """
         try:
-            vehicle = get_vehicle(vehicle_id)
+            vehicle = get_vehicle(
+                vehicle_id, fields=selected_fields(vehicle_model), embed=selected_embeds(VEHICLE_EMBEDS)
+            )
             if not vehicle:
                 vehicles_ns.abort(404, f"Vehicle with ID {vehicle_id} not found.")
-            return vehicle
+            # The version doubles as the ETag sent back in If-Match on updates
+            headers = {'ETag': version_etag(vehicle['version'])} if 'version' in vehicle else {}
+            return vehicle, 200, headers
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving vehicle with ID {vehicle_id}: {http_err}")
             raise http_err
@@ -103,7 +129,9 @@ class Vehicle(Resource):
             logger.error(f"Error retrieving vehicle with ID {vehicle_id}: {e}")
             vehicles_ns.abort(500, "An error occurred while retrieving the vehicle.")
 
-    @vehicles_ns.doc('update_vehicle')
+    @vehicles_ns.doc('update_vehicle', params=IF_MATCH_PARAM_DOC)
+    @vehicles_ns.response(400, 'Unknown client')
+    @vehicles_ns.response(409, 'Vehicle modified since the If-Match version')
     @vehicles_ns.expect(vehicle_model, validate=True)
     @vehicles_ns.marshal_with(vehicle_model)
     def put(self, vehicle_id):
@@ -120,11 +148,12 @@ class Vehicle(Resource):
                 data.get("license_plate"),
                 data.get("brand"),
                 data.get("model"),
-                data.get("year")
+                data.get("year"),
+                expected_version=if_match_version()
             )
             if not vehicle:
                 vehicles_ns.abort(404, f"Vehicle with ID {vehicle_id} not found.")
-            return vehicle
+            return vehicle, 200, {'ETag': version_etag(vehicle['version'])}
         except HTTPException as http_err:
             logger.error(f"HTTP error while updating vehicle with ID {vehicle_id}: {http_err}")
             raise http_err
@@ -132,7 +161,32 @@ class Vehicle(Resource):
             logger.error(f"Error updating vehicle with ID {vehicle_id}: {e}")
             vehicles_ns.abort(500, "An error occurred while updating the vehicle.")
 
-    @vehicles_ns.doc('delete_vehicle')
+    @vehicles_ns.doc('patch_vehicle', params=IF_MATCH_PARAM_DOC)
+    @vehicles_ns.response(400, 'Unknown, read-only or invalid fields, or unknown client')
+    @vehicles_ns.response(409, 'Vehicle modified since the If-Match version')
+    @vehicles_ns.expect(vehicle_model)
+    @vehicles_ns.marshal_with(vehicle_model)
+    def patch(self, vehicle_id):
+        """
+        Partially update a vehicle by ID.
+        Only the fields sent are changed (null clears a field), with a single UPDATE statement.
+        :param vehicle_id: The ID of the vehicle
+        :return: The updated vehicle details or 404 if not found
+        """
+        try:
+            vehicle = patch_vehicle(vehicle_id, patch_changes(vehicle_model), expected_version=if_match_version())
+            if not vehicle:
+                vehicles_ns.abort(404, f"Vehicle with ID {vehicle_id} not found.")
+            return vehicle, 200, {'ETag': version_etag(vehicle['version'])}
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while patching vehicle with ID {vehicle_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error patching vehicle with ID {vehicle_id}: {e}")
+            vehicles_ns.abort(500, "An error occurred while updating the vehicle.")
+
+    @vehicles_ns.doc('delete_vehicle', params=IF_MATCH_PARAM_DOC)
+    @vehicles_ns.response(409, 'Vehicle modified since the If-Match version')
     @vehicles_ns.response(204, 'Vehicle successfully deleted')
     def delete(self, vehicle_id):
         """
@@ -141,7 +195,7 @@ class Vehicle(Resource):
         :return: HTTP 204 status code if deleted successfully or 404 if not found
         """
         try:
-            result = delete_vehicle(vehicle_id)
+            result = delete_vehicle(vehicle_id, expected_version=if_match_version())
             if not result:
                 vehicles_ns.abort(404, f"Vehicle with ID {vehicle_id} not found.")
             return '', 204
@@ -0,0 +1,222 @@
+import logging
+from flask import request
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import HTTPException
+from models.webhook import WebhookDelivery, WebhookSubscription, WEBHOOK_DELIVERY_STATUSES
+from services.webhook_service import (
+    get_all_subscriptions,
+    get_subscription,
+    create_subscription,
+    update_subscription,
+    delete_subscription,
+    get_deliveries,
+    queue_ping
+)
+from utils.utils import generate_swagger_model
+from utils.auth import MANAGEMENT_ROLES, roles_required
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Namespace for webhook subscriptions
+webhooks_ns = Namespace('webhook', description='Notify client URLs when their works change status')
+
+# Generate the Swagger model for subscriptions (the statuses are sent as a list)
+subscription_model = webhooks_ns.clone('WebhookSubscription', generate_swagger_model(
+    api=webhooks_ns,
+    model=WebhookSubscription,
+    exclude_fields=['statuses', 'secret', 'tenant_id'],
+    readonly_fields=['subscription_id', 'created_at']
+), {
+    'statuses': fields.List(fields.String, description='Statuses notified (e.g. ["completed"]); every status change when empty'),
+})
+
+# Only the creation returns the secret: it is not readable afterwards
+created_subscription_model = webhooks_ns.clone('WebhookSubscriptionCreated', subscription_model, {
+    'secret': fields.String(readonly=True, description='Key of the HMAC signing the requests (X-Webhook-Signature)'),
+})
+
+subscription_request_model = webhooks_ns.model('WebhookSubscriptionRequest', {
+    'client_id': fields.Integer(required=True, description='Client whose works are followed (ignored on updates)'),
+    'url': fields.String(required=True, description='HTTP(S) endpoint receiving the notifications'),
+    'statuses': fields.List(fields.String, description='Statuses notified; every status change when empty'),
+    'active': fields.Boolean(default=True, description='Whether notifications are sent'),
+})
+
+delivery_model = generate_swagger_model(
+    api=webhooks_ns,
+    model=WebhookDelivery,
+    exclude_fields=['payload', 'tenant_id'],
+    readonly_fields=[column.name for column in WebhookDelivery.__table__.columns]
+)
+
+
+@webhooks_ns.route('/')
+@webhooks_ns.response(500, 'Internal Server Error')
+class WebhookSubscriptionList(Resource):
+    """
+    Handles operations on the collection of webhook subscriptions.
+    Supports listing them (GET) and subscribing a URL (POST).
+    """
+
+    @webhooks_ns.doc('get_all_webhook_subscriptions', params={'client_id': 'Only return the subscriptions of this client'}, security='Bearer')
+    @webhooks_ns.marshal_list_with(subscription_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def get(self):
+        """
+        Retrieve the webhook subscriptions.
+        :return: List of subscriptions
+        """
+        try:
+            return get_all_subscriptions(client_id=request.args.get('client_id', type=int))
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving webhook subscriptions: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving webhook subscriptions: {e}")
+            webhooks_ns.abort(500, "An error occurred while retrieving the webhook subscriptions.")
+
+    @webhooks_ns.doc('create_webhook_subscription', security='Bearer')
+    @webhooks_ns.response(400, 'Invalid or not allowed URL, invalid status or client')
+    @webhooks_ns.expect(subscription_request_model, validate=True)
+    @webhooks_ns.marshal_with(created_subscription_model, code=201)
+    @roles_required(*MANAGEMENT_ROLES)
+    def post(self):
+        """
+        Subscribe a URL to the status changes of the works of a client.
+        The response holds the secret that signs the requests (X-Webhook-Signature); it is not returned again.
+        :return: The created subscription with HTTP status code 201
+        """
+        data = webhooks_ns.payload
+        try:
+            return create_subscription(data["client_id"], data["url"], data.get("statuses"), data.get("active", True)), 201
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while creating webhook subscription: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error creating webhook subscription: {e}")
+            webhooks_ns.abort(500, "An error occurred while creating the webhook subscription.")
+
+
+@webhooks_ns.route('/<int:subscription_id>')
+@webhooks_ns.param('subscription_id', 'The ID of the webhook subscription')
+class WebhookSubscriptionItem(Resource):
+    """
+    Handles operations on a single webhook subscription.
+    Supports retrieving (GET), updating (PUT), and deleting (DELETE) it.
+    """
+
+    @webhooks_ns.doc('get_webhook_subscription', security='Bearer')
+    @webhooks_ns.marshal_with(subscription_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def get(self, subscription_id):
+        """
+        Retrieve a webhook subscription by ID.
+        :param subscription_id: The ID of the subscription
+        :return: The subscription or 404 if not found
+        """
+        try:
+            subscription = get_subscription(subscription_id)
+            if not subscription:
+                webhooks_ns.abort(404, f"Webhook subscription with ID {subscription_id} not found.")
+            return subscription
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving webhook subscription with ID {subscription_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving webhook subscription with ID {subscription_id}: {e}")
+            webhooks_ns.abort(500, "An error occurred while retrieving the webhook subscription.")
+
+    @webhooks_ns.doc('update_webhook_subscription', security='Bearer')
+    @webhooks_ns.response(400, 'Invalid or not allowed URL, or invalid status')
+    @webhooks_ns.expect(subscription_request_model, validate=True)
+    @webhooks_ns.marshal_with(subscription_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def put(self, subscription_id):
+        """
+        Update the URL, statuses and state of a webhook subscription.
+        :param subscription_id: The ID of the subscription
+        :return: The updated subscription or 404 if not found
+        """
+        data = webhooks_ns.payload
+        try:
+            subscription = update_subscription(subscription_id, data["url"], data.get("statuses"), data.get("active", True))
+            if not subscription:
+                webhooks_ns.abort(404, f"Webhook subscription with ID {subscription_id} not found.")
+            return subscription
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while updating webhook subscription with ID {subscription_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error updating webhook subscription with ID {subscription_id}: {e}")
+            webhooks_ns.abort(500, "An error occurred while updating the webhook subscription.")
+
+    @webhooks_ns.doc('delete_webhook_subscription', security='Bearer')
+    @webhooks_ns.response(204, 'Webhook subscription successfully deleted')
+    @roles_required(*MANAGEMENT_ROLES)
+    def delete(self, subscription_id):
+        """
+        Delete a webhook subscription and its deliveries.
+        :param subscription_id: The ID of the subscription
+        :return: HTTP 204 status code if deleted successfully or 404 if not found
+        """
+        try:
+            if not delete_subscription(subscription_id):
+                webhooks_ns.abort(404, f"Webhook subscription with ID {subscription_id} not found.")
+            return '', 204
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while deleting webhook subscription with ID {subscription_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error deleting webhook subscription with ID {subscription_id}: {e}")
+            webhooks_ns.abort(500, "An error occurred while deleting the webhook subscription.")
+
+
+@webhooks_ns.route('/<int:subscription_id>/deliveries')
+@webhooks_ns.param('subscription_id', 'The ID of the webhook subscription')
+class WebhookDeliveryList(Resource):
+    """
+    Handles the notifications queued for a subscription.
+    Supports listing them (GET) and queueing a test notification (POST).
+    """
+
+    @webhooks_ns.doc('get_webhook_deliveries', params={'status': f"Only return deliveries with this status ({', '.join(WEBHOOK_DELIVERY_STATUSES)})"}, security='Bearer')
+    @webhooks_ns.marshal_list_with(delivery_model)
+    @roles_required(*MANAGEMENT_ROLES)
+    def get(self, subscription_id):
+        """
+        Retrieve the most recent deliveries of a subscription, with the outcome of their last attempt.
+        :param subscription_id: The ID of the subscription
+        :return: List of deliveries, newest first
+        """
+        try:
+            if not get_subscription(subscription_id):
+                webhooks_ns.abort(404, f"Webhook subscription with ID {subscription_id} not found.")
+            return get_deliveries(subscription_id, status=request.args.get('status'))
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving deliveries of webhook subscription {subscription_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving deliveries of webhook subscription {subscription_id}: {e}")
+            webhooks_ns.abort(500, "An error occurred while retrieving the webhook deliveries.")
+
+    @webhooks_ns.doc('ping_webhook_subscription', security='Bearer')
+    @webhooks_ns.marshal_with(delivery_model, code=202)
+    @roles_required(*MANAGEMENT_ROLES)
+    def post(self, subscription_id):
+        """
+        Queue a test notification ("ping" event), e.g. to check that the receiver accepts the requests.
+        :param subscription_id: The ID of the subscription
+        :return: The queued delivery with HTTP status code 202 or 404 if not found
+        """
+        try:
+            delivery = queue_ping(subscription_id)
+            if not delivery:
+                webhooks_ns.abort(404, f"Webhook subscription with ID {subscription_id} not found.")
+            return delivery, 202
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while pinging webhook subscription {subscription_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error pinging webhook subscription {subscription_id}: {e}")
+            webhooks_ns.abort(500, "An error occurred while queueing the test notification.")
@@ -1,18 +1,37 @@
 import logging
-from flask_restx import Namespace, Resource
+from datetime import datetime, timezone
+from flask import request
+from flask_restx import Namespace, Resource, fields
 from werkzeug.exceptions import HTTPException
 from services.work_service import (
     get_all_works,
     get_work,
     create_work,
     update_work,
-    delete_work
+    patch_work,
+    delete_work,
+    WORK_EMBEDS
 )
-from utils.utils import generate_swagger_model
+from utils.utils import (
+    generate_swagger_model,
+    generate_swagger_fields,
+    marshal_with_fields,
+    selected_fields,
+    selected_embeds,
+    if_match_version,
+    patch_changes,
+    version_etag,
+    IDEMPOTENCY_KEY_PARAM_DOC,
+    IF_MATCH_PARAM_DOC
+)
+from utils.response_cache import cached_response
+from services.archive_service import get_work_history
+from services.work_event_service import get_stage_durations, get_work_timeline
 from models.work import Work
+from models.vehicle import Vehicle
+from models.client import Client, DEDUP_COLUMNS
 
 # Initialize logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Namespace for managing works
@@ -22,10 +41,66 @@ works_ns = Namespace('work', description='CRUD operations for managing works')
 work_model = generate_swagger_model(
     api=works_ns,
     model=Work,
-    exclude_fields=[],
-    readonly_fields=['work_id', 'created_at', 'updated_at']
+    exclude_fields=['deleted_at', 'tenant_id'],  # Soft-delete flag (always null here) and tenant (implied by the request)
+    readonly_fields=['work_id', 'created_at', 'updated_at', 'version']
 )
 
+# Fields of the related records that can be embedded with ?embed=
+work_embeds = {
+    'vehicle': generate_swagger_fields(Vehicle, exclude_fields=['deleted_at', 'tenant_id']),
+    'vehicle.client': generate_swagger_fields(Client, exclude_fields=['deleted_at', 'tenant_id', *DEDUP_COLUMNS]),
+}
+
+# Works returned by the history lookup also include deleted and archived ones
+work_history_model = works_ns.clone('WorkHistory', work_model, {
+    'deleted_at': fields.DateTime(description='Timestamp of the soft deletion'),
+    'archived': fields.Boolean(description='Whether the work was moved to the archive'),
+    'archived_at': fields.DateTime(description='Timestamp when the work was archived'),
+})
+
+# Status timeline reconstructed from the work event log
+work_event_model = works_ns.model('WorkEvent', {
+    'event_id': fields.Integer(description='ID of the event, increasing in the order the events were written'),
+    'event': fields.String(description='Kind of change', enum=['created', 'status_changed', 'updated', 'deleted']),
+    'status': fields.String(description='Status of the work after the change'),
+    'occurred_at': fields.DateTime(description='Timestamp of the change'),
+    'employee_id': fields.Integer(description='Employee who made the change'),
+})
+work_stage_model = works_ns.model('WorkStage', {
+    'status': fields.String(description='Status of the work during the stage'),
+    'started_at': fields.DateTime(description='Timestamp when the work entered the status'),
+    'ended_at': fields.DateTime(description='Timestamp when the work left the status (null for the current stage)'),
+    'duration_seconds': fields.Float(description='Time spent in the status (null for the current stage)'),
+})
+work_timeline_model = works_ns.model('WorkTimeline', {
+    'work_id': fields.Integer(description='ID of the work'),
+    'events': fields.List(fields.Nested(work_event_model), description='Events, oldest first'),
+    'stages': fields.List(fields.Nested(work_stage_model), description='Statuses the work went through, oldest first'),
+})
+stage_duration_model = works_ns.model('WorkStageDuration', {
+    'status': fields.String(description='Status of the works'),
+    'stages': fields.Integer(description='Number of finished stages in the status'),
+    'average_seconds': fields.Float(description='Average time spent in the status'),
+    'min_seconds': fields.Float(description='Shortest time spent in the status'),
+    'max_seconds': fields.Float(description='Longest time spent in the status'),
+})
+
+
+def _datetime_arg(name):
+    """
+    Parse an optional ISO 8601 query parameter as a naive UTC datetime.
+    :param name: Name of the query parameter.
+    :return: datetime or None if the parameter is missing.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        works_ns.abort(400, f"The {name} query parameter must be an ISO 8601 date or datetime.")
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
 
 @works_ns.route('/')
 class WorkList(Resource):
@@ -35,14 +110,15 @@ class WorkList(Resource):
     """
 
     @works_ns.doc('get_all_works')
-    @works_ns.marshal_list_with(work_model)
+    @cached_response('work', embeds=WORK_EMBEDS)
+    @marshal_with_fields(works_ns, work_model, as_list=True, embeds=work_embeds)
     def get(self):
         """
         Retrieve all works.
         :return: List of all works
         """
         try:
-            return get_all_works()
+            return get_all_works(fields=selected_fields(work_model), embed=selected_embeds(WORK_EMBEDS))
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving works: {http_err}")
             raise http_err
@@ -50,7 +126,8 @@ class WorkList(Resource):
             logger.error(f"Error retrieving works: {e}")
             works_ns.abort(500, "An error occurred while retrieving the works.")
 
-    @works_ns.doc('create_work')
+    @works_ns.doc('create_work', params=IDEMPOTENCY_KEY_PARAM_DOC)
+    @works_ns.response(400, 'Unknown vehicle')
     @works_ns.expect(work_model, validate=True)
     @works_ns.marshal_with(work_model, code=201)
     def post(self):
@@ -72,6 +149,88 @@ class WorkList(Resource):
             works_ns.abort(500, "An error occurred while creating the work.")
 
 
+@works_ns.route('/history')
+class WorkHistory(Resource):
+    """
+    Handles the history lookup of the works of a vehicle, including deleted and archived works.
+    """
+
+    @works_ns.doc('get_work_history', params={'vehicle_id': {'description': 'ID of the vehicle', 'in': 'query', 'type': 'integer', 'required': True}})
+    @works_ns.marshal_list_with(work_history_model)
+    def get(self):
+        """
+        Retrieve every work of a vehicle, newest first.
+        :return: List of active, deleted and archived works
+        """
+        vehicle_id = request.args.get('vehicle_id', type=int)
+        if vehicle_id is None:
+            works_ns.abort(400, "The vehicle_id query parameter is required.")
+        try:
+            return get_work_history(vehicle_id)
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving the work history of vehicle {vehicle_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the work history of vehicle {vehicle_id}: {e}")
+            works_ns.abort(500, "An error occurred while retrieving the work history.")
+
+
+@works_ns.route('/stage-durations')
+class WorkStageDurations(Resource):
+    """
+    Handles the aggregate of the time works spend in each status.
+    """
+
+    @works_ns.doc('get_work_stage_durations', params={
+        'since': {'description': 'Only count stages started at or after this ISO 8601 datetime (UTC)', 'in': 'query', 'type': 'string'},
+        'until': {'description': 'Only count stages started before this ISO 8601 datetime (UTC)', 'in': 'query', 'type': 'string'},
+    })
+    @works_ns.marshal_list_with(stage_duration_model)
+    def get(self):
+        """
+        Retrieve how long works stay in each status, computed from the work event log.
+        Only finished stages are counted.
+        :return: Number of stages and average, minimum and maximum duration per status
+        """
+        since, until = _datetime_arg('since'), _datetime_arg('until')
+        try:
+            return get_stage_durations(since, until)
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving the work stage durations: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the work stage durations: {e}")
+            works_ns.abort(500, "An error occurred while retrieving the work stage durations.")
+
+
+@works_ns.route('/<int:work_id>/timeline')
+@works_ns.param('work_id', 'The ID of the work')
+class WorkTimeline(Resource):
+    """
+    Handles the status timeline of a work, including deleted and archived works.
+    """
+
+    @works_ns.doc('get_work_timeline')
+    @works_ns.marshal_with(work_timeline_model)
+    def get(self, work_id):
+        """
+        Retrieve the events of a work and the time it spent in each status.
+        :param work_id: The ID of the work
+        :return: The timeline or 404 if the work has no events
+        """
+        try:
+            timeline = get_work_timeline(work_id)
+            if not timeline:
+                works_ns.abort(404, f"Work with ID {work_id} not found.")
+            return timeline
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while retrieving the timeline of work {work_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the timeline of work {work_id}: {e}")
+            works_ns.abort(500, "An error occurred while retrieving the work timeline.")
+
+
 @works_ns.route('/<int:work_id>')
 @works_ns.param('work_id', 'The ID of the work')
 class Work(Resource):
@@ -81,7 +240,7 @@ class Work(Resource):
     """
 
     @works_ns.doc('get_work')
-    @works_ns.marshal_with(work_model)
+    @marshal_with_fields(works_ns, work_model, embeds=work_embeds)
     def get(self, work_id):
         """
         Retrieve a work by ID.
@@ -89,10 +248,14 @@ class Work(Resource):
         :return: The work details or 404 if not found
         """
         try:
-            work = get_work(work_id)
+            work = get_work(
+                work_id, fields=selected_fields(work_model), embed=selected_embeds(WORK_EMBEDS)
+            )
             if not work:
                 works_ns.abort(404, f"Work with ID {work_id} not found.")
-            return work
+            # The version doubles as the ETag sent back in If-Match on updates
+            headers = {'ETag': version_etag(work['version'])} if 'version' in work else {}
+            return work, 200, headers
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving work with ID {work_id}: {http_err}")
             raise http_err
@@ -100,7 +263,8 @@ class Work(Resource):
             logger.error(f"Error retrieving work with ID {work_id}: {e}")
             works_ns.abort(500, "An error occurred while retrieving the work.")
 
-    @works_ns.doc('update_work')
+    @works_ns.doc('update_work', params=IF_MATCH_PARAM_DOC)
+    @works_ns.response(409, 'Work modified since the If-Match version')
     @works_ns.expect(work_model, validate=True)
     @works_ns.marshal_with(work_model)
     def put(self, work_id):
@@ -114,11 +278,12 @@ class Work(Resource):
             work = update_work(
                 work_id,
                 data["status"],
-                data.get("description")
+                data.get("description"),
+                expected_version=if_match_version()
             )
             if not work:
                 works_ns.abort(404, f"Work with ID {work_id} not found.")
-            return work
+            return work, 200, {'ETag': version_etag(work['version'])}
         except HTTPException as http_err:
             logger.error(f"HTTP error while updating work with ID {work_id}: {http_err}")
             raise http_err
@@ -126,7 +291,32 @@ class Work(Resource):
             logger.error(f"Error updating work with ID {work_id}: {e}")
             works_ns.abort(500, "An error occurred while updating the work.")
 
-    @works_ns.doc('delete_work')
+    @works_ns.doc('patch_work', params=IF_MATCH_PARAM_DOC)
+    @works_ns.response(400, 'Unknown, read-only or invalid fields, or unknown vehicle')
+    @works_ns.response(409, 'Work modified since the If-Match version')
+    @works_ns.expect(work_model)
+    @works_ns.marshal_with(work_model)
+    def patch(self, work_id):
+        """
+        Partially update a work by ID.
+        Only the fields sent are changed (null clears a field), with a single UPDATE statement.
+        :param work_id: The ID of the work
+        :return: The updated work details or 404 if not found
+        """
+        try:
+            work = patch_work(work_id, patch_changes(work_model), expected_version=if_match_version())
+            if not work:
+                works_ns.abort(404, f"Work with ID {work_id} not found.")
+            return work, 200, {'ETag': version_etag(work['version'])}
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while patching work with ID {work_id}: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error patching work with ID {work_id}: {e}")
+            works_ns.abort(500, "An error occurred while updating the work.")
+
+    @works_ns.doc('delete_work', params=IF_MATCH_PARAM_DOC)
+    @works_ns.response(409, 'Work modified since the If-Match version')
     @works_ns.response(204, 'Work successfully deleted')
     def delete(self, work_id):
         """
@@ -135,7 +325,7 @@ class Work(Resource):
         :return: HTTP 204 status code if deleted successfully or 404 if not found
         """
         try:
-            result = delete_work(work_id)
+            result = delete_work(work_id, expected_version=if_match_version())
             if not result:
                 works_ns.abort(404, f"Work with ID {work_id} not found.")
             return '', 204
@@ -1,32 +1,66 @@
+import logging
+import os
 from flask import Flask
-from sqlalchemy import false
 
-from api import api_bp  # Import the API blueprint
+from api import create_api  # Import the factory of the API blueprint and its namespaces
 from config import Config  # Import the configuration class
 from utils.database import db  # Import the SQLAlchemy database instance
-from utils.utils import configure_logging  # Import the logging configuration function
+from utils.logs import register_logging  # Import the logging pipeline
 from errors.errors import register_error_handlers
+from commands.commands import register_commands
+from utils.compression import register_compression
+from utils.auth import register_auth
+from utils.profiling import register_profiling
+from utils.tenancy import register_tenancy
+from utils.rate_limit import register_rate_limit
+from utils.idempotency import register_idempotency
+from utils.response_cache import register_response_cache
+from utils.health import register_health
+from utils.webhooks import register_webhooks
+from services.job_service import register_jobs
 
 
-def create_app():
+def create_app(config_class=Config):
     """
     Factory function to create and configure the Flask application.
     This function initializes the Flask application, sets up extensions like SQLAlchemy,
     and registers the blueprint for the API routes.
+    :param config_class: Configuration class to load (defaults to Config)
     :return: Configured Flask application instance
     """
     try:
         app = Flask(__name__)
-        app.config.from_object(Config)  # Load configuration from the Config class
+        app.config.from_object(config_class)  # Load configuration from the Config class
+        register_logging(app)  # Queue-based JSON logging, configured once when the app is created
+        # Archived works live on their own bind (the main database unless ARCHIVE_DATABASE_URI is set)
+        app.config["SQLALCHEMY_BINDS"] = {
+            **app.config.get("SQLALCHEMY_BINDS", {}),
+            "archive": app.config["ARCHIVE_DATABASE_URI"] or app.config["SQLALCHEMY_DATABASE_URI"],
+        }
         register_error_handlers(app)  # Register error handlers for 404 and 500 errors
         db.init_app(app) # Initialize extensions (e.g., SQLAlchemy)
-        # Register blueprints (e.g., API routes)
+        register_commands(app)  # Register custom CLI commands (e.g., flask import-data)
+        register_compression(app)  # Compress responses according to Accept-Encoding
+        register_auth(app)  # Authenticate requests carrying a bearer token
+        register_profiling(app)  # Profile the requests of admins asking for it (X-Profile), feed the sampling profiler
+        register_tenancy(app)  # Scope each request to the tenant of its token or X-Tenant-ID header
+        register_rate_limit(app)  # Rate limit clients (after authentication, to key buckets by employee)
+        register_idempotency(app)  # Replay the stored response of POST requests retried with an Idempotency-Key
+        register_response_cache(app)  # Serve unchanged collection GETs from memory
+        register_health(app)  # Database readiness check and slow query counter for the health probes
+        register_webhooks(app)  # Send the queued webhook notifications from a background thread
+        register_jobs(app)  # Run the due jobs (retries, jobs left over by a previous run) from a background thread
+        # Register blueprints (e.g., API routes), importing only the enabled namespaces
+        api_bp, api = create_api(
+            app.config["API_NAMESPACES"],
+            app.config["OPENAPI_SPEC_PATH"] or os.path.join(app.instance_path, "openapi.json")
+        )
+        app.extensions["api"] = api
         app.register_blueprint(api_bp)
         return app
 
     except Exception as e:
         # Log the error and re-raise it to ensure it doesn't get silently ignored
-        import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Error during app creation: {e}")
         raise
@@ -35,7 +69,6 @@ def create_app():
 if __name__ == "__main__":
     # Create the Flask application instance and run it in debug mode
     try:
-        #configure_logging()  # Configure the logging system
         app = create_app()
         app.run(debug=False)  # Running in debug mode for development
         #app.run(ERROR_INCLUDE_MESSAGE=False)
@@ -0,0 +1,59 @@
+"""
+Per-request authentication cost benchmark.
+
+Compares verifying the password hash on every request with verifying a
+signed token (cache miss) and with a cached token (cache hit). Run from
+the project root:
+
+    python -m benchmarks.bench_auth
+"""
+import argparse
+import time
+from datetime import date
+
+from benchmarks.common import create_benchmark_app
+
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    app, _ = create_benchmark_app(SECRET_KEY="benchmark-secret")
+    with app.test_request_context():
+        from models.employee import Employee
+        from utils.auth import verify_token
+        from utils.database import db
+        from utils.security import hash_password, verify_password
+        from services.auth_service import login
+
+        employee = Employee(name="Bench", email="bench@example.com", role="admin",
+                            hired_date=date(2024, 1, 1), password_hash=hash_password("secret"))
+        db.session.add(employee)
+        db.session.commit()
+        token = login("bench@example.com", "secret")["access_token"]
+        cache = app.extensions["auth_token_cache"]
+
+        def uncached():
+            cache.clear()
+            verify_token(token)
+
+        results = {
+            "password hash": per_call(lambda: verify_password(employee.password_hash, "secret"), 20),
+            "token, cache miss": per_call(uncached, args.calls),
+            "token, cache hit": per_call(lambda: verify_token(token), args.calls),
+        }
+
+    for name, micros in results.items():
+        print(f"{name:<20}{micros:>12.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
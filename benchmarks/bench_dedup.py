@@ -0,0 +1,72 @@
+"""
+Duplicate client benchmark: time of the find_duplicate_clients job on generated
+clients, with --duplicates of them entered again with a different spelling of
+the name, phone, e-mail and address. Reports how many of the injected duplicates
+are found and how many pairs are compared, against the n(n-1)/2 pairs a full
+comparison would score.
+
+Run from the project root:
+
+    python -m benchmarks.bench_dedup --clients 100000 --duplicates 1000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import create_benchmark_app
+
+
+def variant(client, rng):
+    """The same person as entered by someone else: other formats, accents and abbreviations."""
+    phone, name = client["phone"], client["name"]
+    return {
+        "name": name.replace("s", "z", 1) if "s" in name and rng.random() < 0.5 else name.upper(),
+        "email": client["email"].replace("@", "+garage@", 1) if rng.random() < 0.5 else client["email"].upper(),
+        "phone": rng.choice([f"+351 {phone[:3]} {phone[3:6]} {phone[6:]}", f"00351{phone}", f"{phone[:3]}-{phone[3:]}"]),
+        "address": client["address"].replace("Rua ", "R. ").replace("Avenida ", "Av. "),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=int, default=1000, help="Clients entered a second time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app, _ = create_benchmark_app()
+    with app.app_context():
+        from models.client import Client
+        from services.client_service import normalized_columns
+        from services.datagen_service import generate_data
+        from services.dedup_service import find_duplicate_clients
+        from utils.database import db
+
+        generate_data(clients=args.clients, seed=args.seed)
+        rng = random.Random(args.seed)
+        originals = rng.sample(range(1, args.clients + 1), args.duplicates)
+        columns = (Client.client_id, Client.name, Client.email, Client.phone, Client.address)
+        rows, expected = [], set()
+        for index, client in enumerate(db.session.execute(select(*columns).where(Client.client_id.in_(originals))).mappings()):
+            row = {"client_id": args.clients + 1 + index, "tenant_id": 1, "version": 1, **variant(client, rng)}
+            rows.append({**row, **normalized_columns(row)})
+            expected.add((client["client_id"], row["client_id"]))
+        db.session.execute(insert(Client), rows)
+        db.session.commit()
+
+        started = time.perf_counter()
+        result = find_duplicate_clients()
+        duration = time.perf_counter() - started
+
+    found = {tuple(pair["client_ids"]) for group in result["duplicates"] for pair in group["pairs"]}
+    total = args.clients + args.duplicates
+    print(f"{total} clients: {result['compared_pairs']} pairs compared instead of {total * (total - 1) // 2} "
+          f"in {duration:.2f}s ({len(result['skipped_keys'])} keys shared by too many clients skipped)")
+    print(f"Injected duplicates found: {len(found & expected)}/{len(expected)}, "
+          f"other pairs reported: {len(found - expected)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Export size/speed benchmark: JSON list endpoint vs columnar exports.
+
+Fills a throw-away database with works and compares the JSON returned by
+GET /api/work/ with the binary formats of GET /api/export/works (payload
+size, time to produce and time to load on the client). Run from the
+project root:
+
+    python -m benchmarks.bench_export --rows 200000
+"""
+import argparse
+import io
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_benchmark_app
+
+
+def populate(rows):
+    from models.client import Client
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from utils.database import db
+
+    db.session.execute(insert(Client), [{"name": "Client", "email": "c@example.com", "phone": "1", "address": "Rua A"}])
+    db.session.execute(insert(Vehicle), [
+        {"client_id": 1, "license_plate": f"AA-{i:04d}", "brand": "Opel", "model": "Corsa", "year": 2010} for i in range(100)
+    ])
+    statuses = ["pending", "in_progress", "completed", "cancelled"]
+    start = datetime(2022, 1, 1)
+    for offset in range(0, rows, 50000):
+        db.session.execute(insert(Work), [
+            {"vehicle_id": i % 100 + 1, "description": f"Revision {i % 7}", "status": statuses[i % 4],
+             "created_at": start + timedelta(minutes=i), "updated_at": start + timedelta(minutes=i, hours=3)}
+            for i in range(offset, min(rows, offset + 50000))
+        ])
+    db.session.commit()
+
+
+def load(fmt, data):
+    if fmt == "json":
+        return len(json.loads(data))
+    if fmt == "msgpack":
+        import msgpack
+        unpacker = msgpack.Unpacker(io.BytesIO(data), raw=False)
+        next(unpacker)  # header
+        return sum(batch["rows"] for batch in unpacker)
+    import pyarrow.ipc
+    import pyarrow.parquet
+    table = pyarrow.parquet.read_table(io.BytesIO(data)) if fmt == "parquet" else pyarrow.ipc.open_stream(data).read_all()
+    return table.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    app, _ = create_benchmark_app(SECRET_KEY="benchmark-secret", COMPRESSION_ENABLED=False)
+    with app.app_context():
+        populate(args.rows)
+        from services.export_service import available_export_formats
+        formats = available_export_formats()
+    with app.test_request_context():
+        from models.employee import Employee
+        from services.auth_service import login
+        from utils.database import db
+        from utils.security import hash_password
+
+        # Exports are reserved to admins and managers
+        db.session.add(Employee(name="Bench", email="bench@example.com", role="manager",
+                                hired_date=date(2024, 1, 1), password_hash=hash_password("secret")))
+        db.session.commit()
+        token = login("bench@example.com", "secret")["access_token"]
+
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    print(f"{'format':<10}{'bytes':>14}{'produce (s)':>14}{'load (s)':>12}{'rows':>10}")
+    for fmt in ["json"] + formats:
+        url = "/api/work/" if fmt == "json" else f"/api/export/works?format={fmt}"
+        started = time.perf_counter()
+        data = client.get(url).data
+        produced = time.perf_counter() - started
+        started = time.perf_counter()
+        rows = load(fmt, data)
+        loaded = time.perf_counter() - started
+        print(f"{fmt:<10}{len(data):>14,}{produced:>14.2f}{loaded:>12.2f}{rows:>10}")
+
+
+if __name__ == "__main__":
+    main()
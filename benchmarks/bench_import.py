@@ -0,0 +1,58 @@
+"""
+Bulk import throughput benchmark.
+
+Generates a CSV file with one client per row and imports it through the
+import pipeline, reporting rows/sec. Run from the project root:
+
+    python -m benchmarks.bench_import --rows 1000000
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.common import create_benchmark_app
+
+
+def write_clients_csv(path, rows, duplicate_every=0):
+    """
+    Write a CSV file of synthetic clients.
+
+    :param path: Destination path.
+    :param rows: Number of data rows.
+    :param duplicate_every: Repeat a previous name every N rows to exercise error reporting (0 disables).
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "email", "phone", "address"])
+        for i in range(rows):
+            n = i - 1 if duplicate_every and i and i % duplicate_every == 0 else i
+            writer.writerow([f"Client {n}", f"client{i}@example.com", f"9{i:08d}", f"Rua {i % 500}, {i % 97}, Lisboa"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--duplicate-every", type=int, default=0)
+    args = parser.parse_args()
+
+    from services.import_service import import_file
+
+    workdir = tempfile.mkdtemp(prefix="garage-bench-")
+    csv_path = os.path.join(workdir, "clients.csv")
+    started = time.perf_counter()
+    write_clients_csv(csv_path, args.rows, args.duplicate_every)
+    print(f"generated {args.rows} rows in {time.perf_counter() - started:.1f}s ({os.path.getsize(csv_path) / 1e6:.1f} MB)")
+
+    app, _ = create_benchmark_app(os.path.join(workdir, "bench.db"))
+    with app.app_context():
+        report = import_file("clients", csv_path, batch_size=args.batch_size, max_errors=10)
+
+    print(f"inserted {report['inserted']} / {report['processed']} rows, {report['failed']} rejected")
+    print(f"{report['seconds']:.1f}s -> {report['rows_per_second']} rows/sec (batch size {args.batch_size})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Logging overhead benchmark: request latency with logging off, with the former
+synchronous file logging (every record formatted and written by the request
+thread) and with the queue-based pipeline (records handed to a listener thread),
+with and without sampling.
+
+Every request writes one access record, plus `--records` extra INFO records to
+mimic the service logs. Writes to a temporary file hit the page cache, so
+`--write-delay-us` adds a delay to each write to mimic a busy disk or a network
+file system (0 to measure the raw formatting cost). Run from the project root:
+
+    python -m benchmarks.bench_logging --requests 5000 --records 4 --write-delay-us 200
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_benchmark_app
+
+MODES = [
+    ("off", dict(LOG_LEVEL="WARNING", LOG_ACCESS=False)),
+    ("sync text", dict(LOG_ASYNC=False, LOG_FORMAT="text", LOG_LEVEL="DEBUG")),
+    ("sync json", dict(LOG_ASYNC=False, LOG_FORMAT="json")),
+    ("async json", dict(LOG_ASYNC=True, LOG_FORMAT="json")),
+    ("async json 10%", dict(LOG_ASYNC=True, LOG_FORMAT="json", LOG_SAMPLE_RATE=0.1)),
+]
+
+
+def slow_writes(delay):
+    """
+    Make every log write block for `delay` seconds, like a write to a slow device
+    (the GIL is released meanwhile, as during real I/O).
+    """
+    emit = logging.StreamHandler.emit
+
+    def delayed_emit(self, record):
+        emit(self, record)
+        time.sleep(delay)
+
+    logging.StreamHandler.emit = delayed_emit
+
+
+def run(overrides, log_file, requests, records):
+    from models.client import Client
+    from utils.database import db
+    from utils.logs import _state, _stop_listener
+
+    app, _ = create_benchmark_app(
+        LOG_FILE=log_file, RATE_LIMIT_ENABLED=False, COMPRESSION_ENABLED=False, **overrides
+    )
+    with app.app_context():
+        db.session.execute(insert(Client), [
+            {"name": f"Client {i}", "email": f"c{i}@example.com", "phone": "1", "address": "Rua A"} for i in range(100)
+        ])
+        db.session.commit()
+
+    service_logger = logging.getLogger("benchmarks.service")
+
+    @app.before_request
+    def log_service_records():
+        for index in range(records):
+            service_logger.info("Loaded %s rows for %s", index, "client")
+
+    client = app.test_client()
+    for index in range(200):
+        client.get(f"/api/client/{index % 100 + 1}")  # Warm up
+    latencies = []
+    for index in range(requests):
+        started = time.perf_counter()
+        response = client.get(f"/api/client/{index % 100 + 1}")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    _stop_listener()  # Flush the queue before reading the file size
+    dropped = _state["handler"].dropped if _state["handler"] else 0
+    latencies.sort()
+    return statistics.median(latencies) * 1e6, latencies[int(len(latencies) * 0.99)] * 1e6, dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--records", type=int, default=4, help="Extra INFO records per request")
+    parser.add_argument("--write-delay-us", type=float, default=200, help="Extra time taken by each log write")
+    args = parser.parse_args()
+    if args.write_delay_us:
+        slow_writes(args.write_delay_us / 1e6)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'mode':<16}{'median (us)':>12}{'p99 (us)':>12}{'overhead':>12}{'log size':>12}{'dropped':>10}")
+        baseline = None
+        for name, overrides in MODES:
+            log_file = os.path.join(directory, f"{name.replace(' ', '-')}.log")
+            median, p99, dropped = run(overrides, log_file, args.requests, args.records)
+            baseline = baseline or median
+            size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+            print(f"{name:<16}{median:>12.1f}{p99:>12.1f}{median - baseline:>+12.1f}{size / 1024:>10.0f}kB{dropped:>10}")
+
+
+if __name__ == "__main__":
+    main()
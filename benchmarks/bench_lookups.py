@@ -0,0 +1,102 @@
+"""
+Single-row lookup benchmark: legacy `Model.query.get()` + ORM object to dict
+(how the services used to read) vs the pre-built SELECT statements used by
+get_client, get_vehicle, get_work and get_employee.
+
+Each call starts from an empty session identity map, like a new request.
+Run from the project root:
+
+    python -m benchmarks.bench_lookups --calls 10000
+
+With --snapshot, the lookups run against a database filled by
+`flask generate-data --snapshot` instead of the 1000 rows inserted here; the first
+1000 rows of each table visible to tenant 1 are looked up.
+"""
+import argparse
+import time
+import warnings
+from datetime import date
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import create_benchmark_app
+
+ROWS = 1000
+
+
+def populate():
+    from models.client import Client
+    from models.employee import Employee
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from utils.database import db
+
+    db.session.execute(insert(Client), [
+        {"name": f"Client {i}", "email": f"c{i}@example.com", "phone": "1", "address": "Rua A"} for i in range(ROWS)
+    ])
+    db.session.execute(insert(Vehicle), [
+        {"client_id": i + 1, "license_plate": f"AA-{i:04d}", "brand": "Opel", "model": "Corsa", "year": 2010}
+        for i in range(ROWS)
+    ])
+    db.session.execute(insert(Work), [{"vehicle_id": i + 1, "description": "Revision"} for i in range(ROWS)])
+    db.session.execute(insert(Employee), [
+        {"name": f"Employee {i}", "email": f"e{i}@example.com", "role": "mechanic", "hired_date": date(2024, 1, 1)}
+        for i in range(ROWS)
+    ])
+    db.session.commit()
+
+
+def per_call(func, calls, ids):
+    from utils.database import db
+
+    started = time.perf_counter()
+    for index in range(calls):
+        db.session.expunge_all()  # Every request starts with an empty identity map
+        func(ids[index % len(ids)])
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--snapshot", help="Pre-generated database to copy instead of inserting rows")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message=".*Query.get.*")
+
+    app, _ = create_benchmark_app(snapshot=args.snapshot)
+    with app.app_context():
+        from models.client import Client
+        from models.employee import Employee
+        from models.vehicle import Vehicle
+        from models.work import Work
+        from services.client_service import get_client, CLIENT_COLUMNS
+        from services.employee_service import get_employee, EMPLOYEE_COLUMNS
+        from services.vehicle_service import get_vehicle, VEHICLE_COLUMNS
+        from services.work_service import get_work, WORK_COLUMNS
+        from utils.database import db
+
+        if not args.snapshot:
+            populate()
+        lookups = [
+            ("get_client", Client, CLIENT_COLUMNS, get_client),
+            ("get_vehicle", Vehicle, VEHICLE_COLUMNS, get_vehicle),
+            ("get_work", Work, WORK_COLUMNS, get_work),
+            ("get_employee", Employee, EMPLOYEE_COLUMNS, get_employee),
+        ]
+
+        print(f"{'lookup':<14}{'Query.get (us)':>16}{'pre-built (us)':>16}{'calls/s':>10}{'speed-up':>10}")
+        for name, model, columns, service in lookups:
+            def legacy(identity, model=model, columns=columns):
+                instance = model.query.get(identity)
+                return {column: getattr(instance, column) for column in columns}
+
+            key = getattr(model, model.__mapper__.primary_key[0].key)
+            ids = db.session.execute(select(key).limit(ROWS)).scalars().all()
+            assert legacy(ids[0]) == service(ids[0])
+            before = per_call(legacy, args.calls, ids)
+            after = per_call(service, args.calls, ids)
+            print(f"{name:<14}{before:>16.1f}{after:>16.1f}{1e6 / after:>10.0f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Backfill benchmark: how long request writes wait while a migration fills a new
+column of the work table, with a single UPDATE and with the batched backfill of
+the migration operations (one transaction per batch).
+
+A writer thread updates random works in a loop, like requests would, and the
+latency of each write is recorded while the backfill runs. Run from the
+project root:
+
+    python -m benchmarks.bench_migrations --works 1000000 --batch-size 1000 --pause 0.01
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from sqlalchemy import insert, text
+
+from benchmarks.common import create_benchmark_app
+
+
+def populate(works):
+    from models.client import Client
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from utils.database import db
+
+    db.session.execute(insert(Client).values(name="Client", email="c@example.com", phone="1", address="Rua A"))
+    db.session.execute(insert(Vehicle).values(client_id=1, license_plate="AA-00001", brand="Opel", model="Corsa", year=2010))
+    for start in range(0, works, 100000):
+        db.session.execute(insert(Work), [
+            {"vehicle_id": 1, "description": f"Revision {i}"} for i in range(start, min(works, start + 100000))
+        ])
+    db.session.commit()
+
+
+def measure(engine, works, backfill):
+    """Run a backfill while a writer thread updates works; return its duration and the write latencies."""
+    latencies, done = [], threading.Event()
+
+    def writer():
+        while not done.is_set():
+            started = time.perf_counter()
+            with engine.begin() as connection:
+                connection.execute(text("UPDATE work SET status = 'in_progress' WHERE work_id = :id"),
+                                   {"id": random.randint(1, works)})
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.2)
+    started = time.perf_counter()
+    backfill()
+    duration = time.perf_counter() - started
+    done.set()
+    thread.join()
+    return duration, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--works", type=int, default=500000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.01, help="Seconds between batches")
+    args = parser.parse_args()
+
+    from utils.migrations import Operations
+
+    app, _ = create_benchmark_app(DB_SLOW_QUERY_MS=10 ** 9)
+    with app.app_context():
+        from utils.database import db
+
+        populate(args.works)
+        engine = db.engine
+    op = Operations(engine, batch_size=args.batch_size, pause=args.pause)
+
+    def single_update():
+        op.execute("UPDATE work SET length_a = length(description) WHERE length_a IS NULL")
+
+    def batched():
+        op.backfill("work", "length_b = length(description)", "length_b IS NULL", key="work_id")
+
+    op.add_column("work", "length_a INTEGER")
+    op.add_column("work", "length_b INTEGER")
+    print(f"{'backfill':<22}{'duration (s)':>14}{'writes':>8}{'median (ms)':>13}{'max wait (ms)':>15}")
+    for name, backfill in [("single UPDATE", single_update), (f"batches of {args.batch_size}", batched)]:
+        duration, latencies = measure(engine, args.works, backfill)
+        print(f"{name:<22}{duration:>14.2f}{len(latencies):>8}{statistics.median(latencies):>13.2f}{max(latencies):>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
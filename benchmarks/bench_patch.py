@@ -0,0 +1,75 @@
+"""
+Work status update benchmark: PUT (load, modify, flush) vs PATCH
+(a single UPDATE ... RETURNING).
+
+Fills a throw-away database with works, then updates the status of random
+works through both HTTP endpoints and reports the latency and the number
+of SQL statements per update. Run from the project root:
+
+    python -m benchmarks.bench_patch --rows 100000 --updates 5000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import event, insert
+
+from benchmarks.common import create_benchmark_app
+
+
+def populate(rows):
+    from models.client import Client
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from utils.database import db
+
+    db.session.execute(insert(Client), [{"name": "Client", "email": "c@example.com", "phone": "1", "address": "Rua A"}])
+    db.session.execute(insert(Vehicle), [
+        {"client_id": 1, "license_plate": f"AA-{i:04d}", "brand": "Opel", "model": "Corsa", "year": 2010} for i in range(100)
+    ])
+    for offset in range(0, rows, 50000):
+        db.session.execute(insert(Work), [
+            {"vehicle_id": i % 100 + 1, "description": f"Revision {i % 7}", "status": "pending"}
+            for i in range(offset, min(rows, offset + 50000))
+        ])
+    db.session.commit()
+
+
+def run(client, method, work_ids, statements):
+    statuses = ["in_progress", "completed"]
+    send = client.put if method == "PUT" else client.patch
+    statements.clear()
+    started = time.perf_counter()
+    for index, work_id in enumerate(work_ids):
+        body = {"status": statuses[index % 2]}
+        if method == "PUT":
+            body.update(vehicle_id=1, description="Revision")
+        response = send(f"/api/work/{work_id}", json=body)
+        assert response.status_code == 200, response.get_json()
+    elapsed = time.perf_counter() - started
+    return elapsed / len(work_ids) * 1e6, len(statements) / len(work_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=5000)
+    args = parser.parse_args()
+
+    app, _ = create_benchmark_app(RATE_LIMIT_ENABLED=False, COMPRESSION_ENABLED=False)
+    with app.app_context():
+        from utils.database import db
+
+        populate(args.rows)
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *_: statements.append(1))
+
+    client = app.test_client()
+    work_ids = [random.randint(1, args.rows) for _ in range(args.updates)]
+    for method in ("PUT", "PATCH"):
+        micros, per_update = run(client, method, work_ids, statements)
+        print(f"{method:<6}{micros:>10.1f} us/update {per_update:>6.1f} statements/update")
+
+
+if __name__ == "__main__":
+    main()
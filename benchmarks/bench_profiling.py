@@ -0,0 +1,92 @@
+"""
+Profiling overhead benchmark: latency of GET /api/client/ (a page of clients)
+and GET /api/client/<id> with no profiler, while the sampling profiler runs
+(at its default interval and at 1 ms), and for requests profiled with
+`X-Profile: text`, which run under cProfile and return its report.
+
+The requests are sent by --threads threads, so the sampler has as many
+stacks to walk per sample as a server with that many busy workers.
+Run from the project root:
+
+    python -m benchmarks.bench_profiling --requests 2000 --threads 4
+"""
+import argparse
+import statistics
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_benchmark_app
+
+
+def run(app, requests, threads, headers=None):
+    """Send the requests from several threads; return the per-request latencies in ms."""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = app.test_client()
+        local = []
+        for index in range(count):
+            url = '/api/client/' if index % 2 == 0 else f'/api/client/{index % 500 + 1}'
+            started = time.perf_counter()
+            client.get(url, headers=headers)
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    app, _ = create_benchmark_app(
+        SECRET_KEY="benchmark-secret", RATE_LIMIT_ENABLED=False, RESPONSE_CACHE_ENABLED=False,
+        LOG_ACCESS=False, DB_SLOW_QUERY_MS=10 ** 9
+    )
+    with app.test_request_context():
+        from models.client import Client
+        from models.employee import Employee
+        from services.auth_service import login
+        from utils.database import db
+        from utils.security import hash_password
+
+        db.session.execute(insert(Client), [
+            {"name": f"Client {i}", "email": f"c{i}@example.com", "phone": "1", "address": "Rua A"} for i in range(500)
+        ])
+        db.session.add(Employee(name="Bench", email="bench@example.com", role="admin",
+                                hired_date=date(2024, 1, 1), password_hash=hash_password("secret")))
+        db.session.commit()
+        token = login("bench@example.com", "secret")["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    sampler = app.extensions["sampling_profiler"]
+
+    run(app, args.threads * 20, args.threads, auth)  # Warm up
+    results = {"no profiler": run(app, args.requests, args.threads, auth)}
+    for interval in (app.config["PROFILER_INTERVAL"], 0.001):
+        sampler.start(interval=interval, duration=3600)
+        results[f"sampler, {interval * 1000:g} ms"] = run(app, args.requests, args.threads, auth)
+        sampler.stop()
+        stats = sampler.stats()
+        print(f"Sampler every {interval * 1000:g} ms: {stats['samples']} samples, {stats['stacks']} stacks, "
+              f"{stats['overhead']:.1%} of a CPU spent sampling")
+    results["X-Profile: text"] = run(app, args.requests, args.threads, {**auth, "X-Profile": "text"})
+
+    print(f"{'':<20}{'median (ms)':>13}{'p95 (ms)':>10}")
+    for name, latencies in results.items():
+        print(f"{name:<20}{statistics.median(latencies):>13.2f}{statistics.quantiles(latencies, n=20)[-1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Collection GET benchmark: latency of `GET /api/work/` (optionally with
+`?embed=vehicle.client`) served by the resource, with the response cache
+disabled, and served from the cache while the tables do not change.
+
+Requests go through the full application (authentication, tenancy, rate
+limiting and logging are disabled to isolate the cache). Run from the
+project root:
+
+    python -m benchmarks.bench_response_cache --works 100 1000 10000 --calls 200
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_benchmark_app
+
+
+def populate(works):
+    from models.client import Client
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from utils.database import db
+
+    vehicles = max(1, works // 10)
+    db.session.execute(insert(Client), [
+        {"name": f"Client {i}", "email": "c@example.com", "phone": "1", "address": "Rua A"} for i in range(vehicles)
+    ])
+    db.session.execute(insert(Vehicle), [
+        {"client_id": i + 1, "license_plate": f"AA-{i:05d}", "brand": "Opel", "model": "Corsa", "year": 2010}
+        for i in range(vehicles)
+    ])
+    db.session.execute(insert(Work), [{"vehicle_id": i % vehicles + 1, "description": "Revision"} for i in range(works)])
+    db.session.commit()
+
+
+def per_call(client, url, calls):
+    client.get(url)  # Warm up (and fill the cache)
+    started = time.perf_counter()
+    for _ in range(calls):
+        response = client.get(url)
+        assert response.status_code == 200
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--works", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'works':>8}{'query':>26}{'uncached (us)':>16}{'cached (us)':>14}{'speed-up':>10}")
+    for works in args.works:
+        app, _ = create_benchmark_app(RATE_LIMIT_ENABLED=False, COMPRESSION_ENABLED=False, LOG_ACCESS=False)
+        logging.disable(logging.INFO)
+        with app.app_context():
+            populate(works)
+        client = app.test_client()
+        for url in ("/api/work/", "/api/work/?embed=vehicle.client"):
+            app.config["RESPONSE_CACHE_ENABLED"] = False
+            uncached = per_call(client, url, args.calls)
+            app.config["RESPONSE_CACHE_ENABLED"] = True
+            cached = per_call(client, url, args.calls)
+            print(f"{works:>8}{url[len('/api/work/'):] or '(all columns)':>26}{uncached:>16.0f}{cached:>14.0f}"
+                  f"{uncached / cached:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
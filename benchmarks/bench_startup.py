@@ -0,0 +1,73 @@
+"""
+Cold start benchmark.
+
+Starts fresh Python processes and reports the import time of the
+application, the time spent in create_app() and the time to the first
+responses (the Swagger spec and a small API call), with and without the
+prebuilt OpenAPI spec and with a subset of namespaces. Run from the
+project root:
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a fresh interpreter for every run
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+client.get("/api/swagger.json")
+t3 = time.perf_counter()
+client.get("/api/auth/me")
+t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_swagger": t3 - t2, "first_api": t4 - t3, "total": t4 - t0}))
+"""
+
+
+def run(env, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="garage-bench-")
+    spec_path = os.path.join(workdir, "openapi.json")
+    base = dict(os.environ, DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                SECRET_KEY="benchmark-secret", OPENAPI_SPEC_PATH=os.path.join(workdir, "missing.json"))
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "openapi", "--output", spec_path],
+                   cwd=ROOT, env=base, check=True, capture_output=True)
+
+    scenarios = {
+        "spec built on first hit": base,
+        "prebuilt spec": dict(base, OPENAPI_SPEC_PATH=spec_path),
+        "auth namespace only": dict(base, API_NAMESPACES="auth"),
+    }
+    print(f"{'scenario':<26}{'import':>10}{'create_app':>12}{'1st swagger':>13}{'1st api':>10}{'total':>10}  (ms, median of {args.runs})")
+    for name, env in scenarios.items():
+        result = run(env, args.runs)
+        print(f"{name:<26}" + "".join(f"{result[key] * 1000:>{width}.1f}" for key, width in
+                                       (("import", 10), ("create_app", 12), ("first_swagger", 13), ("first_api", 10), ("total", 10))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Tenant scoping benchmark: latency of one garage's queries as the number of
+garages sharing the database grows, with the tenant-leading indexes and
+without them.
+
+Every tenant gets the same number of vehicles and works, so the per-tenant
+result sets do not change; only the total table size does. Run from the
+project root:
+
+    python -m benchmarks.bench_tenancy --tenants 1 10 100 --works 1000 --calls 200
+"""
+import argparse
+import time
+
+from flask import g
+from sqlalchemy import insert, text
+
+from benchmarks.common import create_benchmark_app
+
+# Indexes that lead with tenant_id on the queried tables (the unique constraints stay)
+TENANT_INDEXES = ["ix_work_tenant_vehicle", "ix_work_tenant_status", "ix_vehicle_tenant_client"]
+
+
+def populate(tenants, works):
+    from models.client import Client
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from utils.database import db
+
+    vehicles = max(1, works // 10)
+    for tenant_id in range(1, tenants + 1):
+        client_id = db.session.execute(
+            insert(Client).values(tenant_id=tenant_id, name="Client", email="c@example.com", phone="1", address="Rua A")
+            .returning(Client.client_id)
+        ).scalar()
+        first = db.session.execute(insert(Vehicle).returning(Vehicle.vehicle_id), [
+            {"tenant_id": tenant_id, "client_id": client_id, "license_plate": f"AA-{i:05d}", "brand": "Opel",
+             "model": "Corsa", "year": 2010}
+            for i in range(vehicles)
+        ]).scalars().first()
+        db.session.execute(insert(Work), [
+            {"tenant_id": tenant_id, "vehicle_id": first + i % vehicles, "description": "Revision",
+             "status": ("pending", "completed")[i % 2]}
+            for i in range(works)
+        ])
+    db.session.commit()
+    return vehicles
+
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for index in range(calls):
+        func(index)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def measure(tenants, works, calls):
+    from models.work import Work
+    from services.work_service import get_all_works
+    from utils.database import db
+
+    app, _ = create_benchmark_app()
+    with app.app_context():
+        vehicles = populate(tenants, works)
+        g.tenant_id = (tenants + 1) // 2  # A garage in the middle of the table
+        first_vehicle = (g.tenant_id - 1) * vehicles + 1
+
+        def list_works(_):
+            assert len(get_all_works()) == works
+
+        def works_of_vehicle(index):
+            Work.query.filter_by(vehicle_id=first_vehicle + index % vehicles).all()
+
+        def open_works(_):
+            Work.query.filter_by(status="pending").count()
+
+        results = []
+        for indexed in (True, False):
+            if not indexed:
+                for name in TENANT_INDEXES:
+                    db.session.execute(text(f"DROP INDEX {name}"))
+                db.session.commit()
+            results.append([per_call(query, calls) for query in (list_works, works_of_vehicle, open_works)])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--works", type=int, default=1000, help="Works per tenant")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'tenants':>8}{'total works':>13}{'list (us)':>22}{'by vehicle (us)':>22}{'open count (us)':>22}")
+    print(f"{'':>21}" + f"{'indexed / no index':>22}" * 3)
+    for tenants in args.tenants:
+        indexed, plain = measure(tenants, args.works, args.calls)
+        cells = "".join(f"{f'{a:.0f} / {b:.0f}':>22}" for a, b in zip(indexed, plain))
+        print(f"{tenants:>8}{tenants * args.works:>13}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Webhook benchmark: latency of work status updates (PATCH /api/work/<id>) when
+the notification is sent inline, in the request, and when it is queued in the
+outbox and sent by the dispatcher, against a local receiver answering after
+--delay seconds. Also reports how long the dispatcher takes to deliver the
+queued notifications and how many HTTP requests it needed (the notifications of
+a subscription are sent together).
+
+Run from the project root:
+
+    python -m benchmarks.bench_webhooks --updates 500 --delay 0.05
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from datetime import date
+
+from benchmarks.common import create_benchmark_app
+
+
+def populate(client, clients):
+    works = []
+    for index in range(clients):
+        client_id = client.post('/api/client/', json={
+            "name": f"Client {index}", "email": f"c{index}@example.com", "phone": "1", "address": "Rua A"
+        }).get_json()["client_id"]
+        vehicle_id = client.post('/api/vehicle/', json={
+            "client_id": client_id, "license_plate": f"AA-{index:05d}", "brand": "Opel", "model": "Corsa", "year": 2010
+        }).get_json()["vehicle_id"]
+        works.append(client.post('/api/work/', json={"vehicle_id": vehicle_id, "description": "Revision"}).get_json()["work_id"])
+    return works
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=20, help="Clients, each with one subscribed work")
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds the receiver takes to answer")
+    args = parser.parse_args()
+
+    from utils.webhooks import WebhookDispatcher, make_receiver, post
+
+    server = make_receiver(delay=args.delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+    # The dispatcher is driven by hand, to time the requests and the delivery separately
+    app, _ = create_benchmark_app(
+        SECRET_KEY="benchmark-secret", WEBHOOK_DISPATCHER="off", WEBHOOK_WORKERS=8, WEBHOOK_ALLOW_PRIVATE=True,
+        RATE_LIMIT_ENABLED=False, LOG_ACCESS=False, DB_SLOW_QUERY_MS=10 ** 9
+    )
+    client = app.test_client()
+    works = populate(client, args.clients)
+    with app.test_request_context():
+        from models.employee import Employee
+        from services.auth_service import login
+        from utils.database import db
+        from utils.security import hash_password
+
+        db.session.add(Employee(name="Bench", email="bench@example.com", role="manager",
+                                hired_date=date(2024, 1, 1), password_hash=hash_password("secret")))
+        db.session.commit()
+        auth = {"Authorization": f"Bearer {login('bench@example.com', 'secret')['access_token']}"}
+
+    def update(index):
+        work_id = works[index % len(works)]
+        status = "completed" if index // len(works) % 2 == 0 else "in_progress"
+        started = time.perf_counter()
+        client.patch(f'/api/work/{work_id}', json={"status": status})
+        return work_id, status, started
+
+    inline = []
+    for index in range(args.updates):
+        work_id, status, started = update(index)
+        body = json.dumps({"deliveries": [{"event": "work.status_changed", "data": {"work_id": work_id, "status": status}}]})
+        post(url, body.encode(), {"Content-Type": "application/json"}, 5)
+        inline.append((time.perf_counter() - started) * 1000)
+
+    for client_id in range(1, args.clients + 1):
+        client.post('/api/webhook/', json={"client_id": client_id, "url": url}, headers=auth)
+    queued = []
+    for index in range(args.updates):
+        _, _, started = update(args.updates + index)
+        queued.append((time.perf_counter() - started) * 1000)
+
+    dispatcher = WebhookDispatcher(app)
+    requests_before = server.requests
+    started = time.perf_counter()
+    with app.app_context():
+        delivered = dispatcher.drain()
+    duration = time.perf_counter() - started
+    dispatcher.stop()
+
+    print(f"{'notification':<12}{'median (ms)':>13}{'p95 (ms)':>10}")
+    for name, latencies in [("inline", inline), ("outbox", queued)]:
+        print(f"{name:<12}{statistics.median(latencies):>13.2f}{statistics.quantiles(latencies, n=20)[-1]:>10.2f}")
+    print(f"Dispatcher: {delivered} notifications delivered in {duration:.2f}s "
+          f"with {server.requests - requests_before} requests ({args.delay * 1000:.0f} ms each, {dispatcher.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
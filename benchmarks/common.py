@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Allow running the benchmarks with `python -m benchmarks.<name>` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from utils.database import db  # noqa: E402
+
+
+def create_benchmark_app(path=None, snapshot=None, **overrides):
+    """
+    Create an application bound to a throw-away SQLite database with every table created.
+
+    :param path: Path of the SQLite file (a temporary file is used when omitted).
+    :param snapshot: Database written by `flask generate-data --snapshot`, copied to the path
+                     so the benchmark runs on pre-generated data and leaves the snapshot intact.
+    :param overrides: Extra configuration values.
+    :return: tuple: (Flask application, database path)
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="garage-bench-", suffix=".db")
+        os.close(fd)
+    if snapshot is not None:
+        shutil.copyfile(snapshot, path)
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        AUTH_REQUIRED = False  # Most benchmarks call the API without logging in
+
+    for key, value in overrides.items():
+        setattr(BenchmarkConfig, key, value)
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+    return app, path
@@ -0,0 +1,237 @@
+import json
+import click
+from flask import current_app, g
+
+
+def register_commands(app):
+    """
+    Register custom CLI commands for the Flask application.
+    They are available through the `flask` command (e.g. `flask import-data --help`).
+    """
+
+    @app.cli.command("import-data")
+    @click.argument("entity", type=click.Choice(["clients", "vehicles", "works"]))
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), help="File format (guessed from the extension by default).")
+    @click.option("--batch-size", type=int, help="Rows validated and committed per transaction.")
+    def import_data_command(entity, path, fmt, batch_size):
+        """
+        Bulk import clients, vehicles or works from a CSV or NDJSON file.
+        """
+        from services.import_service import import_file
+
+        report = import_file(
+            entity, path, fmt,
+            batch_size=batch_size or current_app.config.get("IMPORT_BATCH_SIZE", 1000),
+            max_errors=current_app.config.get("IMPORT_MAX_ERRORS", 1000)
+        )
+        click.echo(json.dumps(report, indent=2))
+
+    @app.cli.command("archive-works")
+    @click.option("--months", type=int, help="Archive works finished or deleted more than this many months ago.")
+    @click.option("--batch-size", type=int, help="Works moved per transaction.")
+    def archive_works_command(months, batch_size):
+        """
+        Move old finished and deleted works to the archive database.
+        """
+        from services.archive_service import archive_works
+
+        click.echo(json.dumps(archive_works(months, batch_size), indent=2))
+
+    @app.cli.command("set-password")
+    @click.argument("email")
+    @click.password_option()
+    @click.option("--tenant", type=int, help="Tenant of the employee (DEFAULT_TENANT_ID by default).")
+    def set_password_command(email, password, tenant):
+        """
+        Set the login password of an employee.
+        """
+        from services.auth_service import set_password
+
+        g.tenant_id = tenant
+        if not set_password(email, password):
+            raise click.ClickException(f"Employee with e-mail {email} not found.")
+        click.echo(f"Password updated for {email}.")
+
+    @app.cli.command("create-admin")
+    @click.argument("name")
+    @click.argument("email")
+    @click.option("--phone", default="", help="Phone number of the employee.")
+    @click.password_option()
+    @click.option("--tenant", type=int, help="Tenant of the employee (DEFAULT_TENANT_ID by default).")
+    def create_admin_command(name, email, phone, password, tenant):
+        """
+        Create an admin employee with a password, to log in on a database without one.
+        """
+        from datetime import date
+        from services.auth_service import set_password
+        from services.employee_service import create_employee
+
+        g.tenant_id = tenant
+        employee = create_employee(name, email, phone, "admin", date.today().isoformat())
+        if "error" in employee:
+            raise click.ClickException(employee["error"])
+        set_password(email, password)
+        click.echo(f"Admin {email} created (employee {employee['employee_id']}).")
+
+    @app.cli.command("openapi")
+    @click.option("--output", type=click.Path(dir_okay=False), help="Destination file (defaults to instance/openapi.json).")
+    def openapi_command(output):
+        """
+        Generate the Swagger/OpenAPI spec once (at build time) so it is served from a file.
+        """
+        import os
+        from api import build_openapi_spec
+
+        output = output or current_app.config["OPENAPI_SPEC_PATH"] or os.path.join(current_app.instance_path, "openapi.json")
+        with current_app.test_request_context():
+            spec = build_openapi_spec(current_app.extensions["api"])
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as spec_file:
+            json.dump(spec, spec_file)
+        click.echo(f"OpenAPI spec written to {output} ({len(spec.get('paths', {}))} paths).")
+
+    def migration_engines():
+        from utils.database import db
+        from utils.migrations import MIGRATIONS_PATH
+
+        return db.engines, current_app.config["MIGRATIONS_PATH"] or MIGRATIONS_PATH
+
+    @app.cli.command("db-upgrade")
+    @click.option("--target", type=int, help="Last migration version to apply (all pending ones by default).")
+    @click.option("--batch-size", type=int, help="Rows updated per backfill transaction.")
+    def db_upgrade_command(target, batch_size):
+        """
+        Apply the pending schema migrations.
+        """
+        from utils.migrations import upgrade
+
+        engines, path = migration_engines()
+        try:
+            applied = upgrade(
+                engines, path, target,
+                batch_size=batch_size or current_app.config["MIGRATION_BATCH_SIZE"],
+                pause=current_app.config["MIGRATION_BATCH_PAUSE"]
+            )
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Applied migrations: {', '.join(map(str, applied))}." if applied else "The database is up to date.")
+
+    @app.cli.command("db-revision")
+    @click.argument("message")
+    def db_revision_command(message):
+        """
+        Generate a migration from the differences between the models and the (up to date) database.
+        """
+        from utils.database import db
+        from utils.migrations import (
+            applied_versions, compare_schema, has_changes, import_models, load_migrations, render_migration,
+            write_migration
+        )
+
+        engines, path = migration_engines()
+        pending = [m.version for m in load_migrations(path) if m.version not in applied_versions(engines[m.bind])]
+        if pending:
+            raise click.ClickException(f"Apply the pending migrations first ({', '.join(map(str, pending))}): flask db-upgrade")
+        import_models()
+        created = 0
+        for bind, engine in sorted(engines.items(), key=lambda item: item[0] is not None):  # Main database first
+            metadata = db.metadatas[bind]
+            others = {name for key, other in db.metadatas.items() if key != bind for name in other.tables}
+            diff = compare_schema(engine, metadata, others)
+            for note in diff["unsupported"]:
+                click.echo(f"Not generated ({bind or 'main'}): {note}", err=True)
+            if has_changes(diff):
+                description = message if bind is None else f"{message} ({bind} database)"
+                click.echo(f"Created {write_migration(render_migration(diff, description, bind), message, path)}")
+                created += 1
+        if not created:
+            click.echo("The models and the database have the same schema: no migration generated.")
+
+    @app.cli.command("db-status")
+    def db_status_command():
+        """
+        List the applied and pending migrations.
+        """
+        from utils.migrations import applied_versions, load_migrations
+
+        engines, path = migration_engines()
+        applied = {bind: applied_versions(engine) for bind, engine in engines.items()}
+        for migration in load_migrations(path):
+            state = "applied" if migration.version in applied.get(migration.bind, ()) else "pending"
+            click.echo(f"{migration.version:04d}  {state:<8} {migration.description}")
+
+    @app.cli.command("generate-data")
+    @click.option("--clients", type=int, default=0, help="Number of clients.")
+    @click.option("--vehicles", type=int, default=0, help="Number of vehicles (attached to random clients).")
+    @click.option("--works", type=int, default=0, help="Number of works (attached to random vehicles).")
+    @click.option("--employees", type=int, default=0, help="Number of employees.")
+    @click.option("--tenants", type=int, default=1, show_default=True, help="Tenants the rows are spread over.")
+    @click.option("--seed", type=int, default=0, show_default=True, help="Random seed: the same options generate the same data.")
+    @click.option("--batch-size", type=int, default=50000, show_default=True, help="Rows inserted per transaction.")
+    @click.option("--snapshot", type=click.Path(dir_okay=False), help="Also write a compact copy of the database to this file.")
+    def generate_data_command(clients, vehicles, works, employees, tenants, seed, batch_size, snapshot):
+        """
+        Fill the database with synthetic clients, vehicles, works and employees (e.g. for benchmarks).
+        """
+        import os
+        from sqlalchemy import inspect
+        from utils.database import db
+        from services.datagen_service import generate_data, write_snapshot
+
+        missing = {"client", "vehicle", "work", "employee"} - set(inspect(db.engine).get_table_names())
+        if missing:
+            raise click.ClickException(f"Missing tables ({', '.join(sorted(missing))}): run flask db-upgrade first.")
+        if snapshot and os.path.exists(snapshot):
+            raise click.ClickException(f"{snapshot} already exists.")
+        try:
+            report = generate_data(clients, vehicles, works, employees, tenants, seed, batch_size)
+            if snapshot:
+                write_snapshot(snapshot)
+                report["snapshot"] = snapshot
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(json.dumps(report, indent=2))
+
+    @app.cli.command("webhooks-deliver")
+    @click.option("--once", is_flag=True, help="Send the due deliveries and exit instead of running until interrupted.")
+    def webhooks_deliver_command(once):
+        """
+        Send the queued webhook notifications (e.g. from a worker process, with WEBHOOK_DISPATCHER=off).
+        """
+        from utils.webhooks import WebhookDispatcher
+
+        dispatcher = WebhookDispatcher(current_app._get_current_object())
+        if once:
+            claimed = dispatcher.drain()
+            dispatcher.stop()
+            click.echo(json.dumps({"claimed": claimed, **dispatcher.stats()}, indent=2))
+            return
+        dispatcher.start()
+        click.echo("Sending webhook notifications (Ctrl+C to stop).")
+        try:
+            while True:
+                dispatcher._thread.join(1)
+        except KeyboardInterrupt:
+            dispatcher.stop()
+
+    @app.cli.command("webhook-receiver")
+    @click.option("--port", type=int, default=8001, show_default=True)
+    @click.option("--secret", help="Subscription secret: requests with another signature get 401.")
+    @click.option("--delay", type=float, default=0.0, help="Seconds each response is delayed.")
+    @click.option("--fail-rate", type=float, default=0.0, help="Share of the requests answered with 503.")
+    def webhook_receiver_command(port, secret, delay, fail_rate):
+        """
+        Run a local stand-in webhook receiver that prints the notifications it gets.
+        """
+        from utils.webhooks import make_receiver
+
+        def show(status, body):
+            click.echo(f"{status} {body.decode()}")
+
+        server = make_receiver(port=port, secret=secret, delay=delay, fail_rate=fail_rate, on_request=show)
+        click.echo(f"Listening on http://127.0.0.1:{server.server_address[1]}/ (Ctrl+C to stop).")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
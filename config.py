@@ -6,4 +6,114 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI")
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Logging
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" (one object per line) or "text"
+    LOG_FILE = os.getenv("LOG_FILE")  # Log file (stderr when unset)
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"  # Write records from a background thread
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records waiting to be written (more are dropped)
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # Share of requests whose INFO/DEBUG records are kept
+    LOG_ACCESS = os.getenv("LOG_ACCESS", "true").lower() == "true"  # One record per request with its status and duration
+
+    # Schema migrations (flask db-upgrade)
+    MIGRATIONS_PATH = os.getenv("MIGRATIONS_PATH")  # Directory of the migration files (defaults to migrations/)
+    MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))  # Rows updated per backfill transaction
+    MIGRATION_BATCH_PAUSE = float(os.getenv("MIGRATION_BATCH_PAUSE", "0.05"))  # Seconds between backfill batches, to let requests write
+
+    # Startup
+    API_NAMESPACES = [name for name in os.getenv("API_NAMESPACES", "").split(",") if name]  # Namespaces to serve (all when empty)
+    OPENAPI_SPEC_PATH = os.getenv("OPENAPI_SPEC_PATH")  # Prebuilt Swagger spec (defaults to instance/openapi.json)
+
+    # Authentication (tokens are signed with SECRET_KEY)
+    AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "true").lower() == "true"  # Reject API requests without a token
+    AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", str(8 * 3600)))  # Token lifetime in seconds
+    AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))  # Decoded tokens kept in memory
+    AUTH_REVOCATION_REFRESH = float(os.getenv("AUTH_REVOCATION_REFRESH", "5"))  # Seconds between revocation list reloads
+
+    # Tenants (garages served by one deployment, each request is scoped to one)
+    DEFAULT_TENANT_ID = int(os.getenv("DEFAULT_TENANT_ID", "1"))  # Tenant of requests without token or X-Tenant-ID header, and of CLI commands
+    TENANT_REQUIRED = os.getenv("TENANT_REQUIRED", "false").lower() == "true"  # Reject API requests that name no tenant (400)
+
+    # Health probes (/api/health/live and /api/health/ready)
+    HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2.0"))  # Seconds the readiness SELECT 1 may take
+    HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "1.0"))  # Readiness result reused by the probes for this long
+    DB_SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", "200"))  # Statements at least this slow are logged and counted
+    DB_SLOW_QUERY_WINDOW = int(os.getenv("DB_SLOW_QUERY_WINDOW", "300"))  # Seconds of slow queries reported as recent
+
+    # Profiling (per-request cProfile reports and the stack sampling profiler)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"  # Honour X-Profile headers and ?profile= parameters
+    PROFILING_ROLES = [role for role in os.getenv("PROFILING_ROLES", "admin").split(",") if role]  # Employee roles allowed to profile
+    PROFILE_STATS_LIMIT = int(os.getenv("PROFILE_STATS_LIMIT", "40"))  # Functions listed in a text request profile
+    PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.01"))  # Default seconds between two stack samples
+    PROFILER_MAX_DURATION = float(os.getenv("PROFILER_MAX_DURATION", "300"))  # Longest sampling run (it stops by itself)
+    PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "20000"))  # Distinct stacks kept in memory by the sampler
+
+    # Duplicate clients (normalised phone, e-mail and address, phonetic name)
+    PHONE_COUNTRY_CODE = os.getenv("PHONE_COUNTRY_CODE", "351")  # Country code of phone numbers entered without one
+    DEDUP_MIN_SCORE = float(os.getenv("DEDUP_MIN_SCORE", "0.6"))  # Similarity (0 to 1) from which two clients are reported as duplicates
+    DEDUP_MAX_BLOCK_SIZE = int(os.getenv("DEDUP_MAX_BLOCK_SIZE", "200"))  # Larger groups sharing a key are too common to compare pairwise
+
+    # Optimistic concurrency
+    REQUIRE_IF_MATCH = os.getenv("REQUIRE_IF_MATCH", "false").lower() == "true"  # Reject PUT/DELETE without an If-Match header (428)
+
+    # Idempotency keys (safe retries of POST requests)
+    IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))  # Seconds a stored response is replayed
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))  # Stored responses kept in memory (0 disables)
+
+    # Collection response cache (invalidated by per-table generation counters)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # Responses kept in memory per process (0 disables)
+    RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))  # Memory budget of that cache
+
+    # Rate limiting (token buckets per client, namespace and route kind)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory")  # "memory" (per process) or "sqlite:///<path>" (shared by workers)
+    RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "300/minute")  # Single-entity reads and writes
+    RATE_LIMIT_LIST = os.getenv("RATE_LIMIT_LIST", "30/minute")  # Collection GETs (full-table reads)
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "import=10/minute;export=10/minute")  # Overrides, e.g. "work=600/minute;work:list=60/minute"
+
+    # Background jobs
+    JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread")  # "thread" (worker pool) or "inline" (run in the caller)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Number of worker threads per process
+    JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "2"))  # Default retries after a failed attempt
+    JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "1.0"))  # Base delay (seconds) of the exponential backoff
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))  # Seconds between polls for due retries and interrupted jobs
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))  # A running job not renewed for this long is run again
+
+    # Webhooks (work notifications queued in an outbox table and sent in the background)
+    WEBHOOK_DISPATCHER = os.getenv("WEBHOOK_DISPATCHER", "thread")  # "thread" (in each server process) or "off" (flask webhooks-deliver)
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))  # Requests sent concurrently per process
+    WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))  # Deliveries claimed per poll; one request per subscription
+    WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "5.0"))  # Seconds a receiver has to answer
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))  # Attempts before a delivery fails for good
+    WEBHOOK_RETRY_DELAY = float(os.getenv("WEBHOOK_RETRY_DELAY", "10"))  # Base delay (seconds) of the exponential backoff
+    WEBHOOK_RETRY_MAX_DELAY = float(os.getenv("WEBHOOK_RETRY_MAX_DELAY", "3600"))  # Longest delay between two attempts
+    WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "2.0"))  # Seconds between outbox polls when idle
+    WEBHOOK_ALLOWED_HOSTS = os.getenv("WEBHOOK_ALLOWED_HOSTS", "")  # Hosts URLs may name, e.g. "sms.example.com,*.example.org"; any when empty
+    WEBHOOK_ALLOW_PRIVATE = os.getenv("WEBHOOK_ALLOW_PRIVATE", "false").lower() == "true"  # Allow private and loopback addresses (local test receiver)
+
+    # Bulk imports
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))  # Rows validated and committed per transaction
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))  # Row errors kept in the import report
+    IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR")  # Uploads waiting for an ?async=true import (defaults to <tmp>/garage-imports)
+
+    # Archival of old works (moved out of the live work table by the archive_works job)
+    ARCHIVE_DATABASE_URI = os.getenv("ARCHIVE_DATABASE_URI")  # Archive database, e.g. sqlite:///archive.db (defaults to the main database)
+    ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "12"))  # Age of finished or deleted works to archive
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))  # Works moved per transaction
+
+    # Columnar exports
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "50000"))  # Rows fetched and encoded per batch
+
+    # Response compression (trade CPU for bandwidth)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "br,zstd,gzip").split(",")  # Server preference order
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Smaller bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))  # 1 (fast) to 9 (small)
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # 0 (fast) to 11 (small)
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))  # 1 (fast) to 22 (small)
+    COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "128"))  # Compressed GET bodies kept in memory (0 disables)
+    COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024)))  # Memory budget of that cache
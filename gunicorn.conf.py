@@ -0,0 +1,47 @@
+# Gunicorn configuration for production serving:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Pre-fork model: a master process forks WORKERS processes, each serving
+# requests with THREADS threads. Every setting can be overridden with the
+# environment variables below.
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:8000")
+
+# Workers and threads
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Recycle workers after a number of requests (the jitter avoids restarting them all at once)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# Timeouts (seconds)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Load the application once in the master so workers fork from it (faster spawns, shared memory).
+# Set GUNICORN_PRELOAD=false to have `kill -HUP <master>` reload the application code as well.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Logging
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    """
+    Drop the connection pools inherited from the master after a fork (those of every
+    bind, e.g. the archive), so that pooled SQLAlchemy connections are never shared
+    between processes.
+    """
+    from utils.database import db
+
+    app = server.app.wsgi()  # The preloaded application (loaded here when preloading is off)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,164 @@
+"""
+Initial schema
+
+Generated by `flask db-revision` on 2026-10-19 01:33 UTC, then edited by hand to adopt the
+databases created from the former scripts.sql. CREATE TABLE IF NOT EXISTS keeps their client,
+employee, vehicle and work tables, which have no tenant or version columns, unique e-mails
+across all rows, and works with a cost and start and end dates. Those four tables are rebuilt
+with the definitions below (the columns the models do not have are dropped), after the values
+the new NOT NULL columns reject are given a default.
+"""
+
+CLIENT_TABLE = """
+CREATE TABLE IF NOT EXISTS client (
+    client_id INTEGER NOT NULL,
+    name VARCHAR(80) NOT NULL,
+    email VARCHAR(200) NOT NULL,
+    phone VARCHAR(20) NOT NULL,
+    address VARCHAR(200) NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    version INTEGER DEFAULT '1' NOT NULL,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    deleted_at DATETIME,
+    PRIMARY KEY (client_id),
+    CONSTRAINT uq_client_tenant_name UNIQUE (tenant_id, name)
+)
+"""
+
+EMPLOYEE_TABLE = """
+CREATE TABLE IF NOT EXISTS employee (
+    employee_id INTEGER NOT NULL,
+    name VARCHAR(80) NOT NULL,
+    email VARCHAR(200) NOT NULL,
+    phone VARCHAR(20),
+    role VARCHAR(20) NOT NULL,
+    hired_date DATE NOT NULL,
+    password_hash VARCHAR(255),
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    version INTEGER DEFAULT '1' NOT NULL,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    PRIMARY KEY (employee_id),
+    CONSTRAINT uq_employee_tenant_email UNIQUE (tenant_id, email)
+)
+"""
+
+VEHICLE_TABLE = """
+CREATE TABLE IF NOT EXISTS vehicle (
+    vehicle_id INTEGER NOT NULL,
+    client_id INTEGER NOT NULL,
+    license_plate VARCHAR(20) NOT NULL,
+    brand VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    version INTEGER DEFAULT '1' NOT NULL,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    deleted_at DATETIME,
+    PRIMARY KEY (vehicle_id),
+    CONSTRAINT uq_vehicle_tenant_license_plate UNIQUE (tenant_id, license_plate),
+    FOREIGN KEY(client_id) REFERENCES client (client_id)
+)
+"""
+
+WORK_TABLE = """
+CREATE TABLE IF NOT EXISTS work (
+    work_id INTEGER NOT NULL,
+    vehicle_id INTEGER NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    version INTEGER DEFAULT '1' NOT NULL,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    deleted_at DATETIME,
+    PRIMARY KEY (work_id),
+    FOREIGN KEY(vehicle_id) REFERENCES vehicle (vehicle_id)
+)
+"""
+
+
+def upgrade(op):
+    op.create_table(CLIENT_TABLE)
+    op.create_table(EMPLOYEE_TABLE)
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS idempotency_key (
+    "key" VARCHAR(64) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    content_type VARCHAR(100),
+    body BLOB,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY ("key")
+)
+""")
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS job (
+    job_id INTEGER NOT NULL,
+    task VARCHAR(80) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL,
+    max_retries INTEGER NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    started_at DATETIME,
+    finished_at DATETIME,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    PRIMARY KEY (job_id)
+)
+""")
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS table_generation (
+    table_name VARCHAR(64) NOT NULL,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (table_name)
+)
+""")
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS work_event (
+    event_id INTEGER NOT NULL,
+    work_id INTEGER NOT NULL,
+    event_type SMALLINT NOT NULL,
+    status SMALLINT NOT NULL,
+    occurred_at BIGINT NOT NULL,
+    employee_id INTEGER,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    PRIMARY KEY (event_id)
+)
+""")
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS revoked_token (
+    jti VARCHAR(32) NOT NULL,
+    employee_id INTEGER,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (jti),
+    FOREIGN KEY(employee_id) REFERENCES employee (employee_id)
+)
+""")
+    op.create_table(VEHICLE_TABLE)
+    op.create_table(WORK_TABLE)
+
+    # Databases created from scripts.sql: their tables have no tenant_id column
+    if not op.has_column("client", "tenant_id"):
+        op.backfill("client", "phone = coalesce(phone, ''), address = coalesce(address, '')", "phone IS NULL OR address IS NULL")
+        op.rebuild_table("client", CLIENT_TABLE)
+    if not op.has_column("employee", "tenant_id"):
+        op.backfill("employee", "role = 'mechanic'", "role IS NULL")
+        op.rebuild_table("employee", EMPLOYEE_TABLE)
+    if not op.has_column("vehicle", "tenant_id"):
+        op.rebuild_table("vehicle", VEHICLE_TABLE)
+    if not op.has_column("work", "tenant_id"):
+        op.backfill("work", "status = 'pending'", "status IS NULL")
+        op.rebuild_table("work", WORK_TABLE)
+
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_idempotency_key_expires_at ON idempotency_key (expires_at)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_job_tenant_status ON job (tenant_id, status)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_work_event_tenant_work ON work_event (tenant_id, work_id, event_id)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_work_event_tenant_time ON work_event (tenant_id, occurred_at)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_revoked_token_revoked_at ON revoked_token (revoked_at)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_vehicle_tenant_client ON vehicle (tenant_id, client_id)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_work_tenant_status ON work (tenant_id, status, updated_at)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_work_tenant_vehicle ON work (tenant_id, vehicle_id)')
@@ -0,0 +1,26 @@
+"""
+Initial schema (archive database)
+
+Generated by `flask db-revision` on 2026-10-19 01:33 UTC.
+"""
+
+bind = 'archive'
+
+
+def upgrade(op):
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS work_archive (
+    work_id INTEGER NOT NULL,
+    vehicle_id INTEGER NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    created_at DATETIME,
+    updated_at DATETIME,
+    deleted_at DATETIME,
+    version INTEGER NOT NULL,
+    archived_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    PRIMARY KEY (work_id)
+)
+""")
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_work_archive_tenant_vehicle ON work_archive (tenant_id, vehicle_id)')
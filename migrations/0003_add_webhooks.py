@@ -0,0 +1,43 @@
+"""
+Add webhooks
+
+Generated by `flask db-revision` on 2026-10-19 01:46 UTC.
+"""
+
+
+def upgrade(op):
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS webhook_subscription (
+    subscription_id INTEGER NOT NULL,
+    client_id INTEGER NOT NULL,
+    url VARCHAR(500) NOT NULL,
+    statuses VARCHAR(200) NOT NULL,
+    secret VARCHAR(64) NOT NULL,
+    active BOOLEAN NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    PRIMARY KEY (subscription_id),
+    FOREIGN KEY(client_id) REFERENCES client (client_id)
+)
+""")
+    op.create_table("""
+CREATE TABLE IF NOT EXISTS webhook_delivery (
+    delivery_id INTEGER NOT NULL,
+    subscription_id INTEGER NOT NULL,
+    event VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+    response_status INTEGER,
+    last_error TEXT,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    delivered_at DATETIME,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    PRIMARY KEY (delivery_id),
+    FOREIGN KEY(subscription_id) REFERENCES webhook_subscription (subscription_id)
+)
+""")
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_webhook_subscription_tenant_client ON webhook_subscription (tenant_id, client_id)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_webhook_delivery_tenant_subscription ON webhook_delivery (tenant_id, subscription_id, delivery_id)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_webhook_delivery_due ON webhook_delivery (status, next_attempt_at)')
@@ -0,0 +1,32 @@
+"""
+Add client dedup keys
+
+Generated by `flask db-revision` on 2026-10-19 01:51 UTC.
+The backfill of the existing clients was added by hand: the keys are computed by
+the application's normalisation functions, registered as SQL functions.
+"""
+from functools import partial
+from flask import current_app
+from utils.normalize import name_key, normalize_address, normalize_email, normalize_phone
+
+
+def upgrade(op):
+    op.add_column('client', 'phone_normalized VARCHAR(20)')
+    op.add_column('client', 'email_normalized VARCHAR(200)')
+    op.add_column('client', 'address_normalized VARCHAR(200)')
+    op.add_column('client', 'name_key VARCHAR(8)')
+    op.function("normalize_phone", partial(normalize_phone, country_code=current_app.config["PHONE_COUNTRY_CODE"]))
+    op.function("normalize_email", normalize_email)
+    op.function("normalize_address", normalize_address)
+    op.function("name_key", name_key)
+    # Before the indexes, so that they are built once instead of updated row by row
+    op.backfill(
+        "client",
+        "phone_normalized = normalize_phone(phone), email_normalized = normalize_email(email), "
+        "address_normalized = normalize_address(address), name_key = name_key(name)",
+        "name_key IS NULL",
+        key="client_id"
+    )
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_client_tenant_email ON client (tenant_id, email_normalized)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_client_tenant_name_key ON client (tenant_id, name_key)')
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_client_tenant_phone ON client (tenant_id, phone_normalized)')
@@ -0,0 +1,52 @@
+"""
+Unique client names and license plates among the active rows only
+
+Written by hand: the unique constraints of 0001 also counted the soft-deleted rows,
+so a deleted client's name or a deleted vehicle's plate could never be used again.
+SQLite cannot drop a constraint, so both tables are rebuilt without it, and the
+uniqueness is enforced by partial indexes ignoring the rows with a deleted_at.
+"""
+
+
+def upgrade(op):
+    op.rebuild_table("client", """
+CREATE TABLE IF NOT EXISTS client (
+    client_id INTEGER NOT NULL,
+    name VARCHAR(80) NOT NULL,
+    email VARCHAR(200) NOT NULL,
+    phone VARCHAR(20) NOT NULL,
+    address VARCHAR(200) NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    version INTEGER DEFAULT '1' NOT NULL,
+    phone_normalized VARCHAR(20),
+    email_normalized VARCHAR(200),
+    address_normalized VARCHAR(200),
+    name_key VARCHAR(8),
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    deleted_at DATETIME,
+    PRIMARY KEY (client_id)
+)
+""")
+    op.create_index(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_client_tenant_name ON client (tenant_id, name) WHERE deleted_at IS NULL'
+    )
+    op.rebuild_table("vehicle", """
+CREATE TABLE IF NOT EXISTS vehicle (
+    vehicle_id INTEGER NOT NULL,
+    client_id INTEGER NOT NULL,
+    license_plate VARCHAR(20) NOT NULL,
+    brand VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    version INTEGER DEFAULT '1' NOT NULL,
+    tenant_id INTEGER DEFAULT '1' NOT NULL,
+    deleted_at DATETIME,
+    PRIMARY KEY (vehicle_id),
+    FOREIGN KEY(client_id) REFERENCES client (client_id)
+)
+""")
+    op.create_index(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_vehicle_tenant_license_plate ON vehicle (tenant_id, license_plate) '
+        'WHERE deleted_at IS NULL'
+    )
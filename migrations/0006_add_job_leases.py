@@ -0,0 +1,18 @@
+"""
+Add job leases
+
+Generated by `flask db-revision` on 2026-10-19 02:40 UTC.
+The backfill was added by hand: the unfinished jobs of the previous version are
+due at once, so the pollers run them (again) after the upgrade.
+"""
+
+
+def upgrade(op):
+    op.add_column('job', 'next_attempt_at DATETIME')
+    op.backfill(
+        "job",
+        "next_attempt_at = CURRENT_TIMESTAMP",
+        "status IN ('queued', 'running', 'retrying') AND next_attempt_at IS NULL",
+        key="job_id"
+    )
+    op.create_index('CREATE INDEX IF NOT EXISTS ix_job_due ON job (status, next_attempt_at)')
@@ -0,0 +1,38 @@
+from utils.database import db, TenantMixin
+
+
+class ArchivedWork(TenantMixin, db.Model):
+    """
+    Represents a work moved out of the live 'work' table by the archival job.
+    The table lives on the 'archive' database bind (ARCHIVE_DATABASE_URI), so it
+    has no foreign key to the vehicle table.
+
+    Attributes:
+        work_id (int): Primary key, the ID the work had in the live table.
+        vehicle_id (int): ID of the vehicle that was repaired.
+        description (str): Description of the work that was performed.
+        status (str): Final status of the work (usually completed or cancelled).
+        created_at (datetime): Timestamp when the work was created.
+        updated_at (datetime): Timestamp when the work was last updated.
+        deleted_at (datetime): Timestamp of the soft deletion, if the work was deleted.
+        version (int): Version of the work when it was archived.
+        archived_at (datetime): Timestamp when the work was archived.
+        tenant_id (int): The tenant (garage) the work belongs to.
+    """
+    __bind_key__ = "archive"
+    __tablename__ = "work_archive"
+
+    work_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    vehicle_id = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    deleted_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (db.Index("ix_work_archive_tenant_vehicle", "tenant_id", "vehicle_id"),)  # History lookups are by vehicle
+
+    def __repr__(self):
+        return f"<ArchivedWork {self.work_id} - {self.status}>"
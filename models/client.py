@@ -1,27 +1,58 @@
-from utils.database import db
+from utils.database import db, SoftDeleteMixin, TenantMixin
+
+
+# Columns derived from the client data for the duplicate detection, never exposed by the API
+DEDUP_COLUMNS = ["phone_normalized", "email_normalized", "address_normalized", "name_key"]
 
 
 # Model definition for the 'Client' table
-class Client(db.Model):
+class Client(TenantMixin, SoftDeleteMixin, db.Model):
     """
     Represents a client in the database.
 
     Attributes:
         client_id (int): The primary key for the client table.
-        name (str): The name of the client. Must be unique and cannot be null.
+        name (str): The name of the client. Must be unique within the tenant and cannot be null.
         email (str): The email of the client. Cannot be null.
         phone (str): The phone number of the client. Cannot be null.
         address (str): The address of the client. Cannot be null.
         created_at (datetime): Timestamp when the client was created. Defaults to the current time.
+        version (int): Version counter, incremented on every update (optimistic concurrency control).
+        deleted_at (datetime): Timestamp of the soft deletion, null while the record is active.
+        tenant_id (int): The tenant (garage) the client belongs to.
+        phone_normalized (str): Phone number as "+<country code><number>", to find duplicates.
+        email_normalized (str): Lower-case e-mail without "+tag", to find duplicates.
+        address_normalized (str): Address without accents, punctuation or abbreviations.
+        name_key (str): Phonetic key of the name (Soundex of the first and last names), to find duplicates.
     """
 
     # Define columns for the table
     client_id = db.Column(db.Integer, primary_key=True)  # Unique identifier for each client
-    name = db.Column(db.String(80), unique=True, nullable=False)  # Client name, must be unique
+    name = db.Column(db.String(80), nullable=False)  # Client name, unique among the active clients of a tenant
     email = db.Column(db.String(200), nullable=False)  # Client email
     phone = db.Column(db.String(20), nullable=False)  # Client phone number
     address = db.Column(db.String(200), nullable=False)  # Client address
     created_at = db.Column(db.DateTime, server_default=db.func.now())  # Auto-generated timestamp
+    version = db.Column(db.Integer, nullable=False, server_default="1")  # Incremented on every update
+
+    # Derived from the columns above on every write (see services.client_service.normalized_columns)
+    phone_normalized = db.Column(db.String(20))
+    email_normalized = db.Column(db.String(200))
+    address_normalized = db.Column(db.String(200))
+    name_key = db.Column(db.String(8))
+
+    # Every UPDATE/DELETE checks the version it read, so concurrent edits raise StaleDataError
+    __mapper_args__ = {"version_id_col": version}
+
+    # Every index starts with tenant_id, so the queries of one garage only read its own index range
+    __table_args__ = (
+        # Partial: the name of a soft-deleted client can be given to a new one
+        db.Index("uq_client_tenant_name", "tenant_id", "name", unique=True, sqlite_where=db.text("deleted_at IS NULL")),
+        # Blocking keys of the duplicate detection: clients sharing one are compared
+        db.Index("ix_client_tenant_phone", "tenant_id", "phone_normalized"),
+        db.Index("ix_client_tenant_email", "tenant_id", "email_normalized"),
+        db.Index("ix_client_tenant_name_key", "tenant_id", "name_key"),
+    )
 
     def __repr__(self):
         """
@@ -1,33 +1,46 @@
-from utils.database import db
+from utils.database import db, TenantMixin
 
 
-class Employee(db.Model):
+class Employee(TenantMixin, db.Model):
     """
     Employee model: This class represents the 'Employee' table in the database.
 
     Attributes:
         employee_id (int): Primary key, unique identifier for each employee.
         name (str): Name of the employee.
-        email (str): Unique email address of the employee.
+        email (str): Email address of the employee, unique within the tenant.
         phone (str): Phone number of the employee (optional).
         role (str): Role of the employee (e.g., 'mechanic', 'manager'). Default is 'mechanic'.
         hired_date (date): Date when the employee was hired.
+        password_hash (str): Hashed password used to log in (optional, employees without one cannot log in).
         created_at (datetime): Timestamp indicating when the record was created. Auto-generated by the database.
+        version (int): Version counter, incremented on every update (optimistic concurrency control).
+        tenant_id (int): The tenant (garage) the employee belongs to.
     """
     # Primary key column
     employee_id = db.Column(db.Integer, primary_key=True)
 
     # Employee details
     name = db.Column(db.String(80), nullable=False)  # Employee name (mandatory)
-    email = db.Column(db.String(200), unique=True, nullable=False)  # Unique email address (mandatory)
+    email = db.Column(db.String(200), nullable=False)  # Email address, unique per tenant (mandatory)
     phone = db.Column(db.String(20))  # Phone number (optional)
 
     # Role and employment information
     role = db.Column(db.String(20), nullable=False, default='mechanic')  # Role with a default value of 'mechanic'
     hired_date = db.Column(db.Date, nullable=False)  # Mandatory hire date
 
+    # Authentication
+    password_hash = db.Column(db.String(255))  # Hashed password, never exposed by the API
+
     # Audit information
     created_at = db.Column(db.DateTime, server_default=db.func.now())  # Timestamp for when the record was created
+    version = db.Column(db.Integer, nullable=False, server_default="1")  # Incremented on every update
+
+    # Every UPDATE/DELETE checks the version it read, so concurrent edits raise StaleDataError
+    __mapper_args__ = {"version_id_col": version}
+
+    # E-mails are unique per tenant: logins look them up within the tenant of the request
+    __table_args__ = (db.UniqueConstraint("tenant_id", "email", name="uq_employee_tenant_email"),)
 
     def __repr__(self):
         """
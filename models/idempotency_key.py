@@ -0,0 +1,29 @@
+from utils.database import db
+
+
+class IdempotencyKey(db.Model):
+    """
+    Represents the response stored for an Idempotency-Key, replayed when the same request is retried.
+
+    Attributes:
+        key (str): Primary key, SHA-256 digest of the caller, method, path and Idempotency-Key header.
+        request_hash (str): SHA-256 digest of the request body, to detect a key reused for another request.
+        status_code (int): HTTP status of the stored response (null while the first request is in progress).
+        content_type (str): Content type of the stored response.
+        body (bytes): Body of the stored response.
+        created_at (datetime): Timestamp when the key was first received.
+        expires_at (datetime): When the key is forgotten; the row can be purged afterwards.
+    """
+
+    __tablename__ = "idempotency_key"
+
+    key = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    content_type = db.Column(db.String(100))
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.key} - {self.status_code}>"
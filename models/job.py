@@ -0,0 +1,45 @@
+from utils.database import db, TenantMixin
+
+
+class Job(TenantMixin, db.Model):
+    """
+    Represents a background job in the database.
+
+    Attributes:
+        job_id (int): Primary key for the job table.
+        task (str): Name of the registered task to run.
+        status (str): Current status of the job (queued, running, retrying, succeeded, failed).
+        payload (str): JSON-encoded keyword arguments passed to the task.
+        result (str): JSON-encoded value returned by the task.
+        error (str): Message of the last error raised by the task.
+        attempts (int): Number of times the task has been started.
+        max_retries (int): Number of times a failed task is retried before giving up.
+        created_at (datetime): Timestamp when the job was queued.
+        started_at (datetime): Timestamp when the last attempt started.
+        finished_at (datetime): Timestamp when the job succeeded or failed for good.
+        next_attempt_at (datetime): When a queued or retrying job is due; while it runs, the end of the
+            lease of its worker, after which the job is run again by another one.
+        tenant_id (int): The tenant (garage) that submitted the job; the task runs scoped to it.
+    """
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(80), nullable=False)
+    status = db.Column(db.String(20), default="queued", nullable=False)
+    payload = db.Column(db.Text)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_retries = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    next_attempt_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_job_tenant_status", "tenant_id", "status"),
+        # The poller looks for the due jobs of every tenant
+        db.Index("ix_job_due", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<Job {self.job_id} {self.task} - {self.status}>"
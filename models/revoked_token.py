@@ -0,0 +1,23 @@
+from utils.database import db
+
+
+class RevokedToken(db.Model):
+    """
+    Represents an access token that was revoked before it expired (e.g. on logout).
+
+    Attributes:
+        jti (str): Primary key, unique identifier of the token.
+        employee_id (int): The employee the token was issued to.
+        expires_at (datetime): When the token would have expired; the row can be purged afterwards.
+        revoked_at (datetime): Timestamp when the token was revoked.
+    """
+
+    __tablename__ = "revoked_token"
+
+    jti = db.Column(db.String(32), primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.employee_id'))
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, server_default=db.func.now(), index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
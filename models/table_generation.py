@@ -0,0 +1,21 @@
+from utils.database import db
+
+
+class TableGeneration(db.Model):
+    """
+    Represents the generation counter of a table whose collection responses are cached.
+    Every transaction changing the table increments it, which invalidates the cached
+    responses of every worker without tracking them individually.
+
+    Attributes:
+        table_name (str): Primary key, name of the table.
+        generation (int): Number of committed transactions that changed the table.
+    """
+
+    __tablename__ = "table_generation"
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TableGeneration {self.table_name} - {self.generation}>"
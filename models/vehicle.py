@@ -1,26 +1,38 @@
-from utils.database import db
+from utils.database import db, SoftDeleteMixin, TenantMixin
 
-class Vehicle(db.Model):
+class Vehicle(TenantMixin, SoftDeleteMixin, db.Model):
     """
     Represents a vehicle in the database.
 
     Attributes:
         vehicle_id (int): Primary key for the vehicle table.
         client_id (int): Foreign key referencing the owner client.
-        license_plate (str): Vehicle's license plate. Must be unique and cannot be null.
+        license_plate (str): Vehicle's license plate. Must be unique among the active vehicles of the tenant and cannot be null.
         brand (str): Vehicle's brand.
         model (str): Vehicle's model.
         year (int): Manufacturing year of the vehicle.
         created_at (datetime): Timestamp when the vehicle was registered.
+        version (int): Version counter, incremented on every update (optimistic concurrency control).
+        deleted_at (datetime): Timestamp of the soft deletion, null while the record is active.
+        tenant_id (int): The tenant (garage) the vehicle belongs to.
     """
 
     vehicle_id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('client.client_id'), nullable=False)
-    license_plate = db.Column(db.String(20), unique=True, nullable=False)
+    license_plate = db.Column(db.String(20), nullable=False)
     brand = db.Column(db.String(50), nullable=False)
     model = db.Column(db.String(50), nullable=False)
     year = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Partial: the plate of a soft-deleted vehicle can be registered again
+        db.Index("uq_vehicle_tenant_license_plate", "tenant_id", "license_plate", unique=True,
+                 sqlite_where=db.text("deleted_at IS NULL")),
+        db.Index("ix_vehicle_tenant_client", "tenant_id", "client_id"),
+    )
 
     def __repr__(self):
         return f"<Vehicle {self.license_plate}>"
\ No newline at end of file
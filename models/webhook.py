@@ -0,0 +1,80 @@
+from utils.database import db, TenantMixin
+
+# Final states of a delivery; pending ones are (re)sent once next_attempt_at is reached
+WEBHOOK_DELIVERY_STATUSES = ("pending", "delivered", "failed")
+
+
+class WebhookSubscription(TenantMixin, db.Model):
+    """
+    Represents a URL notified when the works of a client change status.
+
+    Attributes:
+        subscription_id (int): Primary key for the webhook subscription table.
+        client_id (int): Client whose works are followed.
+        url (str): HTTP(S) endpoint receiving the notifications.
+        statuses (str): Comma-separated statuses notified (e.g. "completed"), empty for every status change.
+        secret (str): Key of the HMAC-SHA256 signature sent with each request.
+        active (bool): Inactive subscriptions get no new deliveries.
+        created_at (datetime): Timestamp when the subscription was created.
+        tenant_id (int): The tenant (garage) the client belongs to.
+    """
+
+    __tablename__ = "webhook_subscription"
+
+    subscription_id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('client.client_id'), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    statuses = db.Column(db.String(200), nullable=False, default="")
+    secret = db.Column(db.String(64), nullable=False)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (db.Index("ix_webhook_subscription_tenant_client", "tenant_id", "client_id"),)
+
+    def __repr__(self):
+        return f"<WebhookSubscription {self.subscription_id} {self.url}>"
+
+
+class WebhookDelivery(TenantMixin, db.Model):
+    """
+    Represents a notification to send to a subscription: the outbox of the webhooks.
+    Rows are written in the transaction of the change they notify and sent afterwards
+    by the webhook dispatcher (see utils.webhooks).
+
+    Attributes:
+        delivery_id (int): Primary key, also sent to the receiver to discard duplicates.
+        subscription_id (int): Subscription notified.
+        event (str): Kind of notification (e.g. "work.status_changed").
+        payload (str): JSON-encoded notification.
+        status (str): "pending", "delivered" or "failed" (see WEBHOOK_DELIVERY_STATUSES).
+        attempts (int): Number of times the notification was sent.
+        next_attempt_at (datetime): When a pending notification is due; pushed back while it is being sent.
+        response_status (int): HTTP status of the last attempt (null when no response was received).
+        last_error (str): Why the last attempt failed.
+        created_at (datetime): Timestamp when the notification was queued.
+        delivered_at (datetime): Timestamp when the receiver accepted it.
+        tenant_id (int): The tenant (garage) of the subscription.
+    """
+
+    __tablename__ = "webhook_delivery"
+
+    delivery_id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, db.ForeignKey('webhook_subscription.subscription_id'), nullable=False)
+    event = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    response_status = db.Column(db.Integer)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    delivered_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # The dispatcher polls the due deliveries of every tenant
+        db.Index("ix_webhook_delivery_due", "status", "next_attempt_at"),
+        db.Index("ix_webhook_delivery_tenant_subscription", "tenant_id", "subscription_id", "delivery_id"),
+    )
+
+    def __repr__(self):
+        return f"<WebhookDelivery {self.delivery_id} {self.event} - {self.status}>"
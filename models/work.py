@@ -1,6 +1,6 @@
-from utils.database import db
+from utils.database import db, SoftDeleteMixin, TenantMixin
 
-class Work(db.Model):
+class Work(TenantMixin, SoftDeleteMixin, db.Model):
     """
     Represents a work/reparation in the database.
 
@@ -11,6 +11,9 @@ class Work(db.Model):
         status (str): Current status of the work (e.g., pending, in_progress, completed, cancelled).
         created_at (datetime): Timestamp when the work was created.
         updated_at (datetime): Timestamp when the work was last updated.
+        version (int): Version counter, incremented on every update (optimistic concurrency control).
+        deleted_at (datetime): Timestamp of the soft deletion, null while the record is active.
+        tenant_id (int): The tenant (garage) the work belongs to.
     """
 
     work_id = db.Column(db.Integer, primary_key=True)
@@ -19,6 +22,13 @@ class Work(db.Model):
     status = db.Column(db.String(50), default="pending", nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        db.Index("ix_work_tenant_vehicle", "tenant_id", "vehicle_id"),
+        db.Index("ix_work_tenant_status", "tenant_id", "status", "updated_at"),
+    )
 
     def __repr__(self):
         return f"<Work {self.description} - {self.status}>"
\ No newline at end of file
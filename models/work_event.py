@@ -0,0 +1,39 @@
+from utils.database import db, TenantMixin
+
+# Integer codes stored in the event table (a SMALLINT instead of a status string per row)
+WORK_STATUS_CODES = {"pending": 1, "in_progress": 2, "completed": 3, "cancelled": 4}  # 0: any other status
+WORK_EVENT_TYPES = {"created": 1, "status_changed": 2, "updated": 3, "deleted": 4}
+
+
+class WorkEvent(TenantMixin, db.Model):
+    """
+    Represents one change of a work, in an append-only log written in the same
+    transaction as the change. The log outlives the work row (archival, deletion),
+    so it has no foreign key to the work table.
+
+    Attributes:
+        event_id (int): Primary key, increasing in the order the events were written.
+        work_id (int): ID of the work that changed.
+        event_type (int): Kind of change (see WORK_EVENT_TYPES).
+        status (int): Status of the work after the change (see WORK_STATUS_CODES).
+        occurred_at (int): Time of the change, in milliseconds since the Unix epoch (UTC).
+        employee_id (int): Employee who made the change, null for anonymous requests and jobs.
+        tenant_id (int): The tenant (garage) the work belongs to.
+    """
+
+    __tablename__ = "work_event"
+
+    event_id = db.Column(db.Integer, primary_key=True)
+    work_id = db.Column(db.Integer, nullable=False)
+    event_type = db.Column(db.SmallInteger, nullable=False)
+    status = db.Column(db.SmallInteger, nullable=False)
+    occurred_at = db.Column(db.BigInteger, nullable=False)
+    employee_id = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index("ix_work_event_tenant_work", "tenant_id", "work_id", "event_id"),  # Timelines
+        db.Index("ix_work_event_tenant_time", "tenant_id", "occurred_at"),  # Stage durations over a period
+    )
+
+    def __repr__(self):
+        return f"<WorkEvent {self.work_id} {self.event_type} - {self.status}>"
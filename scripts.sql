@@ -1,23 +1,4 @@
--- Tabela de clientes
-CREATE TABLE client (
-    client_id INTEGER PRIMARY KEY,
-    name TEXT NOT NULL,
-    email TEXT UNIQUE NOT NULL,
-    phone TEXT,
-    address TEXT,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
-);
-
--- Tabela de funcionários
-CREATE TABLE employee (
-    employee_id INTEGER PRIMARY KEY,
-    name TEXT NOT NULL,
-    email TEXT UNIQUE NOT NULL,
-    phone TEXT,
-    role TEXT CHECK (role IN ('mechanic', 'manager', 'admin')) DEFAULT 'mechanic',
-    hired_date DATE NOT NULL,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
-);
+-- Dados de exemplo. O esquema é criado pelas migrações (flask db-upgrade), geradas a partir dos modelos.
 
 -- Inserir dados na tabela de clientes
 INSERT INTO client (name, email, phone, address) VALUES
@@ -0,0 +1,122 @@
+import calendar
+import logging
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import and_, bindparam, delete, insert, or_, select
+from utils.database import db, current_tenant_id
+from models.work import Work
+from models.archived_work import ArchivedWork
+from services.job_service import register_task
+
+logger = logging.getLogger(__name__)
+
+# Final statuses: works in these states no longer change and can be archived
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+
+# Columns copied from the live work table to the archive
+ARCHIVE_COLUMNS = ["work_id", "tenant_id", "vehicle_id", "description", "status", "created_at", "updated_at", "deleted_at", "version"]
+
+
+def months_ago(months, now=None):
+    """
+    Compute the date a number of calendar months before now (UTC, like the database timestamps).
+    :param months: Number of months.
+    :param now: Reference date (the current time when omitted).
+    :return: datetime: The naive UTC datetime `months` months earlier.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    year, month = divmod(now.year * 12 + now.month - 1 - months, 12)
+    day = min(now.day, calendar.monthrange(year, month + 1)[1])
+    return now.replace(year=year, month=month + 1, day=day)
+
+
+@register_task("archive_works", internal=True)
+def archive_works(months=None, batch_size=None):
+    """
+    Move old works from the live work table to the archive, one batch per transaction.
+    Archived works are the finished ones (completed or cancelled) last updated more than
+    `months` months ago, and the ones soft-deleted before then.
+
+    The job is maintenance across every tenant: its statements are not tenant-scoped, so it
+    is an internal task run from the CLI or a scheduler and cannot be queued through the API.
+
+    Each batch is first copied to the archive (INSERT OR REPLACE, so a batch interrupted
+    and run again is harmless), then deleted from the live table if the works have not
+    changed since they were copied.
+    :param months: Age of the works to archive (ARCHIVE_AFTER_MONTHS by default).
+    :param batch_size: Works moved per transaction (ARCHIVE_BATCH_SIZE by default).
+    :return: dict: Archival report.
+    """
+    config = current_app.config
+    months = config["ARCHIVE_AFTER_MONTHS"] if months is None else months
+    batch_size = batch_size or config["ARCHIVE_BATCH_SIZE"]
+    cutoff = months_ago(months)
+
+    table = Work.__table__
+    columns = [table.c[name] for name in ARCHIVE_COLUMNS]  # Table columns: soft-deleted works are included
+    eligible = or_(
+        and_(table.c.status.in_(ARCHIVABLE_STATUSES), table.c.updated_at < cutoff),
+        table.c.deleted_at < cutoff,
+    )
+    remove = delete(table).where(table.c.work_id == bindparam("b_work_id"), table.c.version == bindparam("b_version"))
+    report = {"cutoff": cutoff.isoformat(), "archived": 0, "skipped": 0, "batches": 0}
+
+    last = 0
+    while True:
+        statement = select(*columns).where(eligible, table.c.work_id > last).order_by(table.c.work_id).limit(batch_size)
+        rows = [dict(row) for row in db.session.execute(statement).mappings()]
+        if not rows:
+            break
+        last = rows[-1]["work_id"]
+
+        # 1. Copy the batch to the archive
+        db.session.execute(insert(ArchivedWork).prefix_with("OR REPLACE"), rows)
+        db.session.commit()
+
+        # 2. Delete it from the live table, skipping works modified since the copy
+        result = db.session.execute(remove, [{"b_work_id": row["work_id"], "b_version": row["version"]} for row in rows])
+        db.session.commit()
+        if result.rowcount < len(rows):
+            # Modified works stay live: drop their now outdated archive copies
+            ids = [row["work_id"] for row in rows]
+            kept = db.session.execute(select(table.c.work_id).where(table.c.work_id.in_(ids))).scalars().all()
+            db.session.execute(
+                delete(ArchivedWork).where(ArchivedWork.work_id.in_(kept)).execution_options(all_tenants=True)
+            )
+            db.session.commit()
+            report["skipped"] += len(kept)
+
+        report["archived"] += result.rowcount
+        report["batches"] += 1
+
+    logger.info(f"Archived {report['archived']} works older than {cutoff:%Y-%m-%d} in {report['batches']} batches")
+    return report
+
+
+def get_work_history(vehicle_id):
+    """
+    Retrieve every work of a vehicle: active, soft-deleted and archived ones.
+    :param vehicle_id: ID of the vehicle.
+    :return: list: Dictionaries of work data, newest first, with `archived` set for archived works.
+    """
+    try:
+        live_statement = (
+            select(*[getattr(Work, name) for name in ARCHIVE_COLUMNS])
+            .where(Work.vehicle_id == vehicle_id)
+            .execution_options(include_deleted=True)
+        )
+        history = {}
+        for row in db.session.execute(live_statement).mappings():
+            history[row["work_id"]] = {**row, "archived": False, "archived_at": None}
+
+        archived_statement = select(ArchivedWork.__table__).where(
+            ArchivedWork.tenant_id == current_tenant_id(), ArchivedWork.vehicle_id == vehicle_id
+        )
+        for row in db.session.execute(archived_statement).mappings():
+            # A work interrupted mid-archival can be in both tables: the live one wins
+            history.setdefault(row["work_id"], {**row, "archived": True})
+
+        return sorted(history.values(), key=lambda work: (work["created_at"] or datetime.min, work["work_id"]), reverse=True)
+    except Exception as e:
+        logger.error(f"Error fetching the work history of vehicle {vehicle_id}: {e}")
+        return {"error": "Internal Server Error"}
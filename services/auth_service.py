@@ -0,0 +1,102 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import select
+from utils.database import db
+from utils.security import hash_password, verify_password
+from utils.auth import issue_token, revoke_claims
+from models.employee import Employee
+from models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Hash checked when the e-mail is unknown, so that both cases take the same time.
+# It is computed on first use: hashing at import time would slow down every startup.
+_dummy_hash = None
+
+
+def login(email, password):
+    """
+    Authenticate an employee with e-mail and password and issue an access token.
+    The password hash is only computed here, never on later requests.
+    :param email: The employee e-mail.
+    :param password: The plain-text password.
+    :return: dict: The access token and its lifetime, or None if the credentials are invalid.
+    """
+    global _dummy_hash
+    employee = Employee.query.filter_by(email=email).first()
+    if not employee or not employee.password_hash:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password("garage-api-dummy-password")
+        verify_password(_dummy_hash, password)
+        return None
+    if not verify_password(employee.password_hash, password):
+        return None
+
+    token, claims = issue_token(employee)
+    return {
+        "access_token": token,
+        "token_type": "Bearer",
+        "expires_in": claims["exp"] - claims["iat"],
+        "employee_id": employee.employee_id,
+        "role": employee.role,
+        "tenant_id": employee.tenant_id,
+    }
+
+
+def logout(claims):
+    """
+    Revoke the token described by the given claims.
+    :param claims: Claims of the token to revoke.
+    :return: True once the revocation is stored.
+    """
+    try:
+        db.session.merge(RevokedToken(
+            jti=claims["jti"],
+            employee_id=claims["sub"],
+            expires_at=datetime.utcfromtimestamp(claims["exp"]),
+            revoked_at=datetime.utcnow()
+        ))
+        db.session.commit()
+        revoke_claims(claims)
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error revoking token {claims.get('jti')}: {e}")
+        raise
+
+
+def load_revoked_tokens(since=None):
+    """
+    Load the ids of tokens revoked since the given time that have not expired yet.
+    :param since: Only return tokens revoked at or after this timestamp (all when None).
+    :return: tuple: (dict of token id -> expiry as Unix time, newest revoked_at timestamp or None)
+    """
+    try:
+        statement = (
+            select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+            .where(RevokedToken.expires_at > datetime.utcnow())
+        )
+        if since is not None:
+            statement = statement.where(RevokedToken.revoked_at >= since)
+        rows = db.session.execute(statement).all()
+        newest = max((row.revoked_at for row in rows), default=None)
+        return {row.jti: row.expires_at.replace(tzinfo=timezone.utc).timestamp() for row in rows}, newest
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error loading revoked tokens: {e}")
+        return {}, None
+
+
+def set_password(email, password):
+    """
+    Set the password of an employee.
+    :param email: The employee e-mail.
+    :param password: The new plain-text password.
+    :return: True if the password was set, None if the employee does not exist.
+    """
+    employee = Employee.query.filter_by(email=email).first()
+    if not employee:
+        return None
+    employee.password_hash = hash_password(password)
+    db.session.commit()
+    return True
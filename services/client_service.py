@@ -1,49 +1,72 @@
 import logging
-from utils.database import db
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import BadRequest, Conflict
+from utils.database import db, fetch_columns, check_version, update_columns, select_row, select_rows
 from models.client import Client
+from models.vehicle import Vehicle
+from services.job_service import register_task
+from utils.normalize import name_key, normalize_address, normalize_email, normalize_phone
 
 logger = logging.getLogger(__name__)
 
-def get_all_clients():
+# Columns returned by the API
+CLIENT_COLUMNS = ["client_id", "name", "email", "phone", "address", "created_at", "version"]
+
+# Pre-built statements for the hot reads: constructed once at import, compiled once
+ALL_CLIENTS = select_rows(Client, CLIENT_COLUMNS)
+CLIENT_BY_ID = select_row(Client, CLIENT_COLUMNS)
+
+def normalized_columns(values):
+    """
+    Derive the duplicate detection columns of a client from its data.
+    Only the columns derived from the fields present in values are returned, so
+    partial updates refresh the keys of the fields they change.
+    :param values: Dictionary with some of name, email, phone and address.
+    :return: dict: The derived columns (see models.client.DEDUP_COLUMNS).
+    """
+    columns = {}
+    if "name" in values:
+        columns["name_key"] = name_key(values["name"])
+    if "email" in values:
+        columns["email_normalized"] = normalize_email(values["email"])
+    if "phone" in values:
+        columns["phone_normalized"] = normalize_phone(values["phone"], current_app.config["PHONE_COUNTRY_CODE"])
+    if "address" in values:
+        columns["address_normalized"] = normalize_address(values["address"])
+    return columns
+
+def get_all_clients(fields=None):
     """
     Retrieve all clients.
+    :param fields: Optional list of column names to select (sparse fieldset).
     :return: list: A list of dictionaries containing information about all clients.
     """
     try:
-        clients = Client.query.all()  # Retrieve all clients from the database
-        return [
-            {
-                "client_id": client.client_id,
-                "name": client.name,
-                "email": client.email,
-                "phone": client.phone,
-                "address": client.address,
-                "created_at": client.created_at,
-            }
-            for client in clients
-        ]
+        if fields:
+            # Only select the requested columns
+            return fetch_columns(Client, fields)
+        return [dict(row) for row in db.session.execute(ALL_CLIENTS).mappings()]
     except Exception as e:
         logger.error(f"Error fetching all clients: {e}")
         return {"error": "Internal Server Error"}
 
-def get_client(client_id):
+def get_client(client_id, fields=None):
     """
     Retrieve a client by ID.
     :param client_id: The ID of the client to retrieve.
+    :param fields: Optional list of column names to select (sparse fieldset).
     :return: dict: A dictionary containing the client's information or an error message.
     """
     try:
-        client = Client.query.get(client_id)
-        if not client:
-            return None
-        return {
-            "client_id": client.client_id,
-            "name": client.name,
-            "email": client.email,
-            "phone": client.phone,
-            "address": client.address,
-            "created_at": client.created_at,
-        }
+        if fields:
+            # Only select the requested columns
+            rows = fetch_columns(Client, fields, Client.client_id == client_id)
+            return rows[0] if rows else None
+        row = db.session.execute(CLIENT_BY_ID, {"identity": client_id}).mappings().first()
+        return dict(row) if row else None
     except Exception as e:
         logger.error(f"Error fetching client {client_id}: {e}")
         return {"error": "Internal Server Error"}
@@ -56,9 +79,11 @@ def create_client(name, email, phone, address):
     :param phone: The phone number of the client.
     :param address: The address of the client.
     :return: tuple: A dictionary containing the newly created client's information and the HTTP status code.
+    :raises Conflict: If the name is already in use.
     """
     try:
-        client = Client(name=name, email=email, phone=phone, address=address)
+        values = {"name": name, "email": email, "phone": phone, "address": address}
+        client = Client(**values, **normalized_columns(values))
         db.session.add(client)  # Save the new client to the database
         db.session.commit() # Save the new client to the database
         return {
@@ -68,13 +93,19 @@ def create_client(name, email, phone, address):
             "phone": client.phone,
             "address": client.address,
             "created_at": client.created_at,
+            "version": client.version,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        if "name" in str(e.orig):
+            raise Conflict(f"A client named '{name}' already exists.")
+        raise Conflict(f"The client violates a constraint: {e.orig}")
     except Exception as e:
         logger.error(f"Error creating client: {e}")
         return {"error": "Internal Server Error"}
 
 
-def update_client(client_id, name, email, phone, address):
+def update_client(client_id, name, email, phone, address, expected_version=None):
     """
     Update an existing client.
     :param client_id: The ID of the client to update.
@@ -82,20 +113,25 @@ def update_client(client_id, name, email, phone, address):
     :param email: The new email of the client.
     :param phone: The new phone number of the client.
     :param address: The new address of the client.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
     :return: tuple: A dictionary containing the updated client's information or an error message and the HTTP status code.
     """
     try:
         # Find the client by ID
-        client = Client.query.get(client_id)
+        client = db.session.get(Client, client_id)
 
         if not client:
             return None
+        check_version(client, expected_version)
 
         # Update the fields if new values are provided (they can be optional)
         client.name = name if name else client.name
         client.email = email if email else client.email
         client.phone = phone if phone else client.phone
         client.address = address if address else client.address
+        for column, value in normalized_columns(
+                {"name": client.name, "email": client.email, "phone": client.phone, "address": client.address}).items():
+            setattr(client, column, value)
 
         # Commit the changes to the database
         db.session.commit()
@@ -107,27 +143,88 @@ def update_client(client_id, name, email, phone, address):
             "phone": client.phone,
             "address": client.address,
             "created_at": client.created_at,
+            "version": client.version,
         }
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the UPDATE
+        db.session.rollback()
+        raise Conflict(f"Client with ID {client_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         # If an error occurs, rollback the transaction
         db.session.rollback()
         logger.error(f"Error updating client {client_id}: {e}")
         return {"error": "Internal Server Error"}
-def delete_client(client_id):
+def patch_client(client_id, changes, expected_version=None):
+    """
+    Partially update a client with a single UPDATE ... RETURNING statement (no prior SELECT).
+    Only the given fields change; null clears a field.
+    :param client_id: The ID of the client to update.
+    :param changes: Dictionary of the fields to change.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
+    :return: dict: The updated client's information, or None if not found.
+    """
+    try:
+        client = update_columns(Client, client_id, {**changes, **normalized_columns(changes)}, CLIENT_COLUMNS, expected_version)
+        db.session.commit()
+        return client
+    except (BadRequest, Conflict):
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        raise Conflict(f"The changes violate a constraint: {e.orig}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error patching client {client_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+def delete_client(client_id, expected_version=None):
     """
-    Delete a client.
+    Soft-delete a client (flag it with deleted_at).
+    A client still owning vehicles is kept: they would stay live without an owner.
     :param client_id: The ID of the client to delete.
+    :param expected_version: Version the deletion is based on (If-Match); None skips the check.
     :return: tuple: A message confirming deletion or an error message and the HTTP status code.
+    :raises Conflict: If the client still has vehicles, or was modified since expected_version.
     """
     try:
-        client = Client.query.get(client_id)
+        client = db.session.get(Client, client_id)
         if not client:
             return None
-        # Delete the client
-        db.session.delete(client)
+        check_version(client, expected_version)
+        vehicles = db.session.execute(
+            select(db.func.count()).select_from(Vehicle).where(Vehicle.client_id == client_id)
+        ).scalar_one()
+        if vehicles:
+            raise Conflict(f"Client with ID {client_id} still has {vehicles} vehicle(s). Delete or reassign them first.")
+        # Soft delete: the row is kept for history and hidden from queries
+        client.deleted_at = db.func.now()
         # Commit the deletion
         db.session.commit()
         return client
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the soft delete
+        db.session.rollback()
+        raise Conflict(f"Client with ID {client_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         logger.error(f"Error deleting client {client_id}: {e}")
-        return {"error": "Internal Server Error"}
\ No newline at end of file
+        return {"error": "Internal Server Error"}
+
+
+@register_task("export_clients")
+def export_clients():
+    """
+    Background task dumping all clients.
+    :return: list: A list of dictionaries containing information about all clients.
+    :raises RuntimeError: If the clients could not be read, so that the job fails (and is retried).
+    """
+    clients = get_all_clients()
+    if isinstance(clients, dict) and "error" in clients:
+        raise RuntimeError("Error fetching the clients; see the application log.")
+    return clients
@@ -0,0 +1,305 @@
+import logging
+import random
+import time
+import unicodedata
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.schema import CreateIndex
+from utils.database import db
+from models.client import Client
+from models.employee import Employee
+from models.vehicle import Vehicle
+from models.work import Work
+from services.client_service import normalized_columns
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = [
+    "João", "Maria", "José", "Ana", "Francisco", "Beatriz", "António", "Mariana", "Manuel", "Inês", "Pedro", "Sofia",
+    "Rui", "Carolina", "Tiago", "Leonor", "Ricardo", "Matilde", "Miguel", "Catarina", "Carlos", "Marta", "Nuno", "Rita",
+    "Diogo", "Joana", "Luís", "Teresa", "Paulo", "Helena",
+]
+SURNAMES = [
+    "Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa", "Rodrigues", "Martins", "Jesus", "Sousa",
+    "Fernandes", "Gonçalves", "Gomes", "Lopes", "Marques", "Alves", "Almeida", "Ribeiro", "Pinto", "Carvalho",
+    "Teixeira", "Moreira", "Correia", "Mendes", "Nunes", "Soares", "Vieira", "Monteiro", "Cardoso", "Rocha",
+]
+STREETS = ["Rua", "Avenida", "Travessa", "Largo", "Praça", "Estrada"]
+CITIES = ["Lisboa", "Porto", "Braga", "Coimbra", "Faro", "Aveiro", "Setúbal", "Leiria", "Viseu", "Évora", "Funchal"]
+
+# (brand, models, share of the fleet)
+VEHICLES = [
+    ("Renault", ["Clio", "Mégane", "Captur"], 14), ("Peugeot", ["208", "308", "2008"], 13),
+    ("Volkswagen", ["Golf", "Polo", "Passat"], 10), ("Opel", ["Corsa", "Astra"], 8),
+    ("Seat", ["Ibiza", "Leon"], 8), ("Citroën", ["C3", "C4"], 7), ("Mercedes-Benz", ["Classe A", "Classe C"], 7),
+    ("BMW", ["Série 1", "Série 3"], 6), ("Fiat", ["Punto", "500"], 6), ("Toyota", ["Yaris", "Corolla"], 6),
+    ("Ford", ["Fiesta", "Focus"], 5), ("Nissan", ["Micra", "Qashqai"], 5), ("Dacia", ["Sandero", "Duster"], 5),
+]
+WORK_DESCRIPTIONS = [
+    "Revisão periódica", "Mudança de óleo e filtros", "Substituição de pastilhas de travão", "Substituição de pneus",
+    "Alinhamento de direção", "Substituição da correia de distribuição", "Diagnóstico eletrónico", "Reparação da embraiagem",
+    "Carga do ar condicionado", "Substituição da bateria", "Inspeção pré-IPO", "Reparação do escape",
+]
+# Share of works per final status (most of a garage's history is finished work)
+WORK_STATUSES = [("completed", 72), ("cancelled", 5), ("in_progress", 8), ("pending", 15)]
+EMPLOYEE_ROLES = [("mechanic", 75), ("manager", 17), ("admin", 8)]
+
+_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_PLATES = 26 ** 4 * 100  # Plates in the AA-00-AA format
+_PLATE_STEP = 7_368_787  # Prime, so (i * step) % _PLATES visits every plate once
+
+
+def license_plate(index):
+    """
+    The index-th plate of a fixed pseudo-random permutation of the AA-00-AA plates.
+    :param index: 0 <= index < 45,697,600
+    :return: str: A plate, different for every index.
+    """
+    n = index * _PLATE_STEP % _PLATES
+    n, digits = divmod(n, 100)
+    n, d = divmod(n, 26)
+    n, c = divmod(n, 26)
+    a, b = divmod(n, 26)
+    return f"{_LETTERS[a]}{_LETTERS[b]}-{digits:02d}-{_LETTERS[c]}{_LETTERS[d]}"
+
+
+def person_name(index):
+    """
+    The index-th name of the list of first name and two surnames combinations;
+    a number is appended once they are exhausted, so names are unique.
+    """
+    n, last = divmod(index, len(SURNAMES))
+    n, middle = divmod(n, len(SURNAMES))
+    n, first = divmod(n, len(FIRST_NAMES))
+    name = f"{FIRST_NAMES[first]} {SURNAMES[middle]} {SURNAMES[last]}"
+    return f"{name} {n + 1}" if n else name
+
+
+def email_address(name, domain):
+    """Lower-case ASCII e-mail address for a name ("João Silva" -> "joao.silva@domain")."""
+    local = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower().replace(" ", ".")
+    return f"{local}@{domain}"
+
+
+def _weighted(rng, choices, k):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=k)
+
+
+def _split(total, tenants):
+    """Spread a count over the tenants: [(tenant_id, count), ...]."""
+    share, rest = divmod(total, tenants)
+    return [(tenant_id, share + (1 if tenant_id <= rest else 0)) for tenant_id in range(1, tenants + 1)]
+
+
+def _next_id(column):
+    return (db.session.execute(select(func.max(column)).execution_options(all_tenants=True, include_deleted=True)).scalar() or 0) + 1
+
+
+def _tenant_counts(model):
+    """Rows of each tenant already in a table, deleted ones included: {tenant_id: count}."""
+    statement = select(model.tenant_id, func.count()).group_by(model.tenant_id)
+    return dict(db.session.execute(statement.execution_options(all_tenants=True, include_deleted=True)).all())
+
+
+class _Loader:
+    """
+    Inserts generated rows with executemany INSERTs, committing every batch_size rows.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.counts = {}
+
+    def load(self, model, rows):
+        statement = insert(model.__table__)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(statement, model, batch)
+                batch = []
+        if batch:
+            self._flush(statement, model, batch)
+
+    def _flush(self, statement, model, batch):
+        db.session.execute(statement, batch)
+        db.session.commit()
+        name = model.__tablename__
+        self.counts[name] = self.counts.get(name, 0) + len(batch)
+
+
+def _client_rows(rng, first_id, tenants, total, existing):
+    now = datetime.utcnow()
+    client_id = first_id
+    for tenant_id, count in _split(total, tenants):
+        # Names continue after those of the earlier runs, which are unique per tenant too
+        offset = existing.get(tenant_id, 0)
+        for index in range(offset, offset + count):
+            name = person_name(index)
+            row = {
+                "client_id": client_id, "tenant_id": tenant_id, "name": name,
+                "email": email_address(name, "example.com"),
+                "phone": f"9{rng.choice('1236')}{rng.randrange(10_000_000):07d}",
+                "address": f"{rng.choice(STREETS)} {rng.choice(SURNAMES)}, {rng.randint(1, 400)}, {rng.choice(CITIES)}",
+                "created_at": now - timedelta(days=rng.randint(0, 3650)), "version": 1,
+            }
+            yield {**row, **normalized_columns(row)}
+            client_id += 1
+
+
+def _vehicle_rows(rng, first_id, tenants, total, client_ranges, existing):
+    brands = [(brand, models) for brand, models, _ in VEHICLES]
+    weights = [share for _, _, share in VEHICLES]
+    now = datetime.utcnow()
+    vehicle_id = first_id
+    for tenant_id, count in _split(total, tenants):
+        first_client, clients = client_ranges[tenant_id]
+        offset = existing.get(tenant_id, 0)
+        for index in range(offset, offset + count):
+            brand, models = rng.choices(brands, weights=weights)[0]
+            yield {
+                "vehicle_id": vehicle_id, "tenant_id": tenant_id,
+                "client_id": first_client + rng.randrange(clients),
+                "license_plate": license_plate(index), "brand": brand, "model": rng.choice(models),
+                # Fleet skewed towards recent cars
+                "year": now.year - min(int(rng.expovariate(1 / 7)), 35),
+                "created_at": now - timedelta(days=rng.randint(0, 3650)), "version": 1,
+            }
+            vehicle_id += 1
+
+
+def _work_rows(rng, first_id, tenants, total, vehicle_ranges, years, deleted_share):
+    now = datetime.utcnow()
+    span = years * 365 * 86400
+    work_id = first_id
+    for tenant_id, count in _split(total, tenants):
+        first_vehicle, vehicles = vehicle_ranges[tenant_id]
+        statuses = _weighted(rng, WORK_STATUSES, count)
+        for index in range(count):
+            status = statuses[index]
+            if status in ("pending", "in_progress"):
+                created = now - timedelta(seconds=rng.randint(0, 30 * 86400))  # Open works are recent
+            else:
+                created = now - timedelta(seconds=rng.randint(0, span))
+            # Finished works closed a few hours to a few weeks after they were opened
+            updated = min(now, created + timedelta(seconds=int(rng.lognormvariate(11, 1.2)))) if status != "pending" else created
+            yield {
+                "work_id": work_id, "tenant_id": tenant_id,
+                "vehicle_id": first_vehicle + rng.randrange(vehicles),
+                "description": rng.choice(WORK_DESCRIPTIONS), "status": status,
+                "created_at": created, "updated_at": updated, "version": 1,
+                "deleted_at": updated if rng.random() < deleted_share else None,
+            }
+            work_id += 1
+
+
+def _employee_rows(rng, first_id, tenants, total, existing):
+    today = date.today()
+    employee_id = first_id
+    for tenant_id, count in _split(total, tenants):
+        roles = _weighted(rng, EMPLOYEE_ROLES, count)
+        offset = existing.get(tenant_id, 0)
+        for index in range(count):
+            name = person_name((offset + index) * 7919 + 11)  # Other names than the clients'
+            yield {
+                "employee_id": employee_id, "tenant_id": tenant_id, "name": name,
+                "email": email_address(name, "garage.example.com"),
+                "phone": f"9{rng.choice('1236')}{rng.randrange(10_000_000):07d}", "role": roles[index],
+                "hired_date": today - timedelta(days=rng.randint(0, 15 * 365)), "version": 1,
+            }
+            employee_id += 1
+
+
+def _ranges(first_id, tenants, total):
+    """First id and number of rows of each tenant, as generated by the row functions."""
+    ranges, next_id = {}, first_id
+    for tenant_id, count in _split(total, tenants):
+        ranges[tenant_id] = (next_id, count)
+        next_id += count
+    return ranges
+
+
+def generate_data(clients=0, vehicles=0, works=0, employees=0, tenants=1, seed=0, batch_size=50000,
+                  years=5, deleted_share=0.02, defer_indexes=True):
+    """
+    Fill the database with realistic synthetic clients, vehicles, works and employees.
+    Counts are totals, spread evenly over the tenants; the rows are appended to the existing ones,
+    with names and plates following those of the earlier runs.
+    :param clients: Number of clients to generate.
+    :param vehicles: Number of vehicles (each with a unique plate in its tenant and a random client).
+    :param works: Number of works (random vehicle; status, dates and soft deletions follow typical distributions).
+    :param employees: Number of employees.
+    :param tenants: Number of tenants to spread the rows over (tenant ids 1 to tenants).
+    :param seed: Random seed: the same arguments generate the same data.
+    :param batch_size: Rows inserted per executemany and transaction.
+    :param years: History covered by the finished works.
+    :param deleted_share: Share of soft-deleted works.
+    :param defer_indexes: Drop the secondary indexes of the loaded tables during the load and rebuild them at the end.
+    :return: dict: Rows inserted per table and the elapsed time.
+    :raises ValueError: If vehicles or works are requested without a client or vehicle in every tenant to attach them to.
+    """
+    # The vehicles of a tenant are attached to the clients generated for it, and its works to its vehicles
+    if vehicles and clients < tenants:
+        raise ValueError(f"Vehicles need at least one client per tenant: generate at least {tenants} clients.")
+    if works and vehicles < tenants:
+        raise ValueError(f"Works need at least one vehicle per tenant: generate at least {tenants} vehicles.")
+    existing_vehicles = _tenant_counts(Vehicle) if vehicles else {}
+    if any(existing_vehicles.get(tenant_id, 0) + count > _PLATES for tenant_id, count in _split(vehicles, tenants)):
+        raise ValueError(f"At most {_PLATES} unique plates per tenant.")
+
+    rng = random.Random(seed)
+    loader = _Loader(batch_size)
+    started = time.monotonic()
+    engine = db.session.get_bind()
+    is_sqlite = engine.dialect.name == "sqlite"
+    tables = [model.__table__ for model, count in ((Client, clients), (Vehicle, vehicles), (Work, works),
+                                                    (Employee, employees)) if count]
+    indexes = [index for table in tables for index in table.indexes] if defer_indexes else []
+
+    if is_sqlite:
+        # Trade durability for speed during the load: a crash leaves a database to regenerate anyway
+        synchronous = db.session.execute(text("PRAGMA synchronous")).scalar()
+        db.session.execute(text("PRAGMA synchronous = OFF"))
+        db.session.execute(text("PRAGMA cache_size = -262144"))  # 256 MB
+        db.session.execute(text("PRAGMA temp_store = MEMORY"))
+    try:
+        for index in indexes:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        db.session.commit()
+
+        first_client, first_vehicle = _next_id(Client.client_id), _next_id(Vehicle.vehicle_id)
+        loader.load(Client, _client_rows(rng, first_client, tenants, clients, _tenant_counts(Client)))
+        loader.load(Vehicle, _vehicle_rows(rng, first_vehicle, tenants, vehicles, _ranges(first_client, tenants, clients),
+                                           existing_vehicles))
+        loader.load(Work, _work_rows(rng, _next_id(Work.work_id), tenants, works,
+                                     _ranges(first_vehicle, tenants, vehicles), years, deleted_share))
+        loader.load(Employee, _employee_rows(rng, _next_id(Employee.employee_id), tenants, employees,
+                                             _tenant_counts(Employee)))
+    finally:
+        db.session.rollback()
+        for index in indexes:
+            logger.info(f"Building index {index.name}")
+            db.session.execute(CreateIndex(index, if_not_exists=True))
+        if is_sqlite:
+            db.session.execute(text(f"PRAGMA synchronous = {synchronous}"))
+            db.session.execute(text("ANALYZE"))  # Fresh statistics for the query planner
+        db.session.commit()
+
+    elapsed = time.monotonic() - started
+    total = sum(loader.counts.values())
+    logger.info(f"Generated {total} rows in {elapsed:.1f}s")
+    return {"rows": loader.counts, "seconds": round(elapsed, 1), "rows_per_second": int(total / elapsed) if elapsed else total}
+
+
+def write_snapshot(path):
+    """
+    Write a compact copy of the (SQLite) database, to be reused by benchmarks.
+    :param path: Destination file; it must not exist.
+    :raises ValueError: If the database is not SQLite.
+    """
+    if db.session.get_bind().dialect.name != "sqlite":
+        raise ValueError("Snapshots are only supported for SQLite databases.")
+    db.session.commit()
+    # VACUUM INTO writes a defragmented copy, without the free pages of the source
+    db.session.connection().exec_driver_sql("VACUUM INTO ?", (path,))
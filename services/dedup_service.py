@@ -0,0 +1,248 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from difflib import SequenceMatcher
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import func, or_, select, update
+from werkzeug.exceptions import BadRequest
+from utils.database import db
+from utils.normalize import strip_accents
+from models.client import Client
+from models.vehicle import Vehicle
+from models.webhook import WebhookSubscription
+from services.client_service import get_client
+from services.job_service import register_task
+
+logger = logging.getLogger(__name__)
+
+# Indexed blocking keys: only clients sharing one of them are compared
+BLOCKING_KEYS = {
+    "phone": Client.phone_normalized,
+    "email": Client.email_normalized,
+    "name": Client.name_key,
+}
+
+# Weight of each piece of evidence in the similarity score (capped at 1). A shared
+# phone or e-mail alone (e.g. relatives) is not enough, nor is a similar name alone.
+SCORE_WEIGHTS = {"phone": 0.4, "email": 0.4, "name": 0.4, "address": 0.3}
+# Minimum similarity of the names and addresses of two clients to count in their score
+NAME_MIN_SIMILARITY = 0.6
+ADDRESS_MIN_SIMILARITY = 0.8
+
+_COMPARED_COLUMNS = (
+    Client.client_id, Client.name, Client.name_key,
+    Client.phone_normalized, Client.email_normalized, Client.address_normalized,
+)
+
+
+@lru_cache(maxsize=65536)
+def _folded(name):
+    return strip_accents(name).lower()
+
+
+@lru_cache(maxsize=65536)
+def _letters(text):
+    return Counter(text)
+
+
+def _similarity(a, b, minimum):
+    """Similarity ratio of two strings, or 0 when it is below the minimum."""
+    if not a or not b:
+        return 0.0
+    # Upper bounds of the ratio (as SequenceMatcher.real_quick_ratio and quick_ratio), from the
+    # lengths and the letters in common: they discard most pairs without building a matcher
+    length = len(a) + len(b)
+    if 2 * min(len(a), len(b)) < minimum * length:
+        return 0.0
+    if 2 * sum((_letters(a) & _letters(b)).values()) < minimum * length:
+        return 0.0
+    ratio = SequenceMatcher(None, a, b, autojunk=False).ratio()
+    return ratio if ratio >= minimum else 0.0
+
+
+def score_pair(a, b, min_score=0.0):
+    """
+    Similarity of two clients, from their normalised columns.
+    :param a: Mapping with name, phone_normalized, email_normalized and address_normalized.
+    :param b: Same for the other client.
+    :param min_score: Score under which the pair is not of interest: once it cannot be
+                      reached, the names (the slowest comparison) are not compared.
+    :return: tuple: (score between 0 and 1, list of the reasons that contributed)
+    """
+    score, reasons = 0.0, []
+    if a["phone_normalized"] and a["phone_normalized"] == b["phone_normalized"]:
+        score += SCORE_WEIGHTS["phone"]
+        reasons.append("same phone")
+    if a["email_normalized"] and a["email_normalized"] == b["email_normalized"]:
+        score += SCORE_WEIGHTS["email"]
+        reasons.append("same e-mail")
+    address = _similarity(a["address_normalized"], b["address_normalized"], ADDRESS_MIN_SIMILARITY)
+    score += SCORE_WEIGHTS["address"] * address
+    if score + SCORE_WEIGHTS["name"] >= min_score:
+        name = _similarity(_folded(a["name"]), _folded(b["name"]), NAME_MIN_SIMILARITY)
+        if name:
+            score += SCORE_WEIGHTS["name"] * name
+            reasons.append(f"similar name ({name:.0%})")
+    if address:
+        reasons.append(f"similar address ({address:.0%})")
+    return round(min(score, 1.0), 3), reasons
+
+
+def _candidate_pairs(max_block_size):
+    """
+    Pairs of clients sharing a blocking key, found with one GROUP BY per key on its index.
+    :return: tuple: (set of (client_id, client_id) pairs, list of the blocks too large to compare)
+    """
+    pairs, skipped = set(), []
+    for key, column in BLOCKING_KEYS.items():
+        shared = select(column).where(column.is_not(None)).group_by(column).having(func.count() > 1)
+        blocks = {}
+        for value, client_id in db.session.execute(
+                select(column, Client.client_id).where(column.in_(shared)).order_by(column, Client.client_id)):
+            blocks.setdefault(value, []).append(client_id)
+        for value, ids in blocks.items():
+            if len(ids) > max_block_size:
+                skipped.append({"key": key, "value": value, "clients": len(ids)})
+                continue
+            pairs.update((a, b) for index, a in enumerate(ids) for b in ids[index + 1:])
+    return pairs, skipped
+
+
+def _load_clients(ids, chunk_size=500):
+    clients, ids = {}, sorted(ids)
+    for start in range(0, len(ids), chunk_size):
+        statement = select(*_COMPARED_COLUMNS).where(Client.client_id.in_(ids[start:start + chunk_size]))
+        clients.update((row["client_id"], row) for row in db.session.execute(statement).mappings())
+    return clients
+
+
+@register_task("find_duplicate_clients")
+def find_duplicate_clients(min_score=None, max_block_size=None):
+    """
+    Find the groups of clients that are probably the same person.
+    Instead of comparing every pair of clients, only the clients sharing a normalised
+    phone, a normalised e-mail or a phonetic name key are compared and scored.
+    :param min_score: Score from which a pair is reported (DEDUP_MIN_SCORE by default).
+    :param max_block_size: Clients sharing one key beyond which the key is ignored (DEDUP_MAX_BLOCK_SIZE by default).
+    :return: dict: The number of compared pairs, the duplicate groups (client IDs and scored pairs),
+             and the keys shared by too many clients to be compared.
+    """
+    min_score = current_app.config["DEDUP_MIN_SCORE"] if min_score is None else min_score
+    max_block_size = max_block_size or current_app.config["DEDUP_MAX_BLOCK_SIZE"]
+    pairs, skipped = _candidate_pairs(max_block_size)
+    clients = _load_clients({client_id for pair in pairs for client_id in pair})
+
+    # Union-find over the matching pairs: A ~ B and B ~ C make one group
+    parent = {}
+
+    def root(client_id):
+        while parent.setdefault(client_id, client_id) != client_id:
+            parent[client_id] = parent[parent[client_id]]
+            client_id = parent[client_id]
+        return client_id
+
+    matches = []
+    for a, b in sorted(pairs):
+        if a not in clients or b not in clients:
+            continue
+        score, reasons = score_pair(clients[a], clients[b], min_score)
+        if score >= min_score:
+            matches.append({"client_ids": [a, b], "score": score, "reasons": reasons})
+            parent[root(b)] = root(a)
+
+    groups = {}
+    for match in matches:
+        groups.setdefault(root(match["client_ids"][0]), []).append(match)
+    duplicates = [
+        {"client_ids": sorted({client_id for match in group for client_id in match["client_ids"]}), "pairs": group}
+        for group in groups.values()
+    ]
+    logger.info(f"Compared {len(pairs)} client pairs: {len(duplicates)} groups of duplicates")
+    return {"compared_pairs": len(pairs), "duplicates": duplicates, "skipped_keys": skipped}
+
+
+def get_duplicate_candidates(client_id, min_score=None, limit=None):
+    """
+    Find the probable duplicates of one client, through the indexes of its blocking keys.
+    :param client_id: The ID of the client.
+    :param min_score: Score from which a client is reported (DEDUP_MIN_SCORE by default).
+    :param limit: Maximum number of clients compared (DEDUP_MAX_BLOCK_SIZE by default).
+    :return: list: The matching clients with their score and reasons, best first, or None if the client is not found.
+    """
+    try:
+        min_score = current_app.config["DEDUP_MIN_SCORE"] if min_score is None else min_score
+        client = db.session.execute(select(*_COMPARED_COLUMNS).where(Client.client_id == client_id)).mappings().first()
+        if client is None:
+            return None
+        keys = [column == client[column.key] for column in BLOCKING_KEYS.values() if client[column.key]]
+        if not keys:
+            return []
+        statement = (
+            select(*_COMPARED_COLUMNS)
+            .where(or_(*keys), Client.client_id != client_id)
+            .limit(limit or current_app.config["DEDUP_MAX_BLOCK_SIZE"])
+        )
+        candidates = []
+        for other in db.session.execute(statement).mappings():
+            score, reasons = score_pair(client, other, min_score)
+            if score >= min_score:
+                candidates.append({"client_id": other["client_id"], "name": other["name"], "score": score, "reasons": reasons})
+        return sorted(candidates, key=lambda candidate: -candidate["score"])
+    except Exception as e:
+        logger.error(f"Error finding duplicates of client {client_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def merge_clients(client_id, duplicate_ids):
+    """
+    Merge duplicate clients into one: their vehicles and webhook subscriptions are
+    moved to the kept client, and the duplicates are soft-deleted, in one transaction.
+    :param client_id: The ID of the client to keep.
+    :param duplicate_ids: IDs of the clients merged into it.
+    :return: dict: The kept client and what was moved, or None if the client is not found.
+    :raises BadRequest: If a duplicate is the kept client itself or does not exist.
+    """
+    try:
+        duplicate_ids = sorted(set(duplicate_ids))
+        if client_id in duplicate_ids:
+            raise BadRequest("A client cannot be merged into itself.")
+        found = set(db.session.execute(
+            select(Client.client_id).where(Client.client_id.in_([client_id, *duplicate_ids]))
+        ).scalars())
+        if client_id not in found:
+            return None
+        missing = set(duplicate_ids) - found
+        if missing:
+            raise BadRequest(f"Clients not found: {', '.join(map(str, sorted(missing)))}.")
+
+        vehicles = db.session.execute(
+            update(Vehicle).where(Vehicle.client_id.in_(duplicate_ids))
+            .values(client_id=client_id, version=Vehicle.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        subscriptions = db.session.execute(
+            update(WebhookSubscription).where(WebhookSubscription.client_id.in_(duplicate_ids))
+            .values(client_id=client_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.execute(
+            update(Client).where(Client.client_id.in_(duplicate_ids))
+            .values(deleted_at=datetime.utcnow(), version=Client.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        logger.info(f"Merged clients {duplicate_ids} into {client_id} ({vehicles} vehicles)")
+        return {
+            "client": get_client(client_id),
+            "merged_client_ids": duplicate_ids,
+            "vehicles_moved": vehicles,
+            "webhook_subscriptions_moved": subscriptions,
+        }
+    except BadRequest:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error merging clients {duplicate_ids} into {client_id}: {e}")
+        return {"error": "Internal Server Error"}
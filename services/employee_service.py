@@ -1,43 +1,50 @@
 import logging
 from models.employee import Employee
-from utils.database import db
+from services.job_service import register_task
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import BadRequest, Conflict
+from utils.database import db, fetch_columns, check_version, update_columns, select_row, select_rows
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_all_employees():
+# Columns returned by the API (the password hash never leaves the service)
+EMPLOYEE_COLUMNS = ["employee_id", "name", "email", "phone", "role", "hired_date", "created_at", "version"]
+
+# Pre-built statements for the hot reads
+ALL_EMPLOYEES = select_rows(Employee, EMPLOYEE_COLUMNS)
+EMPLOYEE_BY_ID = select_row(Employee, EMPLOYEE_COLUMNS)
+
+def get_all_employees(fields=None):
     """
     Retrieve all employees.
+    :param fields: Optional list of column names to select (sparse fieldset).
     :return: dict: A list of dictionaries containing employee information.
     """
     try:
-        employees = Employee.query.all()
-        return [{"employee_id": employee.employee_id, "name": employee.name, "email": employee.email, "phone": employee.phone, "role": employee.role, "hired_date": employee.hired_date, "created_at": employee.created_at} for employee in employees]
+        if fields:
+            # Only select the requested columns
+            return fetch_columns(Employee, fields)
+        return [dict(row) for row in db.session.execute(ALL_EMPLOYEES).mappings()]
     except Exception as e:
         logger.error(f"Error fetching all employees: {e}")
         return {"error": "Internal Server Error"}
 
-def get_employee(employee_id):
+def get_employee(employee_id, fields=None):
     """
     Retrieve an employee by ID.
     :param employee_id: The ID of the employee to retrieve.
+    :param fields: Optional list of column names to select (sparse fieldset).
     :return: dict: A dictionary containing the employee's information or None if not found.
     """
     try:
-        # Query the database for the employee by ID
-        employee = Employee.query.get(employee_id)
-        if not employee:
-            return None  # Return None if the employee is not found
-        # Return employee data as a dictionary
-        return {
-            "employee_id": employee.employee_id,
-            "name": employee.name,
-            "email": employee.email,
-            "phone": employee.phone,
-            "role": employee.role,
-            "hired_date": employee.hired_date,
-            "created_at": employee.created_at,
-        }
+        if fields:
+            # Only select the requested columns
+            rows = fetch_columns(Employee, fields, Employee.employee_id == employee_id)
+            return rows[0] if rows else None
+        row = db.session.execute(EMPLOYEE_BY_ID, {"identity": employee_id}).mappings().first()
+        return dict(row) if row else None
     except Exception as e:
         logger.error(f"Error fetching employee {employee_id}: {e}")
         raise  # Raise the exception to let the API layer handle it
@@ -51,6 +58,7 @@ def create_employee(name, email, phone, role, hired_date):
     :param role: The role of the employee.
     :param hired_date: The date the employee was hired.
     :return: dict: A dictionary containing the created employee's information.
+    :raises Conflict: If the e-mail is already in use.
     """
     try:
         # Convert hired_date string to datetime.date object
@@ -58,7 +66,12 @@ def create_employee(name, email, phone, role, hired_date):
         employee = Employee(name=name, email=email, phone=phone, role=role, hired_date=hired_date_obj)
         db.session.add(employee)  # Save the new employee to the database
         db.session.commit()
-        return {"employee_id": employee.employee_id, "name": employee.name, "email": employee.email, "phone": employee.phone, "role": employee.role, "hired_date": employee.hired_date, "created_at": employee.created_at}
+        return {"employee_id": employee.employee_id, "name": employee.name, "email": employee.email, "phone": employee.phone, "role": employee.role, "hired_date": employee.hired_date, "created_at": employee.created_at, "version": employee.version}
+    except IntegrityError as e:
+        db.session.rollback()
+        if "email" in str(e.orig):
+            raise Conflict(f"An employee with e-mail '{email}' already exists.")
+        raise Conflict(f"The employee violates a constraint: {e.orig}")
     except Exception as e:
         logger.error(f"Error creating employee: {e}")
         return {"error": "Internal Server Error"}
@@ -67,7 +80,7 @@ def create_employee(name, email, phone, role, hired_date):
 from datetime import datetime
 
 
-def update_employee(employee_id, name, email, phone, role, hired_date):
+def update_employee(employee_id, name, email, phone, role, hired_date, expected_version=None):
     """
     Update an existing employee.
     :param employee_id: The ID of the employee to update.
@@ -76,6 +89,7 @@ def update_employee(employee_id, name, email, phone, role, hired_date):
     :param phone: The new phone number of the employee.
     :param role: The new role of the employee (mechanic, manager, admin).
     :param hired_date: The new hired date of the employee.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
     :return: tuple: A dictionary containing the updated employee's information or an error message and the HTTP status code.
     """
     try:
@@ -83,9 +97,10 @@ def update_employee(employee_id, name, email, phone, role, hired_date):
         hired_date_obj = datetime.strptime(hired_date, "%Y-%m-%d").date()
 
         # Get the employee from the database
-        employee = Employee.query.get(employee_id)
+        employee = db.session.get(Employee, employee_id)
         if not employee:
-            return {"error": f"Employee with ID {employee_id} not found."}, 404
+            return None
+        check_version(employee, expected_version)
 
         # Update the employee's attributes
         employee.name = name
@@ -104,26 +119,85 @@ def update_employee(employee_id, name, email, phone, role, hired_date):
             "role": employee.role,
             "hired_date": employee.hired_date,
             "created_at": employee.created_at,
+            "version": employee.version,
         }
 
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the UPDATE
+        db.session.rollback()
+        raise Conflict(f"Employee with ID {employee_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         db.session.rollback()  # Rollback on error
         logger.error(f"Error updating employee {employee_id}: {e}")
         return {"error": "Internal Server Error"}, 500
 
-def delete_employee(employee_id):
+def patch_employee(employee_id, changes, expected_version=None):
+    """
+    Partially update an employee with a single UPDATE ... RETURNING statement (no prior SELECT).
+    Only the given fields change; null clears a field.
+    :param employee_id: The ID of the employee to update.
+    :param changes: Dictionary of the fields to change.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
+    :return: dict: The updated employee's information, or None if not found.
+    """
+    try:
+        if changes.get("hired_date") is not None:
+            try:
+                changes = {**changes, "hired_date": datetime.strptime(changes["hired_date"], "%Y-%m-%d").date()}
+            except ValueError:
+                raise BadRequest("Field 'hired_date' must be a date (YYYY-MM-DD).")
+        employee = update_columns(Employee, employee_id, changes, EMPLOYEE_COLUMNS, expected_version)
+        db.session.commit()
+        return employee
+    except (BadRequest, Conflict):
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        raise Conflict(f"The changes violate a constraint: {e.orig}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error patching employee {employee_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+def delete_employee(employee_id, expected_version=None):
     """
     Delete an employee.
     :param employee_id: The ID of the employee to delete.
+    :param expected_version: Version the deletion is based on (If-Match); None skips the check.
     :return: dict: A dictionary containing the deleted employee's information.
     """
     try:
-        employee = Employee.query.get(employee_id)
+        employee = db.session.get(Employee, employee_id)
         if not employee:
             return None
-        employee.delete()  # Delete the employee from the database
+        check_version(employee, expected_version)
+        db.session.delete(employee)  # Delete the employee from the database
+        db.session.commit()
         return employee
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the DELETE
+        db.session.rollback()
+        raise Conflict(f"Employee with ID {employee_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         logger.error(f"Error deleting employee {employee_id}: {e}")
         return {"error": "Internal Server Error"}, 500
 
+
+@register_task("export_employees")
+def export_employees():
+    """
+    Background task dumping all employees.
+    :return: list: A list of dictionaries containing information about all employees.
+    :raises RuntimeError: If the employees could not be read, so that the job fails (and is retried).
+    """
+    employees = get_all_employees()
+    if isinstance(employees, dict) and "error" in employees:
+        raise RuntimeError("Error fetching the employees; see the application log.")
+    return employees
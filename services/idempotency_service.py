@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from utils.database import db
+from models.idempotency_key import IdempotencyKey
+from services.job_service import register_task
+
+logger = logging.getLogger(__name__)
+
+
+def load_stored_response(key):
+    """
+    Load the response stored for an idempotency key that has not expired.
+    :param key: Digest identifying the key (see utils.idempotency).
+    :return: dict: request_hash, status_code (None while in progress), content_type, body and expires_at,
+             or None if the key is unknown.
+    """
+    statement = select(
+        IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.content_type,
+        IdempotencyKey.body, IdempotencyKey.expires_at,
+    ).where(IdempotencyKey.key == key, IdempotencyKey.expires_at > datetime.utcnow())
+    row = db.session.execute(statement).mappings().first()
+    return dict(row) if row else None
+
+
+def reserve_key(key, request_hash, ttl):
+    """
+    Claim an idempotency key for a request about to run. The primary key makes the
+    claim atomic: of two concurrent requests with the same key, only one gets it.
+    An expired row left for the key is replaced.
+    :param key: Digest identifying the key.
+    :param request_hash: Digest of the request body.
+    :param ttl: Seconds the stored response is replayed.
+    :return: True if the key was claimed, False if another request holds it.
+    """
+    now = datetime.utcnow()
+    try:
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.expires_at <= now))
+        db.session.execute(insert(IdempotencyKey).values(
+            key=key, request_hash=request_hash, expires_at=now + timedelta(seconds=ttl)
+        ))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def save_response(key, status_code, content_type, body):
+    """
+    Store the response of the request that claimed an idempotency key.
+    :param key: Digest identifying the key.
+    :param status_code: HTTP status of the response.
+    :param content_type: Content type of the response.
+    :param body: Body of the response.
+    """
+    db.session.execute(
+        update(IdempotencyKey).where(IdempotencyKey.key == key)
+        .values(status_code=status_code, content_type=content_type, body=body)
+    )
+    db.session.commit()
+
+
+def release_key(key):
+    """
+    Forget a claimed idempotency key whose request failed, so that a retry runs again.
+    :param key: Digest identifying the key.
+    """
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+    db.session.commit()
+
+
+@register_task("purge_idempotency_keys")
+def purge_idempotency_keys():
+    """
+    Delete the expired idempotency keys.
+    :return: dict: Number of keys deleted.
+    """
+    result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.session.commit()
+    logger.info(f"Purged {result.rowcount} expired idempotency keys")
+    return {"deleted": result.rowcount}
@@ -0,0 +1,339 @@
+import csv
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from utils.database import db
+from models.client import Client
+from models.vehicle import Vehicle
+from models.work import Work
+from services.job_service import register_task
+from services.client_service import normalized_columns
+from services.work_event_service import now_ms, record_work_events, work_event
+
+logger = logging.getLogger(__name__)
+
+# Import formats that can be parsed
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Columns accepted for each importable entity, with the type each value is coerced to
+IMPORT_COLUMNS = {
+    "clients": {"name": str, "email": str, "phone": str, "address": str},
+    "vehicles": {"client_id": int, "license_plate": str, "brand": str, "model": str, "year": int},
+    "works": {"vehicle_id": int, "description": str, "status": str},
+}
+
+# Optional columns; every other accepted column is mandatory
+OPTIONAL_COLUMNS = {"works": {"status"}}
+
+WORK_STATUSES = ("pending", "in_progress", "completed", "cancelled")
+
+IMPORT_MODELS = {"clients": Client, "vehicles": Vehicle, "works": Work}
+
+# Names of the uploads spooled for asynchronous imports (see spool_upload)
+_UPLOAD_TOKEN = re.compile(r"[0-9a-f]{32}")
+
+
+def detect_format(filename=None, content_type=None):
+    """
+    Guess the import format from a file name or content type.
+    :param filename: Name of the uploaded file.
+    :param content_type: MIME type of the upload.
+    :return: str: "csv" or "ndjson" (defaults to "csv").
+    """
+    name = (filename or "").lower()
+    mime = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in mime or "jsonlines" in mime:
+        return "ndjson"
+    return "csv"
+
+
+def iter_rows(stream, fmt):
+    """
+    Stream-parse an uploaded file row by row without loading it into memory.
+    :param stream: Binary file-like object.
+    :param fmt: "csv" or "ndjson".
+    :return: Iterator of (row_number, row_dict_or_error_message) tuples.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row
+    elif fmt == "ndjson":
+        row_number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, "Each line must be a JSON object."
+                continue
+            yield row_number, row
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}'.")
+
+
+def _coerce_row(entity, row):
+    """
+    Keep the accepted columns of a row and convert them to their column types.
+    :param entity: The entity being imported.
+    :param row: The parsed row.
+    :return: tuple: (values dict, None) or (None, error message).
+    """
+    values = {}
+    for column, column_type in IMPORT_COLUMNS[entity].items():
+        value = row.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ""):
+            if column in OPTIONAL_COLUMNS.get(entity, ()):
+                continue
+            return None, f"Missing value for '{column}'."
+        try:
+            values[column] = column_type(value)
+        except (TypeError, ValueError):
+            return None, f"Invalid value for '{column}': {value!r}."
+    return values, None
+
+
+class _BatchValidator:
+    """
+    Validates batches of rows against the model constraints with one query per
+    constraint and batch, remembering foreign keys that are already known to exist.
+    """
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.known_ids = set()
+
+    def _existing(self, column, values):
+        if not values:
+            return set()
+        return set(db.session.execute(select(column).where(column.in_(values))).scalars())
+
+    def _missing_references(self, column, ids):
+        unknown = set(ids) - self.known_ids
+        found = self._existing(column, unknown)
+        self.known_ids.update(found)
+        return unknown - found
+
+    def validate(self, batch):
+        """
+        Split a batch into valid rows and per-row errors.
+        :param batch: List of (row_number, values) tuples.
+        :return: tuple: (list of (row_number, values), list of error dicts).
+        """
+        errors = []
+        if self.entity == "clients":
+            unique_key, unique_column = "name", Client.name
+        elif self.entity == "vehicles":
+            unique_key, unique_column = "license_plate", Vehicle.license_plate
+        else:
+            unique_key, unique_column = None, None
+
+        taken = self._existing(unique_column, {v[unique_key] for _, v in batch}) if unique_key else set()
+        if self.entity == "vehicles":
+            missing = self._missing_references(Client.client_id, {v["client_id"] for _, v in batch})
+        elif self.entity == "works":
+            missing = self._missing_references(Vehicle.vehicle_id, {v["vehicle_id"] for _, v in batch})
+        else:
+            missing = set()
+
+        valid = []
+        for row_number, values in batch:
+            if unique_key:
+                if values[unique_key] in taken:
+                    errors.append({"row": row_number, "error": f"Duplicate {unique_key} '{values[unique_key]}'."})
+                    continue
+                taken.add(values[unique_key])
+            if self.entity == "vehicles" and values["client_id"] in missing:
+                errors.append({"row": row_number, "error": f"Client with ID {values['client_id']} not found."})
+                continue
+            if self.entity == "works":
+                if values["vehicle_id"] in missing:
+                    errors.append({"row": row_number, "error": f"Vehicle with ID {values['vehicle_id']} not found."})
+                    continue
+                if values.get("status", "pending") not in WORK_STATUSES:
+                    errors.append({"row": row_number, "error": f"Invalid status '{values['status']}'."})
+                    continue
+            valid.append((row_number, values))
+        return valid, errors
+
+
+def _insert_rows(model, values):
+    """
+    Insert rows with one executemany INSERT. Imported clients get their normalised
+    columns; imported works also get their "created" events, written with a second
+    executemany INSERT in the same transaction.
+    :param model: The SQLAlchemy model to insert into.
+    :param values: List of column value dicts.
+    """
+    if model is Client:
+        values = [{**row, **normalized_columns(row)} for row in values]
+    if model is not Work:
+        db.session.execute(insert(model), values)
+        return
+    works = db.session.execute(
+        insert(Work).returning(Work.work_id, Work.status, sort_by_parameter_order=True), values
+    ).all()
+    occurred_at = now_ms()
+    record_work_events([work_event(work_id, "created", status, occurred_at) for work_id, status in works])
+
+
+def _insert_chunk(model, rows):
+    """
+    Insert a chunk of validated rows in a single transaction. If the chunk
+    violates a constraint (e.g. a concurrent insert), fall back to inserting
+    row by row so that only the offending rows are rejected.
+    :param model: The SQLAlchemy model to insert into.
+    :param rows: List of (row_number, values) tuples.
+    :return: tuple: (number of inserted rows, list of error dicts).
+    """
+    if not rows:
+        return 0, []
+    try:
+        _insert_rows(model, [values for _, values in rows])
+        db.session.commit()
+        return len(rows), []
+    except IntegrityError:
+        db.session.rollback()
+
+    inserted, errors = 0, []
+    for row_number, values in rows:
+        try:
+            with db.session.begin_nested():
+                _insert_rows(model, [values])
+            inserted += 1
+        except IntegrityError as e:
+            errors.append({"row": row_number, "error": f"Constraint violation: {e.orig}"})
+    db.session.commit()
+    return inserted, errors
+
+
+def import_rows(entity, rows, batch_size=1000, max_errors=1000):
+    """
+    Validate and insert parsed rows in chunked transactions.
+    :param entity: "clients", "vehicles" or "works".
+    :param rows: Iterator of (row_number, row_dict_or_error_message) tuples.
+    :param batch_size: Number of rows validated and committed together.
+    :param max_errors: Maximum number of row errors included in the report.
+    :return: dict: Import report with counts, throughput and per-row errors.
+    """
+    if entity not in IMPORT_MODELS:
+        raise ValueError(f"Unsupported import entity '{entity}'.")
+
+    model = IMPORT_MODELS[entity]
+    validator = _BatchValidator(entity)
+    report = {"entity": entity, "processed": 0, "inserted": 0, "failed": 0, "errors": []}
+    started = time.perf_counter()
+
+    def record_errors(errors):
+        report["failed"] += len(errors)
+        room = max_errors - len(report["errors"])
+        if room > 0:
+            report["errors"].extend(errors[:room])
+
+    def flush(batch):
+        valid, errors = validator.validate(batch)
+        inserted, insert_errors = _insert_chunk(model, valid)
+        report["inserted"] += inserted
+        record_errors(errors + insert_errors)
+
+    batch = []
+    for row_number, row in rows:
+        report["processed"] += 1
+        if isinstance(row, str):
+            record_errors([{"row": row_number, "error": row}])
+            continue
+        values, error = _coerce_row(entity, row)
+        if error:
+            record_errors([{"row": row_number, "error": error}])
+            continue
+        batch.append((row_number, values))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    report["errors"].sort(key=lambda error: error["row"])
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["processed"] / elapsed) if elapsed else None
+    logger.info(f"Imported {report['inserted']}/{report['processed']} {entity} in {elapsed:.2f}s")
+    return report
+
+
+def import_file(entity, path, fmt=None, batch_size=1000, max_errors=1000):
+    """
+    Import a CSV or NDJSON file from disk.
+    :param entity: "clients", "vehicles" or "works".
+    :param path: Path of the file to import.
+    :param fmt: "csv" or "ndjson" (guessed from the file name when omitted).
+    :param batch_size: Number of rows validated and committed together.
+    :param max_errors: Maximum number of row errors included in the report.
+    :return: dict: Import report.
+    """
+    fmt = fmt or detect_format(filename=path)
+    with open(path, "rb") as stream:
+        return import_rows(entity, iter_rows(stream, fmt), batch_size, max_errors)
+
+
+def _spool_path(upload, fmt):
+    """
+    Path of a spooled upload. Only names generated by spool_upload resolve, and only
+    inside IMPORT_SPOOL_DIR, so a job payload cannot point the import at another file.
+    :raises ValueError: If the upload token or the format is invalid.
+    """
+    if not isinstance(upload, str) or not _UPLOAD_TOKEN.fullmatch(upload):
+        raise ValueError("Invalid upload token.")
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}'.")
+    directory = current_app.config["IMPORT_SPOOL_DIR"] or os.path.join(tempfile.gettempdir(), "garage-imports")
+    return os.path.join(directory, f"{upload}.{fmt}")
+
+
+def spool_upload(stream, fmt):
+    """
+    Copy an upload to the spool directory, for the import_data task to read after the request.
+    :param stream: Binary file-like object.
+    :param fmt: "csv" or "ndjson".
+    :return: str: The upload token to pass to import_data.
+    """
+    upload = uuid.uuid4().hex
+    path = _spool_path(upload, fmt)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    with open(path, "xb") as spool:
+        shutil.copyfileobj(stream, spool)
+    return upload
+
+
+@register_task("import_data", internal=True)
+def import_data(entity, upload, fmt, batch_size=1000, max_errors=1000):
+    """
+    Background task importing an upload spooled by spool_upload.
+    The spooled file is deleted once imported; it is kept when the import fails, for a retry.
+    :param entity: "clients", "vehicles" or "works".
+    :param upload: Token returned by spool_upload.
+    :param fmt: "csv" or "ndjson".
+    :param batch_size: Number of rows validated and committed together.
+    :param max_errors: Maximum number of row errors included in the report.
+    :return: dict: Import report.
+    """
+    path = _spool_path(upload, fmt)
+    report = import_file(entity, path, fmt, batch_size, max_errors)
+    os.remove(path)
+    return report
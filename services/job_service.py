@@ -0,0 +1,330 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app, g
+from sqlalchemy import select, update
+from utils.database import db
+from models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Registered task functions, keyed by task name
+_tasks = {}
+# Tasks only queued by the application itself, never through POST /api/job/
+_internal_tasks = set()
+
+# States of the jobs the poller may (re)run once their next_attempt_at is reached
+UNFINISHED_STATUSES = ("queued", "retrying", "running")
+
+# Worker pool shared by the whole process. It is created lazily (and re-created
+# after a fork) so that pre-forked workers never share threads with the parent.
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_busy = set()  # IDs of the jobs queued on or running in the pool of this process
+_running = set()  # IDs of the jobs claimed by the pool of this process, whose leases the poller renews
+# Thread queuing the due jobs of every process (retries, and jobs left over by a stopped worker)
+_poller = None
+_poller_pid = None
+
+
+def register_task(name, internal=False):
+    """
+    Register a function as a background task that can be queued by name.
+    The function receives the job payload as keyword arguments and must return
+    a JSON-serializable value, which is stored as the job result.
+    :param name: The name used to queue the task.
+    :param internal: Whether the task is only queued by the application (its payload is trusted).
+    :return: Decorator registering the function.
+    """
+    def decorator(func):
+        _tasks[name] = func
+        if internal:
+            _internal_tasks.add(name)
+        return func
+    return decorator
+
+
+def get_task_names():
+    """
+    List the names of the tasks that can be queued through the API.
+    :return: list: Sorted task names.
+    """
+    return sorted(set(_tasks) - _internal_tasks)
+
+
+def _get_executor(app):
+    """
+    Return the process-wide worker pool, creating it on first use.
+    :param app: The Flask application whose configuration sizes the pool.
+    :return: ThreadPoolExecutor instance.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # The jobs of the parent process are not run by this one
+            _busy.clear()
+            _running.clear()
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("JOB_WORKERS", 2),
+                thread_name_prefix="job-worker"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _job_to_dict(job, include_result=True):
+    """
+    Convert a Job instance into a dictionary.
+    :param job: The Job instance.
+    :param include_result: Whether to decode and include the payload and result.
+    :return: dict: The job information.
+    """
+    data = {
+        "job_id": job.job_id,
+        "task": job.task,
+        "status": job.status,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_retries": job.max_retries,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "next_attempt_at": job.next_attempt_at,
+    }
+    if include_result:
+        data["payload"] = json.loads(job.payload) if job.payload else None
+        data["result"] = json.loads(job.result) if job.result else None
+    return data
+
+
+def submit_job(task, payload=None, max_retries=None, internal=False):
+    """
+    Queue a registered task for execution in the background.
+    :param task: Name of the registered task.
+    :param payload: Dictionary of keyword arguments passed to the task.
+    :param max_retries: Number of retries after a failure (defaults to JOB_MAX_RETRIES).
+    :param internal: Whether the application itself queues the task, which allows internal tasks.
+    :return: dict: The queued job information.
+    :raises ValueError: If the task is not registered, or is internal and internal is False.
+    """
+    if task not in _tasks or (task in _internal_tasks and not internal):
+        raise ValueError(f"Unknown task '{task}'.")
+
+    app = current_app._get_current_object()
+    if max_retries is None:
+        max_retries = app.config.get("JOB_MAX_RETRIES", 0)
+
+    job = Job(task=task, payload=json.dumps(payload or {}), max_retries=max_retries, next_attempt_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+
+    if app.config.get("JOB_EXECUTOR", "thread") == "inline":
+        # Run in the calling thread (useful for CLI commands and debugging), retries included
+        while _run_job(app, job.job_id, job.tenant_id):
+            db.session.refresh(job)
+            time.sleep(max((job.next_attempt_at - datetime.utcnow()).total_seconds(), 0))
+        db.session.refresh(job)
+    else:
+        _start_poller(app)
+        _dispatch(app, job.job_id, job.tenant_id)
+    return _job_to_dict(job)
+
+
+def _dispatch(app, job_id, tenant_id):
+    """Queue an attempt of a job on the worker pool of this process."""
+    executor = _get_executor(app)
+    with _executor_lock:
+        _busy.add(job_id)
+    executor.submit(_run_job, app, job_id, tenant_id)
+
+
+def _claim_job(app, job_id):
+    """
+    Claim a due job for an attempt: count the attempt and lease the job to this worker
+    for JOB_LEASE_SECONDS, in one UPDATE, so that a job is never run twice at once.
+    :return: bool: False if the job is not due (another worker claimed it, or it is finished).
+    """
+    now = datetime.utcnow()
+    claim = (
+        update(Job)
+        .where(Job.job_id == job_id, Job.status.in_(UNFINISHED_STATUSES), Job.next_attempt_at <= now)
+        .values(status="running", attempts=Job.attempts + 1, started_at=now,
+                next_attempt_at=now + timedelta(seconds=app.config["JOB_LEASE_SECONDS"]))
+        .execution_options(all_tenants=True, synchronize_session=False)
+    )
+    claimed = db.session.execute(claim).rowcount
+    db.session.commit()
+    return bool(claimed)
+
+
+def _run_job(app, job_id, tenant_id=None):
+    """
+    Run one attempt of a job, in its own application context and session. A failed
+    attempt is scheduled again after an exponential backoff (next_attempt_at), until
+    the job runs out of retries; the poller runs it once it is due.
+    :param app: The Flask application.
+    :param job_id: The ID of the job to run.
+    :param tenant_id: Tenant that submitted the job; the task only sees its rows.
+    :return: bool: True if the job is scheduled for a retry.
+    """
+    try:
+        with app.app_context():
+            g.tenant_id = tenant_id
+            if not _claim_job(app, job_id):
+                return False
+            with _executor_lock:
+                _running.add(job_id)
+            job = db.session.get(Job, job_id)
+            if job is None:
+                logger.error(f"Job {job_id} disappeared before it could run")
+                return False
+
+            try:
+                payload = json.loads(job.payload) if job.payload else {}
+                result = _tasks[job.task](**payload)
+                job = db.session.get(Job, job_id)
+                job.result = json.dumps(result, default=str)
+                job.status = "succeeded"
+                job.error = None
+                job.finished_at = datetime.utcnow()
+                job.next_attempt_at = None
+                db.session.commit()
+                return False
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Job {job_id} ({job.task}) failed on attempt {job.attempts}: {e}")
+                job = db.session.get(Job, job_id)
+                job.error = str(e)
+                if job.attempts > job.max_retries:
+                    job.status = "failed"
+                    job.finished_at = datetime.utcnow()
+                    job.next_attempt_at = None
+                    db.session.commit()
+                    return False
+                job.status = "retrying"
+                delay = app.config.get("JOB_RETRY_DELAY", 1.0) * 2 ** (job.attempts - 1)
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                db.session.commit()
+                return True
+    finally:
+        with _executor_lock:
+            _busy.discard(job_id)
+            _running.discard(job_id)
+
+
+def _start_poller(app):
+    """Start the poller thread of this process, unless it is running."""
+    global _poller, _poller_pid
+    with _executor_lock:
+        if _poller is not None and _poller_pid == os.getpid() and _poller.is_alive():
+            return
+        _poller = threading.Thread(target=_poll, args=(app,), name="job-poller", daemon=True)
+        _poller_pid = os.getpid()
+        _poller.start()
+
+
+def _poll(app):
+    """
+    Every JOB_POLL_INTERVAL seconds: renew the leases of the jobs running in this process,
+    and queue the due jobs (queued, retries whose backoff is over, and jobs whose worker
+    stopped without renewing its lease) on the worker pool, up to its free workers.
+    """
+    while True:
+        try:
+            with app.app_context():
+                poll_jobs(app)
+        except Exception as e:
+            logger.error(f"Job poll failed: {e}")
+        time.sleep(app.config["JOB_POLL_INTERVAL"])
+
+
+def poll_jobs(app):
+    """
+    Renew the leases of the jobs of this process and queue the due jobs of every tenant.
+    :param app: The Flask application.
+    :return: int: Number of jobs queued.
+    """
+    now = datetime.utcnow()
+    lease = now + timedelta(seconds=app.config["JOB_LEASE_SECONDS"])
+    with _executor_lock:
+        busy, running = set(_busy), set(_running)
+    if running:
+        db.session.execute(
+            update(Job).where(Job.job_id.in_(running), Job.status == "running").values(next_attempt_at=lease)
+            .execution_options(all_tenants=True, synchronize_session=False)
+        )
+    # A job whose worker stopped (e.g. a restart) counts as a failed attempt
+    db.session.execute(
+        update(Job).where(Job.status == "running", Job.next_attempt_at <= now, Job.attempts > Job.max_retries)
+        .values(status="failed", error="The worker running the job stopped.", finished_at=now, next_attempt_at=None)
+        .execution_options(all_tenants=True, synchronize_session=False)
+    )
+    db.session.commit()
+
+    free = app.config.get("JOB_WORKERS", 2) - len(busy)
+    if free <= 0:
+        return 0
+    due = db.session.execute(
+        select(Job.job_id, Job.tenant_id)
+        .where(Job.status.in_(UNFINISHED_STATUSES), Job.next_attempt_at <= now, Job.job_id.not_in(busy))
+        .order_by(Job.next_attempt_at)
+        .limit(free)
+        .execution_options(all_tenants=True)
+    ).all()
+    db.session.commit()
+    for job_id, tenant_id in due:
+        _dispatch(app, job_id, tenant_id)
+    return len(due)
+
+
+def register_jobs(app):
+    """
+    Start the job poller of each server process with its first request, so that the jobs
+    left unfinished by a previous run (queued, retrying or interrupted) are run again.
+    """
+    if app.config.get("JOB_EXECUTOR", "thread") != "thread":
+        return
+
+    @app.before_request
+    def start_job_poller():
+        # A no-op once the thread runs
+        _start_poller(app)
+
+
+def get_all_jobs(status=None, limit=100):
+    """
+    Retrieve the most recent jobs.
+    :param status: Optional status to filter by.
+    :param limit: Maximum number of jobs to return.
+    :return: list: A list of dictionaries containing job information (without results).
+    """
+    try:
+        query = Job.query.order_by(Job.job_id.desc())
+        if status:
+            query = query.filter(Job.status == status)
+        return [_job_to_dict(job, include_result=False) for job in query.limit(limit)]
+    except Exception as e:
+        logger.error(f"Error fetching jobs: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def get_job(job_id):
+    """
+    Retrieve a job by ID, including its payload and stored result.
+    :param job_id: The ID of the job to retrieve.
+    :return: dict: The job information or None if not found.
+    """
+    try:
+        job = db.session.get(Job, job_id)
+        if not job:
+            return None
+        return _job_to_dict(job)
+    except Exception as e:
+        logger.error(f"Error fetching job {job_id}: {e}")
+        return {"error": "Internal Server Error"}
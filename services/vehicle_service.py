@@ -1,55 +1,78 @@
 import logging
-from utils.database import db
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import BadRequest, Conflict
+from utils.database import db, fetch_columns, check_reference, check_version, update_columns, select_row, select_rows
+from models.client import Client
 from models.vehicle import Vehicle
+from services.client_service import CLIENT_COLUMNS
+from utils.loader import embed_rows, get_loader
+from services.job_service import register_task
 
 logger = logging.getLogger(__name__)
 
-def get_all_vehicles():
+# Columns returned by the API
+VEHICLE_COLUMNS = ["vehicle_id", "client_id", "license_plate", "brand", "model", "year", "created_at", "version"]
+
+# Pre-built statements for the hot reads
+ALL_VEHICLES = select_rows(Vehicle, VEHICLE_COLUMNS)
+VEHICLE_BY_ID = select_row(Vehicle, VEHICLE_COLUMNS)
+
+# Related records that can be embedded in vehicle responses (?embed=)
+VEHICLE_EMBEDS = ("client",)
+
+def get_all_vehicles(fields=None, embed=None):
     """
     Retrieve all vehicles.
+    :param fields: Optional list of column names to select (sparse fieldset).
+    :param embed: Optional list of related records to include (see VEHICLE_EMBEDS).
     :return: List of dictionaries containing vehicle data.
     """
     try:
-        vehicles = Vehicle.query.all()
-        return [
-            {
-                "vehicle_id": vehicle.vehicle_id,
-                "client_id": vehicle.client_id,
-                "license_plate": vehicle.license_plate,
-                "brand": vehicle.brand,
-                "model": vehicle.model,
-                "year": vehicle.year,
-                "created_at": vehicle.created_at,
-            }
-            for vehicle in vehicles
-        ]
+        if fields:
+            # Only select the requested columns (and the key of the embedded records)
+            vehicles = fetch_columns(Vehicle, fields + ["client_id"] if embed and "client_id" not in fields else fields)
+        else:
+            vehicles = [dict(row) for row in db.session.execute(ALL_VEHICLES).mappings()]
+        return embed_vehicle_relations(vehicles, embed) if embed else vehicles
     except Exception as e:
         logger.error(f"Error fetching all vehicles: {e}")
         return {"error": "Internal Server Error"}
 
-def get_vehicle(vehicle_id):
+def get_vehicle(vehicle_id, fields=None, embed=None):
     """
     Retrieve a vehicle by ID.
     :param vehicle_id: The ID of the vehicle to retrieve.
+    :param fields: Optional list of column names to select (sparse fieldset).
+    :param embed: Optional list of related records to include (see VEHICLE_EMBEDS).
     :return: Dictionary containing vehicle data or None if not found.
     """
     try:
-        vehicle = Vehicle.query.get(vehicle_id)
-        if not vehicle:
-            return None
-        return {
-            "vehicle_id": vehicle.vehicle_id,
-            "client_id": vehicle.client_id,
-            "license_plate": vehicle.license_plate,
-            "brand": vehicle.brand,
-            "model": vehicle.model,
-            "year": vehicle.year,
-            "created_at": vehicle.created_at,
-        }
+        if fields:
+            # Only select the requested columns (and the key of the embedded records)
+            rows = fetch_columns(Vehicle, fields + ["client_id"] if embed and "client_id" not in fields else fields, Vehicle.vehicle_id == vehicle_id)
+            vehicle = rows[0] if rows else None
+        else:
+            row = db.session.execute(VEHICLE_BY_ID, {"identity": vehicle_id}).mappings().first()
+            vehicle = dict(row) if row else None
+        if vehicle and embed:
+            embed_vehicle_relations([vehicle], embed)
+        return vehicle
     except Exception as e:
         logger.error(f"Error fetching vehicle {vehicle_id}: {e}")
         return {"error": "Internal Server Error"}
 
+def embed_vehicle_relations(vehicles, embeds):
+    """
+    Attach the related records requested with ?embed= to vehicles, with one query per related model.
+    :param vehicles: List of vehicle dictionaries (they must include client_id).
+    :param embeds: Names of the relations to embed ("client").
+    :return: list: The vehicles.
+    """
+    if "client" in embeds:
+        embed_rows(vehicles, "client", "client_id", get_loader(Client, CLIENT_COLUMNS))
+    return vehicles
+
 def create_vehicle(client_id, license_plate, brand, model, year):
     """
     Create a new vehicle.
@@ -59,8 +82,11 @@ def create_vehicle(client_id, license_plate, brand, model, year):
     :param model: Vehicle's model.
     :param year: Manufacturing year of the vehicle.
     :return: Dictionary containing the newly created vehicle's data.
+    :raises BadRequest: If the client does not exist.
+    :raises Conflict: If the license plate is already in use.
     """
     try:
+        check_reference(Client, client_id)
         vehicle = Vehicle(
             client_id=client_id, license_plate=license_plate, brand=brand, model=model, year=year
         )
@@ -74,13 +100,22 @@ def create_vehicle(client_id, license_plate, brand, model, year):
             "model": vehicle.model,
             "year": vehicle.year,
             "created_at": vehicle.created_at,
+            "version": vehicle.version,
         }
+    except BadRequest:
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        if "license_plate" in str(e.orig):
+            raise Conflict(f"A vehicle with license plate '{license_plate}' already exists.")
+        raise Conflict(f"The vehicle violates a constraint: {e.orig}")
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error creating vehicle: {e}")
         return {"error": "Internal Server Error"}
 
-def update_vehicle(vehicle_id, client_id, license_plate, brand, model, year):
+def update_vehicle(vehicle_id, client_id, license_plate, brand, model, year, expected_version=None):
     """
     Update an existing vehicle.
     :param vehicle_id: ID of the vehicle to update.
@@ -89,12 +124,16 @@ def update_vehicle(vehicle_id, client_id, license_plate, brand, model, year):
     :param brand: Vehicle's brand.
     :param model: Vehicle's model.
     :param year: Manufacturing year of the vehicle.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
     :return: Dictionary containing the updated vehicle's data.
     """
     try:
-        vehicle = Vehicle.query.get(vehicle_id)
+        vehicle = db.session.get(Vehicle, vehicle_id)
         if not vehicle:
             return None
+        check_version(vehicle, expected_version)
+        if client_id and client_id != vehicle.client_id:
+            check_reference(Client, client_id)
 
         vehicle.client_id = client_id or vehicle.client_id
         vehicle.license_plate = license_plate or vehicle.license_plate
@@ -111,25 +150,82 @@ def update_vehicle(vehicle_id, client_id, license_plate, brand, model, year):
             "model": vehicle.model,
             "year": vehicle.year,
             "created_at": vehicle.created_at,
+            "version": vehicle.version,
         }
+    except (BadRequest, Conflict):
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the UPDATE
+        db.session.rollback()
+        raise Conflict(f"Vehicle with ID {vehicle_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error updating vehicle {vehicle_id}: {e}")
         return {"error": "Internal Server Error"}
 
-def delete_vehicle(vehicle_id):
+def patch_vehicle(vehicle_id, changes, expected_version=None):
+    """
+    Partially update a vehicle with a single UPDATE ... RETURNING statement (no prior SELECT).
+    Only the given fields change; null clears a field.
+    :param vehicle_id: The ID of the vehicle to update.
+    :param changes: Dictionary of the fields to change.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
+    :return: dict: The updated vehicle's information, or None if not found.
+    """
+    try:
+        if changes.get("client_id") is not None:
+            check_reference(Client, changes["client_id"])
+        vehicle = update_columns(Vehicle, vehicle_id, changes, VEHICLE_COLUMNS, expected_version)
+        db.session.commit()
+        return vehicle
+    except (BadRequest, Conflict):
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        raise Conflict(f"The changes violate a constraint: {e.orig}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error patching vehicle {vehicle_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+def delete_vehicle(vehicle_id, expected_version=None):
     """
-    Delete a vehicle.
+    Soft-delete a vehicle (flag it with deleted_at).
     :param vehicle_id: The ID of the vehicle to delete.
+    :param expected_version: Version the deletion is based on (If-Match); None skips the check.
     :return: True if deletion was successful, False otherwise.
     """
     try:
-        vehicle = Vehicle.query.get(vehicle_id)
+        vehicle = db.session.get(Vehicle, vehicle_id)
         if not vehicle:
             return None
-        db.session.delete(vehicle)
+        check_version(vehicle, expected_version)
+        # Soft delete: the row is kept for history and hidden from queries
+        vehicle.deleted_at = db.func.now()
         db.session.commit()
         return True
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the soft delete
+        db.session.rollback()
+        raise Conflict(f"Vehicle with ID {vehicle_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         logger.error(f"Error deleting vehicle {vehicle_id}: {e}")
         return {"error": "Internal Server Error"}
+
+
+@register_task("export_vehicles")
+def export_vehicles():
+    """
+    Background task dumping all vehicles.
+    :return: list: A list of dictionaries containing information about all vehicles.
+    :raises RuntimeError: If the vehicles could not be read, so that the job fails (and is retried).
+    """
+    vehicles = get_all_vehicles()
+    if isinstance(vehicles, dict) and "error" in vehicles:
+        raise RuntimeError("Error fetching the vehicles; see the application log.")
+    return vehicles
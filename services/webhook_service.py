@@ -0,0 +1,342 @@
+import json
+import logging
+import secrets
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+from werkzeug.exceptions import BadRequest
+from utils.database import db
+from models.client import Client
+from models.vehicle import Vehicle
+from models.webhook import WebhookDelivery, WebhookSubscription
+from models.work import Work
+from models.work_event import WORK_EVENT_TYPES, WORK_STATUS_CODES
+from services.work_event_service import STATUS_NAMES, ms_to_datetime
+from utils.webhooks import check_url, webhook_allowed_hosts
+
+logger = logging.getLogger(__name__)
+
+# Columns returned by the API (the secret is only returned once, when the subscription is created)
+SUBSCRIPTION_COLUMNS = ["subscription_id", "client_id", "url", "statuses", "active", "created_at"]
+DELIVERY_COLUMNS = [
+    "delivery_id", "subscription_id", "event", "status", "attempts", "next_attempt_at", "response_status",
+    "last_error", "created_at", "delivered_at"
+]
+
+# Work events notified to the subscriptions, and the name they are sent with
+NOTIFIED_EVENTS = {
+    WORK_EVENT_TYPES["created"]: "work.created",
+    WORK_EVENT_TYPES["status_changed"]: "work.status_changed",
+}
+
+_insert_deliveries = insert(WebhookDelivery)
+
+
+def _subscription_to_dict(subscription):
+    data = {column: getattr(subscription, column) for column in SUBSCRIPTION_COLUMNS}
+    data["statuses"] = [status for status in subscription.statuses.split(",") if status]
+    return data
+
+
+def _check_subscription(client_id, url, statuses):
+    config = current_app.config
+    try:
+        check_url(url, webhook_allowed_hosts(config), config["WEBHOOK_ALLOW_PRIVATE"])
+    except ValueError as e:
+        raise BadRequest(str(e))
+    except OSError:
+        raise BadRequest("The webhook host could not be resolved.")
+    unknown = set(statuses) - set(WORK_STATUS_CODES)
+    if unknown:
+        raise BadRequest(f"Unknown statuses: {', '.join(sorted(unknown))}. Available: {', '.join(WORK_STATUS_CODES)}.")
+    if db.session.execute(select(Client.client_id).where(Client.client_id == client_id)).first() is None:
+        raise BadRequest(f"Client with ID {client_id} not found.")
+
+
+def get_all_subscriptions(client_id=None):
+    """
+    Retrieve the webhook subscriptions.
+    :param client_id: Optional client to filter by.
+    :return: list: A list of dictionaries containing the subscriptions.
+    """
+    try:
+        statement = select(WebhookSubscription).order_by(WebhookSubscription.subscription_id)
+        if client_id is not None:
+            statement = statement.where(WebhookSubscription.client_id == client_id)
+        return [_subscription_to_dict(subscription) for subscription in db.session.execute(statement).scalars()]
+    except Exception as e:
+        logger.error(f"Error fetching webhook subscriptions: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def get_subscription(subscription_id):
+    """
+    Retrieve a webhook subscription by ID.
+    :param subscription_id: The ID of the subscription.
+    :return: dict: The subscription or None if not found.
+    """
+    try:
+        statement = select(WebhookSubscription).where(WebhookSubscription.subscription_id == subscription_id)
+        subscription = db.session.execute(statement).scalar()
+        return _subscription_to_dict(subscription) if subscription else None
+    except Exception as e:
+        logger.error(f"Error fetching webhook subscription {subscription_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def create_subscription(client_id, url, statuses=None, active=True):
+    """
+    Subscribe a URL to the status changes of the works of a client.
+    :param client_id: The client whose works are followed.
+    :param url: The HTTP(S) endpoint to notify.
+    :param statuses: Statuses to notify (e.g. ["completed"]); every status change when empty.
+    :param active: Whether notifications are sent.
+    :return: dict: The subscription, with the secret used to sign the requests.
+    :raises BadRequest: If the URL, a status or the client is invalid.
+    """
+    try:
+        statuses = list(dict.fromkeys(statuses or []))
+        _check_subscription(client_id, url, statuses)
+        subscription = WebhookSubscription(
+            client_id=client_id, url=url, statuses=",".join(statuses), secret=secrets.token_hex(32), active=active
+        )
+        db.session.add(subscription)
+        db.session.commit()
+        return {**_subscription_to_dict(subscription), "secret": subscription.secret}
+    except BadRequest:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating webhook subscription: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def update_subscription(subscription_id, url, statuses=None, active=True):
+    """
+    Update a webhook subscription (the client and the secret do not change).
+    :param subscription_id: The ID of the subscription.
+    :param url: The HTTP(S) endpoint to notify.
+    :param statuses: Statuses to notify; every status change when empty.
+    :param active: Whether notifications are sent.
+    :return: dict: The updated subscription or None if not found.
+    :raises BadRequest: If the URL or a status is invalid.
+    """
+    try:
+        statement = select(WebhookSubscription).where(WebhookSubscription.subscription_id == subscription_id)
+        subscription = db.session.execute(statement).scalar()
+        if not subscription:
+            return None
+        statuses = list(dict.fromkeys(statuses or []))
+        _check_subscription(subscription.client_id, url, statuses)
+        subscription.url = url
+        subscription.statuses = ",".join(statuses)
+        subscription.active = active
+        db.session.commit()
+        return _subscription_to_dict(subscription)
+    except BadRequest:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating webhook subscription {subscription_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def delete_subscription(subscription_id):
+    """
+    Delete a webhook subscription and its deliveries.
+    :param subscription_id: The ID of the subscription.
+    :return: True if deleted, None if not found.
+    """
+    try:
+        statement = select(WebhookSubscription).where(WebhookSubscription.subscription_id == subscription_id)
+        subscription = db.session.execute(statement).scalar()
+        if not subscription:
+            return None
+        db.session.execute(delete(WebhookDelivery).where(WebhookDelivery.subscription_id == subscription_id))
+        db.session.delete(subscription)
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting webhook subscription {subscription_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def get_deliveries(subscription_id, status=None, limit=100):
+    """
+    Retrieve the most recent deliveries of a subscription.
+    :param subscription_id: The ID of the subscription.
+    :param status: Optional status to filter by ("pending", "delivered" or "failed").
+    :param limit: Maximum number of deliveries to return.
+    :return: list: The deliveries, newest first.
+    """
+    try:
+        statement = (
+            select(*(getattr(WebhookDelivery, column) for column in DELIVERY_COLUMNS))
+            .where(WebhookDelivery.subscription_id == subscription_id)
+            .order_by(WebhookDelivery.delivery_id.desc())
+            .limit(limit)
+        )
+        if status:
+            statement = statement.where(WebhookDelivery.status == status)
+        return [dict(row) for row in db.session.execute(statement).mappings()]
+    except Exception as e:
+        logger.error(f"Error fetching deliveries of webhook subscription {subscription_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def _mark_queued():
+    # Wakes the dispatcher once the transaction commits (see utils.webhooks)
+    db.session.info["webhooks_queued"] = True
+
+
+def queue_ping(subscription_id):
+    """
+    Queue a test notification ("ping") to a subscription, e.g. to check a receiver.
+    :param subscription_id: The ID of the subscription.
+    :return: dict: The queued delivery or None if the subscription is not found.
+    """
+    try:
+        statement = select(WebhookSubscription).where(WebhookSubscription.subscription_id == subscription_id)
+        subscription = db.session.execute(statement).scalar()
+        if not subscription:
+            return None
+        delivery = WebhookDelivery(
+            subscription_id=subscription_id, event="ping",
+            payload=json.dumps({"subscription_id": subscription_id}), next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(delivery)
+        _mark_queued()
+        db.session.commit()
+        return {column: getattr(delivery, column) for column in DELIVERY_COLUMNS}
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error queueing a ping to webhook subscription {subscription_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def queue_work_webhooks(events):
+    """
+    Queue the notifications of work changes to the subscriptions of the clients owning the works.
+    Like record_work_events, it runs in the caller's transaction: the notifications are
+    queued if and only if the change is committed, and they are sent afterwards by the
+    dispatcher, so the request does not wait for the receivers.
+    :param events: Rows built with work_event; only creations and status changes are notified.
+    """
+    events = [event for event in events if event["event_type"] in NOTIFIED_EVENTS]
+    if not events:
+        return
+    statement = (
+        select(
+            WebhookSubscription.subscription_id, WebhookSubscription.tenant_id, WebhookSubscription.statuses,
+            Work.work_id, Work.vehicle_id, Vehicle.client_id
+        )
+        .join(Vehicle, Vehicle.client_id == WebhookSubscription.client_id)
+        .join(Work, Work.vehicle_id == Vehicle.vehicle_id)
+        .where(Work.work_id.in_({event["work_id"] for event in events}), WebhookSubscription.active.is_(True))
+    )
+    subscriptions = db.session.execute(statement).all()
+    if not subscriptions:
+        return
+
+    now = datetime.utcnow()
+    deliveries = []
+    for event in events:
+        status = STATUS_NAMES.get(event["status"])
+        for subscription in subscriptions:
+            if subscription.work_id != event["work_id"]:
+                continue
+            if subscription.statuses and status not in subscription.statuses.split(","):
+                continue
+            deliveries.append({
+                "subscription_id": subscription.subscription_id,
+                "tenant_id": subscription.tenant_id,
+                "event": NOTIFIED_EVENTS[event["event_type"]],
+                "payload": json.dumps({
+                    "work_id": subscription.work_id,
+                    "vehicle_id": subscription.vehicle_id,
+                    "client_id": subscription.client_id,
+                    "status": status,
+                    "occurred_at": ms_to_datetime(event["occurred_at"]).isoformat(),
+                }),
+                "next_attempt_at": now,
+            })
+    if deliveries:
+        db.session.execute(_insert_deliveries, deliveries)
+        _mark_queued()
+
+
+def claim_deliveries(limit, exclude=(), lease_seconds=300):
+    """
+    Claim the due deliveries of every tenant for sending, grouped by subscription.
+    Claiming counts an attempt and pushes next_attempt_at back by the lease in one
+    UPDATE, so concurrent dispatchers (one per process) never claim the same row,
+    and the rows of a dispatcher that died are retried once the lease expires.
+    :param limit: Maximum number of deliveries to claim.
+    :param exclude: IDs of subscriptions whose deliveries are left for later (e.g. one request is in flight).
+    :param lease_seconds: Time the claimed deliveries have to be sent before they are due again.
+    :return: list: (subscription dict or None if deleted, list of delivery dicts) pairs, oldest deliveries first.
+    """
+    now = datetime.utcnow()
+    due = (
+        select(WebhookDelivery.delivery_id)
+        .where(WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= now)
+        .order_by(WebhookDelivery.next_attempt_at)
+        .limit(limit)
+    )
+    if exclude:
+        due = due.where(WebhookDelivery.subscription_id.not_in(exclude))
+    claim = (
+        update(WebhookDelivery)
+        .where(WebhookDelivery.delivery_id.in_(due.scalar_subquery()))
+        .values(attempts=WebhookDelivery.attempts + 1, next_attempt_at=now + timedelta(seconds=lease_seconds))
+        .returning(
+            WebhookDelivery.delivery_id, WebhookDelivery.subscription_id, WebhookDelivery.event,
+            WebhookDelivery.payload, WebhookDelivery.attempts, WebhookDelivery.created_at
+        )
+        .execution_options(all_tenants=True, synchronize_session=False)
+    )
+    deliveries = [dict(row) for row in db.session.execute(claim).mappings()]
+    if not deliveries:
+        db.session.commit()
+        return []
+    subscriptions = {
+        row.subscription_id: row._asdict()
+        for row in db.session.execute(
+            select(WebhookSubscription.subscription_id, WebhookSubscription.url, WebhookSubscription.secret,
+                   WebhookSubscription.active)
+            .where(WebhookSubscription.subscription_id.in_({d["subscription_id"] for d in deliveries}))
+            .execution_options(all_tenants=True)
+        )
+    }
+    db.session.commit()
+
+    groups = {}
+    for delivery in sorted(deliveries, key=lambda d: d["delivery_id"]):
+        groups.setdefault(delivery["subscription_id"], []).append(delivery)
+    return [(subscriptions.get(subscription_id), group) for subscription_id, group in groups.items()]
+
+
+def record_delivery_results(delivery_ids, status, response_status=None, error=None, retry_at=None):
+    """
+    Store the outcome of an attempt to send some deliveries.
+    :param delivery_ids: IDs of the deliveries sent together.
+    :param status: "delivered", "failed" (given up) or "pending" (retried at retry_at).
+    :param response_status: HTTP status of the response, if any.
+    :param error: Why the attempt failed.
+    :param retry_at: When a pending delivery is due again.
+    """
+    values = {"status": status, "response_status": response_status, "last_error": error}
+    if status == "delivered":
+        values["delivered_at"] = datetime.utcnow()
+    if status == "pending":
+        values["next_attempt_at"] = retry_at
+    db.session.execute(
+        update(WebhookDelivery)
+        .where(WebhookDelivery.delivery_id.in_(delivery_ids))
+        .values(**values)
+        .execution_options(all_tenants=True, synchronize_session=False)
+    )
+    db.session.commit()
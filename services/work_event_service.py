@@ -0,0 +1,157 @@
+import logging
+import time
+from datetime import datetime, timezone
+from flask import g
+from sqlalchemy import func, insert, select
+from utils.database import db
+from models.work_event import WorkEvent, WORK_EVENT_TYPES, WORK_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+# Reverse lookups to decode stored events
+STATUS_NAMES = {code: name for name, code in WORK_STATUS_CODES.items()}
+EVENT_NAMES = {code: name for name, code in WORK_EVENT_TYPES.items()}
+
+# Events that start a new stage: the work entered the status stored with them
+STAGE_EVENTS = (WORK_EVENT_TYPES["created"], WORK_EVENT_TYPES["status_changed"], WORK_EVENT_TYPES["deleted"])
+
+_insert_events = insert(WorkEvent)
+
+
+def now_ms():
+    """
+    Current time in milliseconds since the Unix epoch, the unit of WorkEvent.occurred_at.
+    """
+    return time.time_ns() // 1_000_000
+
+
+def ms_to_datetime(value):
+    """
+    Convert an event time (milliseconds since the epoch) to a naive UTC datetime, like the other timestamps.
+    """
+    return datetime.fromtimestamp(value / 1000, timezone.utc).replace(tzinfo=None) if value is not None else None
+
+
+def work_event(work_id, event, status, occurred_at=None):
+    """
+    Build a work event row for record_work_events.
+    :param work_id: ID of the work that changed.
+    :param event: "created", "status_changed", "updated" or "deleted".
+    :param status: Status of the work after the change.
+    :param occurred_at: Time of the change in epoch milliseconds (now by default).
+    :return: dict: The event row.
+    """
+    employee = g.get("current_employee")
+    return {
+        "work_id": work_id,
+        "event_type": WORK_EVENT_TYPES[event],
+        "status": WORK_STATUS_CODES.get(status, 0),
+        "occurred_at": occurred_at or now_ms(),
+        "employee_id": employee["sub"] if employee else None,
+    }
+
+
+def record_work_events(events):
+    """
+    Append events to the work event log with a single (executemany) INSERT.
+    Runs in the caller's transaction: the caller commits, so the events are stored
+    if and only if the change they describe is.
+    :param events: List of rows built with work_event.
+    """
+    if events:
+        db.session.execute(_insert_events, events)
+
+
+def get_work_timeline(work_id):
+    """
+    Reconstruct the history of a work from its events.
+    :param work_id: The ID of the work.
+    :return: dict: The events, oldest first, and the stages (status, start, end and duration in seconds;
+             the current stage has no end), or None if the work has no events.
+    """
+    try:
+        statement = (
+            select(WorkEvent.event_id, WorkEvent.event_type, WorkEvent.status, WorkEvent.occurred_at, WorkEvent.employee_id)
+            .where(WorkEvent.work_id == work_id)
+            .order_by(WorkEvent.event_id)
+        )
+        rows = db.session.execute(statement).all()
+        if not rows:
+            return None
+
+        events, stages = [], []
+        for row in rows:
+            events.append({
+                "event_id": row.event_id,
+                "event": EVENT_NAMES.get(row.event_type, "unknown"),
+                "status": STATUS_NAMES.get(row.status, "other"),
+                "occurred_at": ms_to_datetime(row.occurred_at),
+                "employee_id": row.employee_id,
+            })
+            if row.event_type in STAGE_EVENTS:
+                if stages and stages[-1]["ended_at"] is None:
+                    stages[-1]["ended_at"] = ms_to_datetime(row.occurred_at)
+                    stages[-1]["duration_seconds"] = (row.occurred_at - stages[-1].pop("_started")) / 1000
+                if row.event_type != WORK_EVENT_TYPES["deleted"]:
+                    stages.append({
+                        "status": STATUS_NAMES.get(row.status, "other"),
+                        "started_at": ms_to_datetime(row.occurred_at),
+                        "ended_at": None,
+                        "duration_seconds": None,
+                        "_started": row.occurred_at,
+                    })
+        for stage in stages:
+            stage.pop("_started", None)
+        return {"work_id": work_id, "events": events, "stages": stages}
+    except Exception as e:
+        logger.error(f"Error fetching the timeline of work {work_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+
+def get_stage_durations(since=None, until=None):
+    """
+    Aggregate the time works spent in each status, computed in SQL: each stage lasts from
+    the event that entered it to the next stage event of the same work (LEAD window function).
+    Stages still in progress, and final statuses, have no end and are not counted.
+    :param since: Only count stages that started at or after this datetime (UTC).
+    :param until: Only count stages that started before this datetime (UTC).
+    :return: list: Per status, the number of stages and their average, minimum and maximum duration in seconds.
+    """
+    try:
+        next_stage = func.lead(WorkEvent.occurred_at).over(partition_by=WorkEvent.work_id, order_by=WorkEvent.event_id)
+        stages = select(
+            WorkEvent.status, WorkEvent.event_type, WorkEvent.occurred_at, (next_stage - WorkEvent.occurred_at).label("duration")
+        ).where(WorkEvent.event_type.in_(STAGE_EVENTS))
+        # The window sees every stage event; the period only selects the stages to count
+        stages = stages.subquery()
+
+        criteria = [stages.c.duration.is_not(None), stages.c.event_type != WORK_EVENT_TYPES["deleted"]]
+        if since is not None:
+            criteria.append(stages.c.occurred_at >= int(since.replace(tzinfo=timezone.utc).timestamp() * 1000))
+        if until is not None:
+            criteria.append(stages.c.occurred_at < int(until.replace(tzinfo=timezone.utc).timestamp() * 1000))
+        statement = (
+            select(
+                stages.c.status,
+                func.count().label("stages"),
+                func.avg(stages.c.duration).label("average"),
+                func.min(stages.c.duration).label("minimum"),
+                func.max(stages.c.duration).label("maximum"),
+            )
+            .where(*criteria)
+            .group_by(stages.c.status)
+            .order_by(stages.c.status)
+        )
+        return [
+            {
+                "status": STATUS_NAMES.get(row.status, "other"),
+                "stages": row.stages,
+                "average_seconds": row.average / 1000,
+                "min_seconds": row.minimum / 1000,
+                "max_seconds": row.maximum / 1000,
+            }
+            for row in db.session.execute(statement)
+        ]
+    except Exception as e:
+        logger.error(f"Error computing the work stage durations: {e}")
+        return {"error": "Internal Server Error"}
@@ -1,63 +1,98 @@
 import logging
-from utils.database import db
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import BadRequest, Conflict
+from utils.database import db, fetch_columns, check_reference, check_version, set_if_changed, update_columns, select_row, select_rows
+from models.vehicle import Vehicle
 from models.work import Work
+from services.vehicle_service import VEHICLE_COLUMNS, embed_vehicle_relations
+from utils.loader import embed_rows, get_loader
+from services.job_service import register_task
+from services.work_event_service import record_work_events, work_event
+from services.webhook_service import queue_work_webhooks
 
 logger = logging.getLogger(__name__)
 
-def get_all_works():
+# Columns returned by the API
+WORK_COLUMNS = ["work_id", "vehicle_id", "description", "status", "created_at", "updated_at", "version"]
+
+# Pre-built statements for the hot reads
+ALL_WORKS = select_rows(Work, WORK_COLUMNS)
+WORK_BY_ID = select_row(Work, WORK_COLUMNS)
+
+# Related records that can be embedded in work responses (?embed=)
+WORK_EMBEDS = ("vehicle", "vehicle.client")
+
+def get_all_works(fields=None, embed=None):
     """
     Retrieve all works.
+    :param fields: Optional list of column names to select (sparse fieldset).
+    :param embed: Optional list of related records to include (see WORK_EMBEDS).
     :return: List of dictionaries containing work data.
     """
     try:
-        works = Work.query.all()
-        return [
-            {
-                "work_id": work.work_id,
-                "vehicle_id": work.vehicle_id,
-                "description": work.description,
-                "status": work.status,
-                "created_at": work.created_at,
-                "updated_at": work.updated_at,
-            }
-            for work in works
-        ]
+        if fields:
+            # Only select the requested columns (and the key of the embedded records)
+            works = fetch_columns(Work, fields + ["vehicle_id"] if embed and "vehicle_id" not in fields else fields)
+        else:
+            works = [dict(row) for row in db.session.execute(ALL_WORKS).mappings()]
+        return embed_work_relations(works, embed) if embed else works
     except Exception as e:
         logger.error(f"Error fetching all works: {e}")
         return {"error": "Internal Server Error"}
 
-def get_work(work_id):
+def get_work(work_id, fields=None, embed=None):
     """
     Retrieve a work by ID.
     :param work_id: The ID of the work to retrieve.
+    :param fields: Optional list of column names to select (sparse fieldset).
+    :param embed: Optional list of related records to include (see WORK_EMBEDS).
     :return: Dictionary containing work data or None if not found.
     """
     try:
-        work = Work.query.get(work_id)
-        if not work:
-            return None
-        return {
-            "work_id": work.work_id,
-            "vehicle_id": work.vehicle_id,
-            "description": work.description,
-            "status": work.status,
-            "created_at": work.created_at,
-            "updated_at": work.updated_at,
-        }
+        if fields:
+            # Only select the requested columns (and the key of the embedded records)
+            rows = fetch_columns(Work, fields + ["vehicle_id"] if embed and "vehicle_id" not in fields else fields, Work.work_id == work_id)
+            work = rows[0] if rows else None
+        else:
+            row = db.session.execute(WORK_BY_ID, {"identity": work_id}).mappings().first()
+            work = dict(row) if row else None
+        if work and embed:
+            embed_work_relations([work], embed)
+        return work
     except Exception as e:
         logger.error(f"Error fetching work {work_id}: {e}")
         return {"error": "Internal Server Error"}
 
+def embed_work_relations(works, embeds):
+    """
+    Attach the related records requested with ?embed= to works, with one query per related model
+    (e.g. a list of works with their vehicles and clients takes three queries in total).
+    :param works: List of work dictionaries (they must include vehicle_id).
+    :param embeds: Names of the relations to embed ("vehicle", "vehicle.client").
+    :return: list: The works.
+    """
+    if "vehicle" in embeds:
+        vehicles = embed_rows(works, "vehicle", "vehicle_id", get_loader(Vehicle, VEHICLE_COLUMNS))
+        embed_vehicle_relations(vehicles, [path.split(".", 1)[1] for path in embeds if path.startswith("vehicle.")])
+    return works
+
 def create_work(vehicle_id, description):
     """
     Create a new work.
     :param vehicle_id: ID of the vehicle being repaired.
     :param description: Description of the work.
     :return: Dictionary containing the newly created work's data.
+    :raises BadRequest: If the vehicle does not exist.
     """
     try:
+        check_reference(Vehicle, vehicle_id)
         work = Work(vehicle_id=vehicle_id, description=description)
         db.session.add(work)
+        db.session.flush()
+        events = [work_event(work.work_id, "created", work.status)]
+        record_work_events(events)
+        queue_work_webhooks(events)
         db.session.commit()
         return {
             "work_id": work.work_id,
@@ -66,29 +101,42 @@ def create_work(vehicle_id, description):
             "status": work.status,
             "created_at": work.created_at,
             "updated_at": work.updated_at,
+            "version": work.version,
         }
+    except BadRequest:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error creating work: {e}")
         return {"error": "Internal Server Error"}
 
-def update_work(work_id, status, description=None):
+def update_work(work_id, status, description=None, expected_version=None):
     """
     Update an existing work.
     :param work_id: ID of the work to update.
     :param status: New status of the work.
     :param description: Updated description (optional).
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
     :return: Dictionary containing the updated work's data.
     """
     try:
-        work = Work.query.get(work_id)
+        work = db.session.get(Work, work_id)
         if not work:
             return None
+        check_version(work, expected_version)
 
+        events = []
+        if status != work.status:
+            events.append(work_event(work_id, "status_changed", status))
+        if description and description != work.description:
+            events.append(work_event(work_id, "updated", status))
         work.status = status
         if description:
             work.description = description
 
+        record_work_events(events)
+        queue_work_webhooks(events)
         db.session.commit()
         return {
             "work_id": work.work_id,
@@ -97,25 +145,93 @@ def update_work(work_id, status, description=None):
             "status": work.status,
             "created_at": work.created_at,
             "updated_at": work.updated_at,
+            "version": work.version,
         }
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the UPDATE
+        db.session.rollback()
+        raise Conflict(f"Work with ID {work_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error updating work {work_id}: {e}")
         return {"error": "Internal Server Error"}
 
-def delete_work(work_id):
+def patch_work(work_id, changes, expected_version=None):
+    """
+    Partially update a work with a single UPDATE ... RETURNING statement (no prior SELECT),
+    preceded by a conditional UPDATE of the status when one is sent, so that the
+    status_changed event is only recorded when the status actually changes.
+    Only the given fields change; null clears a field.
+    :param work_id: The ID of the work to update.
+    :param changes: Dictionary of the fields to change.
+    :param expected_version: Version the changes are based on (If-Match); None skips the check.
+    :return: dict: The updated work's information, or None if not found.
+    """
+    try:
+        if changes.get("vehicle_id") is not None:
+            check_reference(Vehicle, changes["vehicle_id"])
+        # Set the status first, and only if it differs: a repeated status is not an event
+        status_changed = "status" in changes and set_if_changed(Work, work_id, "status", changes["status"])
+        work = update_columns(Work, work_id, changes, WORK_COLUMNS, expected_version)
+        if work:
+            events = [work_event(work_id, "status_changed", work["status"])] if status_changed else []
+            if changes.keys() - {"status"}:
+                events.append(work_event(work_id, "updated", work["status"]))
+            record_work_events(events)
+            queue_work_webhooks(events)
+        db.session.commit()
+        return work
+    except (BadRequest, Conflict):
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        raise Conflict(f"The changes violate a constraint: {e.orig}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error patching work {work_id}: {e}")
+        return {"error": "Internal Server Error"}
+
+def delete_work(work_id, expected_version=None):
     """
-    Delete a work.
+    Soft-delete a work (flag it with deleted_at).
     :param work_id: The ID of the work to delete.
+    :param expected_version: Version the deletion is based on (If-Match); None skips the check.
     :return: True if deletion was successful, False otherwise.
     """
     try:
-        work = Work.query.get(work_id)
+        work = db.session.get(Work, work_id)
         if not work:
             return None
-        db.session.delete(work)
+        check_version(work, expected_version)
+        # Soft delete: the row is kept for history and hidden from queries
+        work.deleted_at = db.func.now()
+        record_work_events([work_event(work_id, "deleted", work.status)])
         db.session.commit()
         return True
+    except Conflict:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        # Another request committed a change between the read and the soft delete
+        db.session.rollback()
+        raise Conflict(f"Work with ID {work_id} was modified by another request. Reload it and try again.")
     except Exception as e:
         logger.error(f"Error deleting work {work_id}: {e}")
-        return {"error": "Internal Server Error"}
\ No newline at end of file
+        return {"error": "Internal Server Error"}
+
+
+@register_task("export_works")
+def export_works():
+    """
+    Background task dumping all works.
+    :return: list: A list of dictionaries containing information about all works.
+    :raises RuntimeError: If the works could not be read, so that the job fails (and is retried).
+    """
+    works = get_all_works()
+    if isinstance(works, dict) and "error" in works:
+        raise RuntimeError("Error fetching the works; see the application log.")
+    return works
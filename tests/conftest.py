@@ -0,0 +1,69 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Allow running the tests with `python -m pytest` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from models.employee import Employee  # noqa: E402
+from services.auth_service import login  # noqa: E402
+from utils.database import db  # noqa: E402
+from utils.security import hash_password  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Factory of applications bound to a SQLite database, a throw-away one by default.
+    Jobs run inline and webhooks are not sent, so the tests see the queued rows.
+    """
+    apps = []
+
+    def make_app(path=None):
+        class TestConfig(Config):
+            SECRET_KEY = "test-secret"
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{path or tmp_path / 'test.db'}"
+            JOB_EXECUTOR = "inline"
+            WEBHOOK_DISPATCHER = "off"
+            RATE_LIMIT_ENABLED = False
+
+        apps.append(create_app(TestConfig))
+        return apps[-1]
+
+    yield make_app
+    for app in apps:
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    """
+    Application bound to a throw-away SQLite database with every table created.
+    """
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """
+    Test client sending the token of an admin with every request.
+    """
+    with app.test_request_context():
+        db.session.add(Employee(
+            name="Admin", email="admin@example.com", phone="", role="admin",
+            hired_date=date(2024, 1, 1), password_hash=hash_password("password")
+        ))
+        db.session.commit()
+        token = login("admin@example.com", "password")["access_token"]
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
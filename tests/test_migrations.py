@@ -0,0 +1,82 @@
+import os
+import shutil
+import sqlite3
+
+from sqlalchemy import text
+
+from utils.database import db
+from utils.migrations import ROOT, compare_schema, has_changes, import_models, upgrade
+
+# Schema of the former scripts.sql, which databases were created from before the migrations
+LEGACY_SCHEMA = """
+CREATE TABLE client (
+    client_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    phone TEXT,
+    address TEXT,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+);
+CREATE TABLE employee (
+    employee_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    phone TEXT,
+    role TEXT CHECK (role IN ('mechanic', 'manager', 'admin')) DEFAULT 'mechanic',
+    hired_date DATE NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+);
+"""
+
+
+def upgrade_and_compare(app):
+    """
+    Apply every migration, then compare each database with the models.
+    """
+    with app.app_context():
+        upgrade(db.engines, pause=0)
+        import_models()
+        for bind, engine in db.engines.items():
+            others = {name for key, metadata in db.metadatas.items() if key != bind for name in metadata.tables}
+            assert not has_changes(compare_schema(engine, db.metadatas[bind], others))
+
+
+def test_upgrade_adopts_a_database_created_from_scripts_sql(make_app, tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript(LEGACY_SCHEMA)
+        with open(os.path.join(ROOT, "scripts.sql"), encoding="utf-8") as script:
+            connection.executescript(script.read())
+        connection.execute("INSERT INTO client (name, email) VALUES ('Sem Morada', 'sem.morada@example.com')")
+    app = make_app(path)
+
+    upgrade_and_compare(app)
+
+    with app.app_context():
+        clients = db.session.execute(text("SELECT name, phone, address, tenant_id, version FROM client")).all()
+        assert len(clients) == 6
+        assert ("Sem Morada", "", "", 1, 1) in clients
+        employees = db.session.execute(text("SELECT email, role FROM employee ORDER BY employee_id")).all()
+        assert employees[1] == ("ana.costa@example.com", "manager")
+        assert db.session.execute(text("SELECT count(*) FROM client WHERE name_key IS NULL")).scalar() == 0
+
+
+def test_upgrade_adopts_the_committed_database(make_app, tmp_path):
+    path = tmp_path / "app.db"
+    shutil.copyfile(os.path.join(ROOT, "instance", "app.db"), path)
+    with sqlite3.connect(path) as connection:
+        works = connection.execute("SELECT work_id, vehicle_id, description, status FROM work ORDER BY work_id").fetchall()
+    app = make_app(path)
+
+    upgrade_and_compare(app)
+
+    with app.app_context():
+        upgraded = db.session.execute(
+            text("SELECT work_id, vehicle_id, description, status FROM work ORDER BY work_id")
+        ).all()
+        assert [tuple(row) for row in upgraded] == works
+        assert upgrade(db.engines, pause=0) == []
+
+
+def test_upgrade_creates_an_empty_database(make_app):
+    upgrade_and_compare(make_app())
@@ -0,0 +1,45 @@
+from models.webhook import WebhookDelivery, WebhookSubscription
+from utils.database import db
+
+
+def create_work(app, client):
+    client_id = client.post("/api/client/", json={
+        "name": "Ana", "email": "ana@example.com", "phone": "912345678", "address": "Rua A"
+    }).json["client_id"]
+    vehicle_id = client.post("/api/vehicle/", json={
+        "client_id": client_id, "license_plate": "AA-00-AA", "brand": "Fiat", "model": "Punto", "year": 2010
+    }).json["vehicle_id"]
+    with app.test_request_context():
+        db.session.add(WebhookSubscription(client_id=client_id, url="https://hooks.example.com/", secret="s"))
+        db.session.commit()
+    return client.post("/api/work/", json={"vehicle_id": vehicle_id, "description": "Oil change"}).json["work_id"]
+
+
+def status_changes(client, work_id):
+    events = client.get(f"/api/work/{work_id}/timeline").json["events"]
+    return [event for event in events if event["event"] == "status_changed"]
+
+
+def test_patching_the_same_status_twice_records_one_event(app, client):
+    work_id = create_work(app, client)
+    with app.test_request_context():
+        deliveries = db.session.query(WebhookDelivery).count()
+
+    for _ in range(2):
+        response = client.patch(f"/api/work/{work_id}", json={"status": "in_progress"})
+        assert response.status_code == 200
+
+    assert len(status_changes(client, work_id)) == 1
+    with app.test_request_context():
+        assert db.session.query(WebhookDelivery).count() == deliveries + 1
+
+
+def test_patching_other_fields_records_no_status_change(app, client):
+    work_id = create_work(app, client)
+    status = client.get(f"/api/work/{work_id}").json["status"]
+
+    response = client.patch(f"/api/work/{work_id}", json={"status": status, "description": "Oil and filter"})
+    assert response.status_code == 200
+    assert response.json["version"] == 2
+
+    assert status_changes(client, work_id) == []
@@ -0,0 +1,232 @@
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.exceptions import Forbidden, Unauthorized
+
+# Roles allowed to run administrative operations (jobs, imports, webhooks, merges)
+MANAGEMENT_ROLES = ("admin", "manager")
+
+# Paths that can be reached without a token (login and the Swagger UI)
+PUBLIC_PATH_PREFIXES = ("/api/auth/login", "/api/docs", "/api/swagger.json", "/swaggerui/", "/api/health/")
+
+
+class TokenCache:
+    """
+    Bounded cache of decoded token claims, keyed by a SHA-256 digest of the token.
+
+    Verifying the signature of a token costs an HMAC; a cache hit costs one dict
+    lookup. Reads take no lock: the dict is only mutated under the lock and
+    readers tolerate entries disappearing between the lookup and the expiry check.
+    Keying by digest means the raw token is never compared with ==.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key):
+        claims = self._entries.get(key)
+        if claims is None or claims["exp"] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return claims
+
+    def set(self, key, claims):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries first, then the oldest half if still full
+                now = time.time()
+                self._entries = {k: v for k, v in self._entries.items() if v["exp"] > now}
+                if len(self._entries) >= self.max_entries:
+                    keep = list(self._entries.items())[len(self._entries) // 2:]
+                    self._entries = dict(keep)
+            self._entries[key] = claims
+
+    def discard_jti(self, jti):
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if v["jti"] != jti}
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class RevocationList:
+    """
+    In-process set of revoked token ids, refreshed from the revoked_token table
+    at most every AUTH_REVOCATION_REFRESH seconds so that revocations made by
+    other workers are picked up without a query per request. Ids are forgotten
+    once their token has expired, since expired tokens are rejected anyway.
+    """
+
+    def __init__(self, refresh_interval=5.0):
+        self.refresh_interval = refresh_interval
+        self._revoked = {}  # Token id -> expiry (Unix time)
+        self._loaded_until = None  # revoked_at of the newest row seen
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires):
+        self._revoked[jti] = expires
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return jti in self._revoked
+
+    def refresh(self):
+        # Imported here to keep utils free of model imports at load time
+        from services.auth_service import load_revoked_tokens
+
+        if not self._lock.acquire(blocking=False):
+            return  # Another thread is already refreshing
+        try:
+            revoked, newest = load_revoked_tokens(self._loaded_until)
+            self._revoked.update(revoked)
+            now = time.time()
+            for jti, expires in list(self._revoked.items()):
+                if expires <= now:
+                    self._revoked.pop(jti, None)
+            self._loaded_until = newest or self._loaded_until
+            self._next_refresh = time.monotonic() + self.refresh_interval
+        finally:
+            self._lock.release()
+
+
+def _serializer(app):
+    secret = app.config.get("SECRET_KEY")
+    if not secret:
+        raise RuntimeError("SECRET_KEY must be set to issue or verify access tokens.")
+    return URLSafeTimedSerializer(secret, salt="garage-api-token", signer_kwargs={"digest_method": hashlib.sha256})
+
+
+def issue_token(employee):
+    """
+    Issue a signed access token for an employee.
+    :param employee: The authenticated Employee instance.
+    :return: tuple: (token, claims)
+    """
+    app = current_app._get_current_object()
+    now = int(time.time())
+    claims = {
+        "sub": employee.employee_id,
+        "role": employee.role,
+        "tenant": employee.tenant_id,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + app.config["AUTH_TOKEN_TTL"],
+    }
+    return _serializer(app).dumps(claims), claims
+
+
+def verify_token(token):
+    """
+    Verify a token and return its claims, using the in-process claims cache.
+    The signature is checked in constant time (HMAC-SHA256 with hmac.compare_digest).
+    :param token: The bearer token sent by the client.
+    :return: dict: The token claims.
+    :raises Unauthorized: If the token is invalid, expired or revoked.
+    """
+    app = current_app._get_current_object()
+    cache = app.extensions["auth_token_cache"]
+    key = TokenCache.key(token)
+    claims = cache.get(key)
+    if claims is None:
+        try:
+            claims = _serializer(app).loads(token, max_age=app.config["AUTH_TOKEN_TTL"])
+        except SignatureExpired:
+            raise Unauthorized("The access token has expired.")
+        except BadSignature:
+            raise Unauthorized("Invalid access token.")
+        if claims.get("exp", 0) <= time.time():
+            raise Unauthorized("The access token has expired.")
+        cache.set(key, claims)
+
+    if app.extensions["auth_revocation_list"].is_revoked(claims["jti"]):
+        raise Unauthorized("The access token has been revoked.")
+    return claims
+
+
+def revoke_claims(claims):
+    """
+    Forget a revoked token in this process (the caller persists the revocation).
+    :param claims: Claims of the revoked token.
+    """
+    app = current_app._get_current_object()
+    app.extensions["auth_revocation_list"].add(claims["jti"], claims["exp"])
+    app.extensions["auth_token_cache"].discard_jti(claims["jti"])
+
+
+def current_employee():
+    """
+    Claims of the employee authenticated for the current request, or None.
+    """
+    return g.get("current_employee")
+
+
+def roles_required(*roles):
+    """
+    Decorator restricting a resource method to authenticated employees with one of the given roles.
+    It applies even when AUTH_REQUIRED is disabled.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            claims = current_employee()
+            if claims is None:
+                raise Unauthorized("Authentication required.")
+            if roles and claims["role"] not in roles:
+                raise Forbidden("You are not allowed to perform this operation.")
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_auth(app):
+    """
+    Register token authentication for the Flask application.
+    Every API request carrying an `Authorization: Bearer <token>` header is
+    authenticated; requests without a token are rejected when AUTH_REQUIRED is set.
+    """
+    app.extensions["auth_token_cache"] = TokenCache(app.config["AUTH_CACHE_SIZE"])
+    app.extensions["auth_revocation_list"] = RevocationList(app.config["AUTH_REVOCATION_REFRESH"])
+
+    def unauthorized(message):
+        response = jsonify({"status": "error", "message": message})
+        response.status_code = 401
+        response.headers["WWW-Authenticate"] = 'Bearer realm="garage-api"'
+        return response
+
+    @app.before_request
+    def authenticate_request():
+        g.current_employee = None
+        if not request.path.startswith("/api/") or request.path.startswith(PUBLIC_PATH_PREFIXES):
+            return None
+
+        header = request.headers.get("Authorization", "")
+        if not header:
+            return unauthorized("Authentication required.") if app.config["AUTH_REQUIRED"] else None
+
+        scheme, _, token = header.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return unauthorized("Expected an 'Authorization: Bearer <token>' header.")
+        try:
+            g.current_employee = verify_token(token.strip())
+        except Unauthorized as e:
+            return unauthorized(e.description)
+        return None
@@ -0,0 +1,210 @@
+import gzip
+import hashlib
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+
+# Optional encoders: brotli and zstd are only offered when their library is installed
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# MIME types worth compressing (JSON, text and CSV compress very well)
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/csv",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+}
+
+
+def available_encodings():
+    """
+    List the content encodings that can be produced with the installed libraries.
+    :return: List of encoding names.
+    """
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def choose_encoding(accept_encodings, preferred):
+    """
+    Negotiate the content encoding with the client.
+    The encoding with the highest client quality wins; ties are broken by the server preference order.
+
+    :param accept_encodings: Parsed Accept-Encoding header (werkzeug Accept object)
+    :param preferred: Encodings allowed by the server, most preferred first
+    :return: The chosen encoding, or None to send the body uncompressed
+    """
+    installed = available_encodings()
+    best, best_quality = None, 0
+    for encoding in preferred:
+        if encoding not in installed:
+            continue
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, config):
+    """
+    Compress a complete body.
+    :param data: Bytes to compress
+    :param encoding: "gzip", "br" or "zstd"
+    :param config: Application configuration holding the compression levels
+    :return: Compressed bytes
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=config["COMPRESSION_BROTLI_QUALITY"])
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=config["COMPRESSION_ZSTD_LEVEL"]).compress(data)
+    return gzip.compress(data, compresslevel=config["COMPRESSION_GZIP_LEVEL"], mtime=0)
+
+
+def stream_compress(chunks, encoding, config):
+    """
+    Compress a streamed body chunk by chunk, without buffering it.
+    :param chunks: Iterable of byte chunks
+    :param encoding: "gzip", "br" or "zstd"
+    :param config: Application configuration holding the compression levels
+    :return: Generator of compressed chunks
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESSION_BROTLI_QUALITY"])
+        process, finish = compressor.process, compressor.finish
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=config["COMPRESSION_ZSTD_LEVEL"]).compressobj()
+        process, finish = compressor.compress, compressor.flush
+    else:
+        # wbits=31 produces a gzip container
+        compressor = zlib.compressobj(config["COMPRESSION_GZIP_LEVEL"], zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        compressed = process(chunk)
+        if compressed:
+            yield compressed
+    yield finish()
+
+
+class CompressedBodyCache:
+    """
+    Thread-safe LRU cache of compressed bodies, keyed by a digest of the
+    uncompressed body and the encoding. Repeated GETs returning the same
+    payload reuse the compressed bytes instead of compressing them again.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data, encoding):
+        return hashlib.blake2b(data, digest_size=16).digest(), encoding
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+def register_compression(app):
+    """
+    Register the response compression middleware for the Flask application.
+    Responses are compressed with the best encoding accepted by the client
+    (see the COMPRESSION_* settings in Config).
+    """
+    cache = CompressedBodyCache(app.config["COMPRESSION_CACHE_SIZE"], app.config["COMPRESSION_CACHE_BYTES"])
+    app.extensions["compression_cache"] = cache
+
+    @app.after_request
+    def compress_response(response):
+        config = app.config
+        if not config["COMPRESSION_ENABLED"]:
+            return response
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings, config["COMPRESSION_ALGORITHMS"])
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Unknown length: compress on the fly while the body is sent
+            response.response = stream_compress(response.iter_encoded(), encoding, config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESSION_MIN_SIZE"]:
+                return response
+            if request.method == "GET" and cache.max_entries:
+                key = cache.key(data, encoding)
+                compressed = cache.get(key)
+                if compressed is None:
+                    compressed = compress(data, encoding, config)
+                    cache.set(key, compressed)
+            else:
+                compressed = compress(data, encoding, config)
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = encoding
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            # The compressed body is a different representation of the resource
+            response.headers["ETag"] = f"W/{etag}"
+        return response
@@ -1,7 +1,10 @@
 # Import the necessary modules from Flask and SQLAlchemy
-from flask import Flask
+from functools import lru_cache
+from flask import Flask, current_app, g
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.orm import DeclarativeBase, Session, with_loader_criteria
+from werkzeug.exceptions import BadRequest, Conflict
 
 # Base class for SQLAlchemy models. All model classes will inherit from this class.
 # This allows SQLAlchemy to recognize them as models and interact with the database.
@@ -12,3 +15,240 @@ class Base(DeclarativeBase):
 # The 'model_class=Base' argument tells SQLAlchemy that all models will inherit from the Base class
 db = SQLAlchemy(model_class=Base)
 
+
+def current_tenant_id():
+    """
+    Tenant (garage) whose rows the current application context reads and writes:
+    the tenant of the request (see utils.tenancy) or of the running job, and
+    DEFAULT_TENANT_ID otherwise (CLI commands, single-garage deployments).
+
+    :return: int: The tenant id
+    """
+    return g.get("tenant_id") or current_app.config["DEFAULT_TENANT_ID"]
+
+
+class TenantMixin:
+    """
+    Mixin for models whose rows belong to one tenant.
+    ORM statements only see the rows of the current tenant unless run with
+    execution_options(all_tenants=True); new rows get the current tenant.
+
+    Attributes:
+        tenant_id (int): The tenant (garage) the row belongs to.
+    """
+    tenant_id = db.Column(db.Integer, nullable=False, default=current_tenant_id, server_default="1")
+
+
+def tenant_criteria(table):
+    """
+    WHERE criteria restricting a Core statement on a tenant-scoped table to the current tenant.
+    The tenant is read when the statement executes, so statements built once at import stay valid.
+
+    :param table: Table with a tenant_id column
+    :return: SQL expression
+    """
+    return table.c.tenant_id == bindparam("tenant_id", callable_=current_tenant_id)
+
+
+class SoftDeleteMixin:
+    """
+    Mixin for models whose rows are flagged as deleted instead of being removed.
+    ORM queries skip flagged rows unless run with execution_options(include_deleted=True).
+
+    Attributes:
+        deleted_at (datetime): Timestamp of the deletion, null for live rows.
+    """
+    deleted_at = db.Column(db.DateTime)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _skip_deleted_rows(execute_state):
+    # Add "deleted_at IS NULL" to every ORM SELECT touching a soft-deletable model
+    if (execute_state.is_select
+            and execute_state.is_orm_statement
+            and not execute_state.is_column_load
+            and not execute_state.is_relationship_load
+            and not execute_state.execution_options.get("include_deleted", False)):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(execute_state):
+    # Add "tenant_id = :tenant" to every ORM SELECT, UPDATE and DELETE touching a tenant-scoped model
+    if ((execute_state.is_select or execute_state.is_update or execute_state.is_delete)
+            and execute_state.is_orm_statement
+            and not execute_state.is_column_load
+            and not execute_state.is_relationship_load
+            and not execute_state.execution_options.get("all_tenants", False)):
+        tenant_id = current_tenant_id()
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(TenantMixin, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+        )
+
+
+def select_rows(model, columns):
+    """
+    Build a reusable SELECT of some columns of the live rows (of the current tenant) of a model.
+    Services build their hot read statements once, at import: executing them skips
+    statement construction and the ORM layers, and their SQL is compiled only once.
+
+    :param model: SQLAlchemy model class
+    :param columns: Names of the columns to select
+    :return: Select statement returning one mapping per row
+    """
+    table = model.__table__
+    statement = select(*[table.c[name] for name in columns])
+    if "tenant_id" in table.c:
+        statement = statement.where(tenant_criteria(table))
+    if "deleted_at" in table.c:
+        statement = statement.where(table.c.deleted_at.is_(None))
+    return statement
+
+
+def select_row(model, columns):
+    """
+    Build a reusable SELECT of one live row by primary key, bound to the "identity" parameter.
+
+    :param model: SQLAlchemy model class
+    :param columns: Names of the columns to select
+    :return: Select statement, executed with {"identity": <primary key>}
+    """
+    pk = list(model.__table__.primary_key.columns)[0]
+    return select_rows(model, columns).where(pk == bindparam("identity"))
+
+
+@lru_cache(maxsize=256)
+def _columns_statement(model, fields):
+    # Built once per (model, fieldset); ORM attributes, so soft-deleted rows are skipped
+    return select(*[getattr(model, name) for name in fields])
+
+
+def fetch_columns(model, fields, *criteria):
+    """
+    Fetch only the given columns of a model, without hydrating ORM objects.
+    Used to serve sparse fieldsets (`?fields=`) with a narrowed SELECT.
+
+    :param model: SQLAlchemy model class
+    :param fields: Names of the columns to select
+    :param criteria: Optional WHERE criteria
+    :return: List of dictionaries keyed by column name
+    """
+    statement = _columns_statement(model, tuple(fields)).where(*criteria)
+    return [dict(row) for row in db.session.execute(statement).mappings()]
+
+
+def check_reference(model, identity):
+    """
+    Check that a row referenced by a foreign key exists and is visible to the current
+    tenant. The database only checks that the row exists, whatever its tenant or
+    soft-delete state; the ORM select below is scoped like every read.
+
+    :param model: SQLAlchemy model class of the referenced row
+    :param identity: Primary key value of the row
+    :raises BadRequest: If the row does not exist, is deleted or belongs to another tenant
+    """
+    pk = getattr(model, model.__mapper__.primary_key[0].key)
+    if db.session.execute(select(pk).where(pk == identity)).first() is None:
+        raise BadRequest(f"{model.__name__} with ID {identity} not found.")
+
+
+def check_version(instance, expected_version):
+    """
+    Optimistic concurrency check before modifying a versioned instance.
+    The UPDATE/DELETE itself is also guarded by the version (version_id_col), so an
+    edit committed between this check and the flush raises StaleDataError instead.
+
+    :param instance: Loaded model instance with a `version` column
+    :param expected_version: Version the client based its changes on (None skips the check)
+    :raises Conflict: If the instance has been modified since that version
+    """
+    if expected_version is not None and instance.version != expected_version:
+        raise Conflict(
+            f"{type(instance).__name__} has been modified (version {instance.version}, expected {expected_version}). "
+            "Reload it and try again."
+        )
+
+
+def _row_criteria(table, identity):
+    """
+    WHERE criteria selecting one changeable row: by primary key, in the current
+    tenant, and not soft-deleted.
+    """
+    pk = list(table.primary_key.columns)[0]
+    criteria = [pk == identity]
+    if "tenant_id" in table.c:
+        criteria.append(table.c.tenant_id == current_tenant_id())
+    if "deleted_at" in table.c:
+        criteria.append(table.c.deleted_at.is_(None))  # Soft-deleted rows cannot be changed
+    return criteria
+
+
+def set_if_changed(model, identity, name, value):
+    """
+    Set one column of one row only if it holds a different value, and tell whether it did.
+    The conditional UPDATE takes the write lock, so of two requests setting the same
+    value only the first one sees a change. The caller commits.
+
+    :param model: SQLAlchemy model class
+    :param identity: Primary key value of the row
+    :param name: Name of the column
+    :param value: New value of the column
+    :return: True if the value changed, False if it was already set or the row does not exist
+    :raises BadRequest: If a non-nullable column would be set to null
+    """
+    table = model.__table__
+    column = table.c[name]
+    if value is None and not column.nullable:
+        raise BadRequest(f"Field '{name}' cannot be null.")
+    pk = list(table.primary_key.columns)[0]
+    statement = (
+        update(table)
+        .where(*_row_criteria(table, identity), column.is_distinct_from(value))
+        .values({name: value})
+        .returning(pk)
+    )
+    return db.session.execute(statement).first() is not None
+
+
+def update_columns(model, identity, changes, returning, expected_version=None):
+    """
+    Update some columns of one row with a single UPDATE ... RETURNING statement,
+    without loading the row first. The version column (if any) is incremented in
+    the same statement, and matched against expected_version when one is given.
+    The caller commits.
+
+    :param model: SQLAlchemy model class
+    :param identity: Primary key value of the row
+    :param changes: Dictionary of column names and new values
+    :param returning: Names of the columns to return
+    :param expected_version: Version the changes are based on (None skips the check)
+    :return: Dictionary of the returned columns, or None if the row does not exist
+    :raises BadRequest: If a non-nullable column would be set to null
+    :raises Conflict: If the row has been modified since expected_version
+    """
+    table = model.__table__
+    for name, value in changes.items():
+        if value is None and not table.c[name].nullable:
+            raise BadRequest(f"Field '{name}' cannot be null.")
+
+    values = dict(changes)
+    row_criteria = _row_criteria(table, identity)
+    criteria = list(row_criteria)
+    if "version" in table.c:
+        values["version"] = table.c.version + 1
+        if expected_version is not None:
+            criteria.append(table.c.version == expected_version)
+
+    statement = update(table).where(*criteria).values(values).returning(*[table.c[name] for name in returning])
+    row = db.session.execute(statement).mappings().first()
+    if row is None and expected_version is not None:
+        # Only on failure: tell a missing row (404) from a stale version (409)
+        current = db.session.execute(select(table.c.version).where(*row_criteria)).scalar()
+        if current is not None:
+            raise Conflict(
+                f"{model.__name__} has been modified (version {current}, expected {expected_version}). "
+                "Reload it and try again."
+            )
+    return dict(row) if row else None
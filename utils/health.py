@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from sqlalchemy import event, text
+from utils.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class SlowQueryCounter:
+    """
+    Counts the SQL statements slower than a threshold over a sliding time window.
+    Statements are timed with cursor events on the engine.
+    """
+
+    def __init__(self, threshold_ms=200, window_seconds=300):
+        self.threshold = threshold_ms / 1000
+        self.window = window_seconds
+        self._times = deque(maxlen=10000)  # Completion times of the recent slow statements
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def watch(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        if elapsed >= self.threshold:
+            with self._lock:
+                self._times.append(time.monotonic())
+                self.total += 1
+            logger.warning(f"Slow query ({elapsed * 1000:.0f} ms): {' '.join(statement.split())[:500]}")
+
+    def stats(self):
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._times and self._times[0] < cutoff:
+                self._times.popleft()
+            recent = len(self._times)
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "window_seconds": self.window,
+            "recent": recent,
+            "total": self.total,
+        }
+
+
+def pool_stats(engine):
+    """
+    Connection pool usage of an engine.
+    :param engine: SQLAlchemy engine
+    :return: dict: Pool class, size, checked in and out connections and overflow
+             (the counters a pool does not keep are omitted).
+    """
+    pool = engine.pool
+    stats = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
+
+class ReadinessCheck:
+    """
+    Database readiness probe: a `SELECT 1` bounded by a timeout.
+
+    The query runs on a single background thread, so a hung database ties up one
+    thread instead of every probe, and the result is reused for `cache_seconds`:
+    many probes scraping every second still cost about one query per period.
+    """
+
+    def __init__(self, engine, timeout=2.0, cache_seconds=1.0):
+        self.engine = engine
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readiness")
+        self._pending = None
+        self._result = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _ping(self):
+        started = time.perf_counter()
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    def check(self):
+        """
+        :return: dict: "status" ("ok", "timeout" or "error"), the latency or error, and when it was checked.
+        """
+        # The lock only guards the cached result and the pending query; probes wait
+        # for the query outside of it, so a slow database does not queue them one by one
+        with self._lock:
+            if self._result is not None and time.monotonic() < self._expires:
+                return self._result
+            if self._pending is None:
+                self._pending = self._executor.submit(self._ping)
+            pending = self._pending
+        try:
+            result = {"status": "ok", "latency_ms": pending.result(timeout=self.timeout)}
+        except FutureTimeout:
+            # Still running: later probes wait on the same query instead of starting another one
+            result = {"status": "timeout", "error": f"No answer within {self.timeout} seconds."}
+        except Exception as e:
+            logger.error(f"Database readiness check failed: {e}")
+            result = {"status": "error", "error": str(e)}
+        result["checked_at"] = datetime.utcnow()
+        with self._lock:
+            if self._pending is pending and pending.done():
+                self._pending = None
+            self._result, self._expires = result, time.monotonic() + self.cache_seconds
+        return result
+
+
+def register_health(app):
+    """
+    Register the state inspected by the health endpoints (see api.health):
+    the database readiness check and the slow query counter of the main engine.
+    """
+    with app.app_context():
+        engine = db.engine
+    counter = SlowQueryCounter(app.config["DB_SLOW_QUERY_MS"], app.config["DB_SLOW_QUERY_WINDOW"])
+    counter.watch(engine)
+    app.extensions["health"] = {
+        "engine": engine,
+        "readiness": ReadinessCheck(engine, app.config["HEALTH_DB_TIMEOUT"], app.config["HEALTH_CACHE_SECONDS"]),
+        "slow_queries": counter,
+    }
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, g, jsonify, request
+from utils.auth import PUBLIC_PATH_PREFIXES
+from utils.database import db, current_tenant_id
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU cache of the responses stored for idempotency keys.
+
+    The idempotency_key table is the source of truth shared by every worker; this
+    cache saves its lookup when a client retries on the worker that served it.
+    Only finished responses are cached, and each entry expires with its key.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, response, ttl):
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _error(status, message):
+    response = jsonify({"status": "error", "message": message})
+    response.status_code = status
+    return response
+
+
+def _replay(stored):
+    response = current_app.response_class(stored["body"], status=stored["status_code"], content_type=stored["content_type"])
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def register_idempotency(app):
+    """
+    Register Idempotency-Key support for POST requests to the API.
+
+    The first request with a given key (per employee, method and path) claims it in the
+    idempotency_key table, runs, and stores its response. Retries with the same key and
+    body get the stored response back (with an Idempotent-Replayed header) without
+    running the request again; a retry arriving while the first request still runs gets
+    a 409, and a key reused with another body a 422. Responses with a 5xx status are not
+    stored, so the request can be retried. Keys expire after IDEMPOTENCY_TTL seconds.
+    """
+    # Imported here to keep utils free of model imports at load time
+    from services.idempotency_service import load_stored_response, release_key, reserve_key, save_response
+
+    cache = ResponseCache(app.config["IDEMPOTENCY_CACHE_SIZE"])
+    app.extensions["idempotency_cache"] = cache
+    ttl = app.config["IDEMPOTENCY_TTL"]
+
+    def check_stored(stored, request_hash):
+        if stored["request_hash"] != request_hash:
+            return _error(422, "This Idempotency-Key was already used with a different request.")
+        if stored["status_code"] is None:
+            response = _error(409, "A request with this Idempotency-Key is still being processed.")
+            response.headers["Retry-After"] = "1"
+            return response
+        return _replay(stored)
+
+    @app.before_request
+    def replay_idempotent_request():
+        g.idempotency_key = None
+        if (not app.config["IDEMPOTENCY_ENABLED"] or request.method != "POST"
+                or not request.path.startswith("/api/") or request.path.startswith(PUBLIC_PATH_PREFIXES)):
+            return None
+        header = request.headers.get("Idempotency-Key")
+        if not header:
+            return None
+        if len(header) > 255:
+            return _error(400, "The Idempotency-Key header must be at most 255 characters long.")
+
+        employee = g.get("current_employee")
+        caller = f"tenant:{current_tenant_id()}:" + (f"employee:{employee['sub']}" if employee else "anonymous")
+        key = hashlib.sha256(f"{caller}\n{request.method}\n{request.path}\n{header}".encode()).hexdigest()
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        stored = cache.get(key)
+        if stored is not None:
+            return check_stored(stored, request_hash)
+        try:
+            stored = load_stored_response(key)
+            if stored is None and reserve_key(key, request_hash, ttl):
+                g.idempotency_key = key
+                return None
+            stored = stored or load_stored_response(key)
+        except Exception as e:
+            # Without the store the request still runs, like a request without a key
+            logger.error(f"Error reading idempotency key: {e}")
+            return None
+        if stored is None:
+            return _error(409, "A request with this Idempotency-Key is still being processed.")
+        if stored["status_code"] is not None:
+            cache.set(key, stored, (stored["expires_at"] - datetime.utcnow()).total_seconds())
+        return check_stored(stored, request_hash)
+
+    @app.after_request
+    def store_idempotent_response(response):
+        # Registered after compression, so it runs first and stores the uncompressed body
+        key = g.get("idempotency_key")
+        if key is None:
+            return response
+        g.idempotency_key = None
+        try:
+            if response.status_code >= 500:
+                release_key(key)
+                return response
+            body = response.get_data()
+            save_response(key, response.status_code, response.content_type, body)
+            cache.set(key, {
+                "request_hash": hashlib.sha256(request.get_data()).hexdigest(),
+                "status_code": response.status_code,
+                "content_type": response.content_type,
+                "body": body,
+            }, ttl)
+        except Exception as e:
+            logger.error(f"Error storing idempotent response: {e}")
+        return response
+
+    @app.teardown_request
+    def release_unfinished_key(exc):
+        # The request failed before a response was produced: let a retry run it again
+        key = g.get("idempotency_key")
+        if key is not None:
+            try:
+                db.session.rollback()
+                release_key(key)
+            except Exception as e:
+                logger.error(f"Error releasing idempotency key: {e}")
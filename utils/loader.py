@@ -0,0 +1,95 @@
+from flask import g
+from sqlalchemy import bindparam
+from utils.database import db, select_rows
+
+
+class DataLoader:
+    """
+    Batches primary-key lookups of one model during a request.
+
+    Ids are collected with `prime()` and fetched together with a single
+    `WHERE id IN (...)` query the first time one of them is loaded. Rows are
+    cached, so a row referenced by many others is only read once per request.
+    """
+
+    def __init__(self, model, columns, chunk_size=500):
+        pk = list(model.__table__.primary_key.columns)[0]
+        self.statement = select_rows(model, columns).where(pk.in_(bindparam("ids", expanding=True)))
+        self.pk_name = pk.name
+        self.chunk_size = chunk_size  # Stays well below SQLite's limit of bound parameters
+        self._rows = {}  # Primary key -> row dict, or None for missing rows
+        self._pending = set()
+        self.queries = 0
+
+    def prime(self, ids):
+        """
+        Schedule ids to be fetched with the next batch.
+        """
+        self._pending.update(identity for identity in ids if identity is not None and identity not in self._rows)
+
+    def load(self, identity):
+        """
+        Get one row (a copy, safe to modify), fetching it with every pending id if needed.
+        :return: dict or None if the row does not exist
+        """
+        if identity not in self._rows:
+            self.prime([identity])
+            self._dispatch()
+        row = self._rows.get(identity)
+        return dict(row) if row is not None else None
+
+    def load_many(self, ids):
+        """
+        Get several rows with at most one query per chunk of unknown ids.
+        :return: list of dicts (None for missing rows), in the order of ids
+        """
+        ids = list(ids)
+        self.prime(ids)
+        self._dispatch()
+        return [self.load(identity) for identity in ids]
+
+    def _dispatch(self):
+        pending = sorted(self._pending)
+        self._pending.clear()
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            self._rows.update(dict.fromkeys(chunk))
+            for row in db.session.execute(self.statement, {"ids": chunk}).mappings():
+                self._rows[row[self.pk_name]] = row
+            self.queries += 1
+
+
+def get_loader(model, columns):
+    """
+    Get the DataLoader of a model for the current request (one per model and column list).
+    It lives on flask.g, so it is discarded with the application context at the end of the request.
+
+    :param model: SQLAlchemy model class
+    :param columns: Names of the columns to load
+    :return: DataLoader
+    """
+    loaders = g.setdefault("data_loaders", {})
+    key = (model, tuple(columns))
+    if key not in loaders:
+        loaders[key] = DataLoader(model, columns)
+    return loaders[key]
+
+
+def embed_rows(rows, name, key, loader):
+    """
+    Attach to each row the related row referenced by row[key], as row[name].
+    All rows are resolved with one batched query.
+
+    :param rows: List of row dicts
+    :param name: Key under which the related row is attached
+    :param key: Key of the foreign key value in each row
+    :param loader: DataLoader of the related model
+    :return: List of the attached rows (without missing ones), e.g. to embed one level deeper
+    """
+    loader.prime(row[key] for row in rows)
+    embedded = []
+    for row in rows:
+        row[name] = loader.load(row[key])
+        if row[name] is not None:
+            embedded.append(row[name])
+    return embedded
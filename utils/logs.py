@@ -0,0 +1,202 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has: anything else was passed with `extra=` and goes into the JSON record
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_lock = threading.Lock()
+_state = {"handler": None, "listener": None, "targets": []}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line:
+    {"time": ..., "level": ..., "logger": ..., "message": ..., "request_id": ..., <extra fields>}
+    """
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach the id of the current request to records, and keep only a sample of
+    the INFO and DEBUG records. The sample is drawn per request (from its id), so
+    the records of a request are either all kept or all dropped; warnings and
+    errors are always kept.
+    """
+
+    def __init__(self, sample_rate=1.0):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, sample_rate)) * 10000)
+
+    def filter(self, record):
+        request_id = g.get("request_id") if has_request_context() else None
+        record.request_id = request_id
+        if record.levelno >= logging.WARNING or self.threshold >= 10000:
+            return True
+        key = request_id or f"{record.created}{record.thread}"
+        return zlib.crc32(key.encode()) % 10000 < self.threshold
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller: records are dropped (and
+    counted) when the queue is full, and formatting is left to the listener thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve what depends on the caller (arguments, exception) and keep the rest for the formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # Wait for room: a full queue must still be drained on stop
+
+
+def _stop_listener():
+    listener = _state["listener"]
+    if listener is not None and listener._thread is not None:
+        listener.stop()  # Writes the records still queued
+
+
+def _start_listener(new_queue=False):
+    handler = _state["handler"]
+    if handler is None:
+        return
+    if new_queue:
+        # The child of a fork gets a fresh queue: the parent's may have been locked mid-operation
+        handler.queue = queue.Queue(handler.queue.maxsize)
+    _state["listener"] = _QueueListener(handler.queue, *_state["targets"], respect_handler_level=True)
+    _state["listener"].start()
+
+
+# Listener threads do not survive fork() (e.g. Gunicorn workers forked from a preloaded app)
+os.register_at_fork(
+    before=_stop_listener,
+    after_in_parent=_start_listener,
+    after_in_child=lambda: _start_listener(new_queue=True),
+)
+atexit.register(_stop_listener)
+
+
+def configure_logging(config):
+    """
+    Configure the root logger from the application configuration.
+
+    Records go to stderr (or LOG_FILE) as JSON lines (LOG_FORMAT=json) or text.
+    With LOG_ASYNC the request thread only puts records on a bounded queue and a
+    listener thread formats and writes them, so file I/O stays out of request latency.
+    Calling it again (e.g. a second application) replaces the previous configuration.
+
+    :param config: Flask configuration
+    :return: The handler attached to the root logger
+    """
+    with _lock:
+        root = logging.getLogger()
+        _stop_listener()
+        for handler in [_state["handler"], *_state["targets"]]:
+            if handler is not None:
+                root.removeHandler(handler)
+                handler.close()
+
+        if config["LOG_FILE"]:
+            target = logging.FileHandler(config["LOG_FILE"], mode="a", encoding="utf-8")
+        else:
+            target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(
+            JsonFormatter() if config["LOG_FORMAT"] == "json"
+            else logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+        )
+        _state["targets"] = [target]
+
+        if config["LOG_ASYNC"]:
+            handler = NonBlockingQueueHandler(queue.Queue(config["LOG_QUEUE_SIZE"]))
+            _state["handler"] = handler
+            _start_listener()
+        else:
+            handler = target
+            _state["handler"] = None
+        handler.addFilter(RequestContextFilter(config["LOG_SAMPLE_RATE"]))
+
+        root.addHandler(handler)
+        root.setLevel(config["LOG_LEVEL"])
+        return handler
+
+
+def register_logging(app):
+    """
+    Configure logging for the Flask application and log one access record per request
+    (method, path, status and duration) tagged with its request id. The id comes from
+    the X-Request-ID header when the client sends one, and is returned in the response.
+    """
+    configure_logging(app.config)
+    access_logger = logging.getLogger("access")
+
+    @app.before_request
+    def start_request_log():
+        g.request_started = time.perf_counter()
+        g.request_id = request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex
+
+    @app.after_request
+    def log_request(response):
+        # Registered first, so it runs after every other after_request hook (final status)
+        started = g.get("request_started")
+        if started is None:
+            return response
+        response.headers["X-Request-ID"] = g.request_id
+        if app.config["LOG_ACCESS"]:
+            access_logger.info(
+                f"{request.method} {request.path} {response.status_code}",
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                },
+            )
+        return response
@@ -0,0 +1,367 @@
+import importlib
+import importlib.util
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, func, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default location of the migration files (<version>_<slug>.py)
+MIGRATIONS_PATH = os.path.join(ROOT, "migrations")
+
+# Applied migrations, one table per database. Kept out of the models' metadata so that
+# create_all() and the generated migrations ignore it.
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("bind", String(50)),
+    Column("description", String(255)),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+_FILENAME = re.compile(r"^(\d{4})_\w+\.py$")
+
+
+def import_models():
+    """
+    Import every module of the models package, so that the metadata holds all the tables.
+    """
+    for filename in sorted(os.listdir(os.path.join(ROOT, "models"))):
+        if filename.endswith(".py") and filename != "__init__.py":
+            importlib.import_module(f"models.{filename[:-3]}")
+
+
+def load_migrations(path=MIGRATIONS_PATH):
+    """
+    Load the migration files of a directory.
+    Each file defines `upgrade(op)` and optionally `bind` (the database bind it applies to,
+    None for the main database); its version is the number the file name starts with.
+
+    :param path: Directory of the migration files
+    :return: list: The migration modules, by version
+    """
+    migrations = []
+    for filename in sorted(os.listdir(path)) if os.path.isdir(path) else []:
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        spec = importlib.util.spec_from_file_location(f"migrations.m{match.group(1)}", os.path.join(path, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.version = int(match.group(1))
+        module.bind = getattr(module, "bind", None)
+        module.description = (module.__doc__ or filename).strip().splitlines()[0]
+        migrations.append(module)
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Several migrations in {path} share a version number.")
+    return migrations
+
+
+def applied_versions(engine):
+    """
+    :param engine: Engine of the database
+    :return: set: Versions of the migrations applied to the database
+    """
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return set(connection.execute(select(schema_version.c.version)).scalars())
+
+
+class Operations:
+    """
+    Schema operations available to migrations (the `op` argument of `upgrade`).
+
+    Every operation commits on its own, so a migration never holds a lock on a table
+    for longer than one statement or one backfill batch. Operations are idempotent
+    (IF NOT EXISTS, existing columns are skipped, backfills only touch the rows their
+    condition still selects): a migration interrupted half-way can simply be run again.
+    """
+
+    def __init__(self, engine, batch_size=1000, pause=0.05):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.pause = pause
+        self.functions = {}
+
+    @contextmanager
+    def _begin(self):
+        with self.engine.begin() as connection:
+            for name, (func, arguments) in self.functions.items():
+                connection.connection.driver_connection.create_function(name, arguments, func, deterministic=True)
+            yield connection
+
+    def function(self, name, func, arguments=1):
+        """
+        Make a Python function callable from the SQL of the following operations (SQLite),
+        e.g. to backfill a column computed by the application:
+        `op.function("name_key", name_key)` then `op.backfill("client", "name_key = name_key(name)", ...)`.
+        """
+        self.functions[name] = (func, arguments)
+
+    def execute(self, sql, **params):
+        """Run one SQL statement in its own transaction."""
+        with self._begin() as connection:
+            connection.execute(text(sql), params)
+
+    def create_table(self, sql):
+        """Create a table (the statement must use CREATE TABLE IF NOT EXISTS)."""
+        self.execute(sql)
+
+    def create_index(self, sql):
+        """
+        Create an index (the statement must use CREATE INDEX IF NOT EXISTS).
+        SQLite builds an index in a single statement, which blocks writers to the
+        table until it finishes; run migrations adding indexes to large tables off-peak.
+        """
+        self.execute(sql)
+
+    def drop_index(self, name):
+        self.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def has_column(self, table, name):
+        """
+        Tell whether a table has a column, to run a step only on the databases that need it.
+        :param table: Table name
+        :param name: Column name
+        """
+        return name in {column["name"] for column in inspect(self.engine).get_columns(table)}
+
+    def add_column(self, table, column_sql):
+        """
+        Add a column unless it exists. Adding a nullable column, or one with a constant
+        default, only rewrites the schema: the existing rows are not touched.
+        :param table: Table name
+        :param column_sql: Column definition, e.g. "phone_normalized VARCHAR(20)"
+        """
+        if not self.has_column(table, column_sql.split()[0].strip('"')):
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column_sql}")
+
+    def rebuild_table(self, table, create_sql):
+        """
+        Recreate a table with a new definition, for the changes SQLite cannot make with
+        ALTER TABLE (dropping a constraint or a column, changing a type). The rows are copied
+        to `<table>__new`, which then replaces the table, and the indexes and triggers of the
+        table are recreated, all in one transaction: writers to the table wait until it ends.
+        Skipped if the table already has this definition.
+        :param table: Table name
+        :param create_sql: New CREATE TABLE statement of the table, under its own name;
+                           the columns it shares with the old table are copied, the
+                           others are dropped (with a warning).
+        """
+        new_sql, count = re.subn(rf"^\s*CREATE TABLE (IF NOT EXISTS )?{table}\b", f"CREATE TABLE {table}__new", create_sql)
+        if not count:
+            raise ValueError(f"The statement does not create the table {table}.")
+
+        def normalize(sql):
+            return re.sub(r"\s+", " ", re.sub(r'IF NOT EXISTS |"', "", sql)).strip().lower()
+
+        with self._begin() as connection:
+            # pysqlite only opens a transaction before DML: open it by hand so that the DDL is part of it
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            current = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table"), {"table": table}
+            ).scalar_one()
+            if normalize(current) == normalize(create_sql):
+                return
+            others = connection.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = :table AND sql IS NOT NULL"
+            ), {"table": table}).scalars().all()
+            old_columns = {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+            connection.exec_driver_sql(new_sql)
+            new_columns = [row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table}__new)")]
+            columns = ", ".join(column for column in new_columns if column in old_columns)
+            connection.exec_driver_sql(f"INSERT INTO {table}__new ({columns}) SELECT {columns} FROM {table}")
+            connection.exec_driver_sql(f"DROP TABLE {table}")
+            connection.exec_driver_sql(f"ALTER TABLE {table}__new RENAME TO {table}")
+            for sql in others:
+                connection.exec_driver_sql(sql)
+        dropped = sorted(old_columns - set(new_columns))
+        if dropped:
+            logger.warning(f"Rebuilt table {table} without its columns {', '.join(dropped)}")
+        else:
+            logger.info(f"Rebuilt table {table}")
+
+    def backfill(self, table, assignments, where, key="rowid", batch_size=None, **params):
+        """
+        Update the rows selected by `where`, `batch_size` rows per transaction, pausing
+        between batches so that requests can write to the table in the meantime.
+        :param table: Table name
+        :param assignments: SET clause, e.g. "email_normalized = lower(trim(email))"
+        :param where: Condition selecting the rows still to update, e.g. "email_normalized IS NULL"
+        :param key: Unique, indexed column used to walk the table in order (rowid by default)
+        :param batch_size: Rows per transaction (the migration batch size by default)
+        :param params: Bound parameters used in the assignments or the condition
+        :return: int: Number of updated rows
+        """
+        batch_size = batch_size or self.batch_size
+        find = text(f"SELECT {key} FROM {table} WHERE ({where}) AND {key} > :last_key ORDER BY {key} LIMIT :batch_size")
+        change = text(f"UPDATE {table} SET {assignments} WHERE {key} IN :keys").bindparams(bindparam("keys", expanding=True))
+        last_key, updated, started = None, 0, time.monotonic()
+        reported = started
+        while True:
+            with self._begin() as connection:
+                if last_key is None:
+                    first = text(f"SELECT {key} FROM {table} WHERE ({where}) ORDER BY {key} LIMIT :batch_size")
+                    keys = connection.execute(first, {**params, "batch_size": batch_size}).scalars().all()
+                else:
+                    keys = connection.execute(find, {**params, "last_key": last_key, "batch_size": batch_size}).scalars().all()
+                if not keys:
+                    break
+                connection.execute(change, {**params, "keys": keys})
+            updated += len(keys)
+            last_key = keys[-1]
+            if time.monotonic() - reported >= 5:
+                reported = time.monotonic()
+                logger.info(f"Backfilling {table}: {updated} rows so far ({reported - started:.0f}s)")
+            if self.pause:
+                time.sleep(self.pause)
+        logger.info(f"Backfilled {updated} rows of {table} in {time.monotonic() - started:.1f}s")
+        return updated
+
+
+def upgrade(engines, path=MIGRATIONS_PATH, target=None, batch_size=1000, pause=0.05):
+    """
+    Apply the pending migrations, in version order, each to the database of its bind.
+    A migration is recorded in schema_version once it has completed.
+
+    :param engines: Engines by bind key (None for the main database)
+    :param path: Directory of the migration files
+    :param target: Last version to apply (all of them by default)
+    :param batch_size: Rows per backfill transaction
+    :param pause: Seconds between backfill batches
+    :return: list: Versions applied
+    """
+    applied = {bind: applied_versions(engine) for bind, engine in engines.items()}
+    done = []
+    for migration in load_migrations(path):
+        if target is not None and migration.version > target:
+            break
+        if migration.bind not in engines:
+            raise RuntimeError(f"Migration {migration.version} applies to the unknown bind '{migration.bind}'.")
+        if migration.version in applied[migration.bind]:
+            continue
+        engine = engines[migration.bind]
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        started = time.monotonic()
+        try:
+            migration.upgrade(Operations(engine, batch_size, pause))
+        except Exception as e:
+            raise RuntimeError(
+                f"Migration {migration.version} failed: {e}. Fix the cause and run the upgrade again; "
+                "the steps already done are skipped."
+            ) from e
+        with engine.begin() as connection:
+            connection.execute(schema_version.insert().values(
+                version=migration.version, bind=migration.bind, description=migration.description[:255]
+            ))
+        logger.info(f"Applied migration {migration.version} in {time.monotonic() - started:.1f}s")
+        done.append(migration.version)
+    return done
+
+
+def compare_schema(engine, metadata, other_tables=()):
+    """
+    Compare the tables of a metadata with those of a database.
+    :param engine: Engine of the database
+    :param metadata: SQLAlchemy MetaData of the models
+    :param other_tables: Tables of other binds, possibly sharing the database
+    :return: dict: New tables, and new columns and indexes of existing tables, as DDL;
+             "unsupported" lists the differences that need a hand-written migration.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    diff = {"tables": [], "columns": [], "indexes": [], "dropped_indexes": [], "unsupported": []}
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            diff["tables"].append(str(CreateTable(table, if_not_exists=True).compile(dialect=engine.dialect)).strip())
+            diff["indexes"] += [str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect)) for index in table.indexes]
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            definition = str(CreateColumn(column).compile(dialect=engine.dialect)).strip()
+            if column.primary_key or column.unique or (not column.nullable and column.server_default is None):
+                diff["unsupported"].append(
+                    f"Column {table.name}.{column.name} ({definition}): SQLite cannot add a primary key, unique "
+                    "or NOT NULL column without a default; add it nullable, backfill it, then rebuild the table."
+                )
+            else:
+                diff["columns"].append((table.name, definition))
+        for name in columns - {column.name for column in table.columns}:
+            diff["unsupported"].append(f"Column {table.name}.{name} is not in the model (dropping it needs a table rebuild).")
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        model_indexes = {index.name: index for index in table.indexes}
+        diff["indexes"] += [
+            str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            for name, index in sorted(model_indexes.items()) if name not in indexes
+        ]
+        diff["dropped_indexes"] += sorted(name for name in indexes - set(model_indexes) if name.startswith("ix_"))
+
+        uniques = {tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table.name)}
+        for constraint in table.constraints:
+            names = tuple(column.name for column in getattr(constraint, "columns", ()))
+            if type(constraint).__name__ == "UniqueConstraint" and names not in uniques:
+                diff["unsupported"].append(f"Unique constraint on {table.name} {names} (adding it needs a table rebuild).")
+    for name in existing_tables - set(metadata.tables) - set(other_tables) - {"schema_version"}:
+        diff["unsupported"].append(f"Table {name} is not in the models (drop it by hand if it is obsolete).")
+    return diff
+
+
+def has_changes(diff):
+    return any(diff[key] for key in ("tables", "columns", "indexes", "dropped_indexes"))
+
+
+def render_migration(diff, message, bind=None):
+    """
+    Write the source of a migration applying a schema difference (see compare_schema).
+    :param diff: Schema difference
+    :param message: Description of the migration
+    :param bind: Bind the migration applies to (None for the main database)
+    :return: str: Python source of the migration file
+    """
+    lines = ['"""', message, "", f"Generated by `flask db-revision` on {datetime.utcnow():%Y-%m-%d %H:%M} UTC.", '"""']
+    if bind:
+        lines += ["", f"bind = {bind!r}"]
+    lines += ["", "", "def upgrade(op):"]
+    body = []
+    for sql in diff["tables"]:
+        sql = "\n".join(line.rstrip().replace("\t", "    ") for line in sql.splitlines())
+        body.append(f'    op.create_table("""\n{sql}\n""")')
+    for table, definition in diff["columns"]:
+        body.append(f"    op.add_column({table!r}, {definition!r})")
+    for sql in diff["indexes"]:
+        body.append(f"    op.create_index({sql!r})")
+    for name in diff["dropped_indexes"]:
+        body.append(f"    op.drop_index({name!r})")
+    for note in diff["unsupported"]:
+        body.append(f"    # Not generated: {note}")
+    if diff["columns"]:
+        body.append("    # Fill new columns in batches if needed, e.g.:")
+        body.append('    # op.backfill("<table>", "<column> = <expression>", "<column> IS NULL")')
+    return "\n".join(lines + (body or ["    pass"])) + "\n"
+
+
+def write_migration(source, message, path=MIGRATIONS_PATH):
+    """
+    Save a migration with the next version number.
+    :return: str: Path of the new file
+    """
+    os.makedirs(path, exist_ok=True)
+    versions = [int(match.group(1)) for match in map(_FILENAME.match, os.listdir(path)) if match]
+    slug = re.sub(r"[^a-z0-9]+", "_", message.lower()).strip("_")[:40] or "migration"
+    filename = os.path.join(path, f"{max(versions, default=0) + 1:04d}_{slug}.py")
+    with open(filename, "w", encoding="utf-8") as migration_file:
+        migration_file.write(source)
+    return filename
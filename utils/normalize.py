@@ -0,0 +1,102 @@
+import re
+import unicodedata
+
+# Words left out of the phonetic key of a name ("Maria da Silva" and "Maria Silva" match)
+NAME_PARTICLES = {"da", "das", "de", "do", "dos", "e"}
+
+# Street type abbreviations expanded in normalised addresses
+ADDRESS_ABBREVIATIONS = {
+    "r": "rua", "av": "avenida", "avda": "avenida", "tv": "travessa", "trav": "travessa", "lg": "largo",
+    "pc": "praca", "pca": "praca", "estr": "estrada", "al": "alameda", "cc": "calcada", "bc": "beco",
+    "urb": "urbanizacao", "lt": "lote", "esq": "esquerdo", "dto": "direito", "dt": "direito",
+}
+# Words that only number things ("n.º 12", "nr 12"): dropped from normalised addresses
+ADDRESS_NOISE = {"n", "no", "nr", "num", "numero", "o", "º"}
+
+# E-mail providers that ignore dots in the local part, and their canonical domain
+DOTLESS_EMAIL_DOMAINS = {"gmail.com": "gmail.com", "googlemail.com": "gmail.com"}
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def strip_accents(text):
+    """Remove the diacritics of a text ("João" -> "Joao")."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+
+
+def normalize_phone(phone, country_code="351"):
+    """
+    Normalise a phone number to "+<country code><number>".
+    Separators are removed, an international "00" prefix becomes "+", and numbers
+    without one get the default country code.
+    :param phone: Phone number as entered (e.g. "912 345 678", "+351 912-345-678", "00351912345678").
+    :param country_code: Country code of numbers written without one.
+    :return: str: The normalised number, or None if it has too few digits to be a phone number.
+    """
+    if not phone:
+        return None
+    phone = phone.strip()
+    digits = re.sub(r"\D", "", phone)
+    if digits.startswith("00") and not phone.startswith("+"):
+        digits = digits[2:]
+    elif not phone.startswith("+") and not (digits.startswith(country_code) and len(digits) > 9):
+        digits = country_code + digits.lstrip("0")  # National number (without its trunk prefix)
+    return f"+{digits}" if len(digits) >= 6 else None
+
+
+def normalize_email(email):
+    """
+    Normalise an e-mail address: lower case, without "+tag" in the local part
+    (and without dots for the providers that ignore them).
+    :return: str: "local@domain", or None if the address has no "@".
+    """
+    if not email or "@" not in email:
+        return None
+    local, _, domain = email.strip().lower().rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in DOTLESS_EMAIL_DOMAINS:
+        local, domain = local.replace(".", ""), DOTLESS_EMAIL_DOMAINS[domain]
+    return f"{local}@{domain}" if local and domain else None
+
+
+def normalize_address(address):
+    """
+    Normalise an address: lower case without accents or punctuation, with the
+    street type abbreviations expanded ("R. João de Deus, n.º 12" -> "rua joao de deus 12").
+    """
+    if not address:
+        return None
+    words = re.findall(r"[a-z0-9]+", strip_accents(address).lower())
+    words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in words if word not in ADDRESS_NOISE]
+    return " ".join(words) or None
+
+
+def soundex(word):
+    """Soundex code of a word ("Sousa" and "Souza" -> "S200")."""
+    word = re.sub(r"[^a-z]", "", strip_accents(word).lower())
+    if not word:
+        return ""
+    code, previous = word[0].upper(), _SOUNDEX_CODES.get(word[0])
+    for letter in word[1:]:
+        digit = _SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+        if letter not in "hw":  # h and w do not separate letters with the same code
+            previous = digit
+    return (code + "000")[:4]
+
+
+def name_key(name):
+    """
+    Phonetic key of a person's name: the Soundex codes of the first and last names,
+    ignoring particles, accents and case ("João da Sousa" and "Joao Souza" -> "J000S200").
+    """
+    if not name:
+        return None
+    words = [word for word in re.findall(r"[a-z]+", strip_accents(name).lower()) if word not in NAME_PARTICLES]
+    if not words:
+        return None
+    return soundex(words[0]) + (soundex(words[-1]) if len(words) > 1 else "")
@@ -0,0 +1,236 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+from werkzeug.exceptions import BadRequest, Forbidden, Unauthorized
+
+# Request header (or query parameter) asking for the profile of the request, and its formats
+PROFILE_HEADER = "X-Profile"
+PROFILE_FORMATS = {
+    "text": "text/plain; charset=utf-8",  # pstats report of the slowest functions
+    "pstats": "application/octet-stream",  # Binary stats, for pstats.Stats, snakeviz or gprof2dot
+}
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+
+
+class SamplingProfiler:
+    """
+    Samples the call stacks of the threads serving requests from a background thread.
+
+    Every `interval` seconds the sampler reads the current frame of each thread
+    (sys._current_frames) and counts its stack, root first, prefixed with the route
+    of the request being served; the code being sampled runs untouched, so the cost
+    is one stack walk per busy thread and sample. Counts are exported in the
+    collapsed format read by flamegraph.pl, speedscope and most flame graph tools.
+    The sampler stops by itself after `duration` seconds, and only sees the
+    requests of its own process.
+    """
+
+    def __init__(self, max_stacks=20000):
+        self.max_stacks = max_stacks  # Distinct stacks kept; later ones are counted as dropped
+        self._requests = {}  # Thread ID -> route of the request it serves
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._reset(interval=0.01, duration=0, all_threads=False)
+
+    def _reset(self, interval, duration, all_threads):
+        self.interval = interval
+        self.duration = duration
+        self.all_threads = all_threads
+        self.stacks = Counter()
+        self.samples = 0
+        self.dropped = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.overhead = 0.0  # Seconds spent walking stacks
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=0.01, duration=60, all_threads=False):
+        """
+        Start sampling, discarding the stacks of the previous run.
+        :param interval: Seconds between two samples.
+        :param duration: Seconds after which the sampler stops by itself.
+        :param all_threads: Also sample the threads that are not serving a request (e.g. the job workers).
+        :return: bool: False if the sampler is already running.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._reset(interval, duration, all_threads)
+            self.started_at = datetime.utcnow()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling; the stacks are kept until the next start."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.duration
+        while not self._stopping.wait(self.interval) and time.monotonic() < deadline:
+            started = time.perf_counter()
+            self.sample(own)
+            self.overhead += time.perf_counter() - started
+        self.stopped_at = datetime.utcnow()
+
+    def sample(self, own=None):
+        """Count the current stack of every sampled thread once."""
+        requests = dict(self._requests)
+        names = {thread.ident: thread.name for thread in threading.enumerate()} if self.all_threads else {}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            root = requests.get(ident) or names.get(ident)
+            if root is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(root)
+            stack = ";".join(reversed(labels))
+            if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                self.stacks[stack] += 1
+            else:
+                self.dropped += 1
+        self.samples += 1
+
+    def enter_request(self, route):
+        self._requests[threading.get_ident()] = route
+
+    def exit_request(self):
+        self._requests.pop(threading.get_ident(), None)
+
+    def collapsed(self):
+        """
+        The sampled stacks in the collapsed format: one "frame;frame;frame count" line per stack.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self):
+        elapsed = ((self.stopped_at or datetime.utcnow()) - self.started_at).total_seconds() if self.started_at else 0.0
+        return {
+            "running": self.running,
+            "pid": os.getpid(),
+            "interval": self.interval,
+            "duration": self.duration,
+            "all_threads": self.all_threads,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "dropped": self.dropped,
+            # Share of one CPU spent by the sampler itself
+            "overhead": round(self.overhead / elapsed, 4) if elapsed else 0.0,
+        }
+
+
+def profile_report(profiler, fmt="text", sort="cumulative", limit=40):
+    """
+    Render the stats of a cProfile profiler.
+    :param fmt: "text" (pstats report of the `limit` first functions) or "pstats" (binary stats file).
+    :param sort: pstats sort key (cumulative, tottime or calls).
+    :return: bytes: The report.
+    """
+    if fmt == "pstats":
+        profiler.create_stats()
+        return marshal.dumps(profiler.stats)  # What pstats.Stats.dump_stats writes
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue().encode()
+
+
+def check_profiling_access():
+    """
+    Allow the current request to use the profilers only if its employee has one of the PROFILING_ROLES.
+    :raises Unauthorized: If the request is not authenticated.
+    :raises Forbidden: If the employee has another role.
+    """
+    employee = g.get("current_employee")
+    if employee is None:
+        raise Unauthorized("Authentication required.")
+    if employee["role"] not in current_app.config["PROFILING_ROLES"]:
+        raise Forbidden("You are not allowed to profile the application.")
+
+
+def register_profiling(app):
+    """
+    Register the profiling hooks for the Flask application (after authentication).
+
+    A request sent with an `X-Profile: text` or `X-Profile: pstats` header (or a
+    `?profile=` query parameter) by an employee with one of the PROFILING_ROLES is
+    run under cProfile, and its profile is returned instead of its response. The
+    sampling profiler (see api.profiling) is told which route each thread serves.
+    """
+    sampler = SamplingProfiler(app.config["PROFILER_MAX_STACKS"])
+    app.extensions["sampling_profiler"] = sampler
+
+    @app.before_request
+    def start_profiling():
+        if sampler.running:
+            rule = request.url_rule
+            sampler.enter_request(f"{request.method} {rule.rule if rule else request.path}")
+
+        fmt = request.headers.get(PROFILE_HEADER) or request.args.get("profile")
+        if not fmt or not app.config["PROFILING_ENABLED"]:
+            return None
+        check_profiling_access()
+        fmt = "text" if fmt in ("1", "true") else fmt
+        if fmt not in PROFILE_FORMATS:
+            raise BadRequest(f"Unknown profile format '{fmt}'. Supported: {', '.join(PROFILE_FORMATS)}.")
+        sort = request.args.get("profile_sort", "cumulative")
+        if sort not in PROFILE_SORT_KEYS:
+            raise BadRequest(f"Unknown profile sort '{sort}'. Supported: {', '.join(PROFILE_SORT_KEYS)}.")
+
+        g.profile = (cProfile.Profile(), fmt, sort, time.perf_counter())
+        g.profile[0].enable()
+        return None
+
+    @app.after_request
+    def return_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        profiler, fmt, sort, started = profile
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        report = app.response_class(
+            profile_report(profiler, fmt, sort, app.config["PROFILE_STATS_LIMIT"]),
+            mimetype=PROFILE_FORMATS[fmt],
+        )
+        # What the request would have returned, without its body
+        report.headers["X-Profiled-Status"] = str(response.status_code)
+        report.headers["X-Profiled-Duration-Ms"] = f"{elapsed * 1000:.2f}"
+        if fmt == "pstats":
+            report.headers["Content-Disposition"] = 'attachment; filename="request.pstats"'
+        response.close()
+        return report
+
+    @app.teardown_request
+    def stop_profiling(exception=None):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile[0].disable()  # The request failed before its response
+        sampler.exit_request()
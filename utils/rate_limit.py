@@ -0,0 +1,222 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from flask import g, jsonify, request
+
+# URL segments under /api that are never rate limited
+EXEMPT_NAMESPACES = {"docs", "swagger.json", "health"}
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a rate such as "120/minute" into a token bucket.
+    :param rate: "<requests>/<second|minute|hour|day>"
+    :return: tuple: (capacity, tokens refilled per second)
+    """
+    count, _, period = rate.partition("/")
+    seconds = _PERIODS[period.strip().rstrip("s")]
+    capacity = int(count)
+    return capacity, capacity / seconds
+
+
+def parse_rate_overrides(value):
+    """
+    Parse per-namespace rates such as "work=60/minute;work:list=10/minute".
+    :param value: Semicolon-separated "<namespace>[:list]=<rate>" pairs.
+    :return: dict: Rate strings keyed by "<namespace>" or "<namespace>:list".
+    """
+    overrides = {}
+    for item in (value or "").split(";"):
+        if "=" in item:
+            key, rate = item.split("=", 1)
+            overrides[key.strip()] = rate.strip()
+    return overrides
+
+
+class MemoryBucketStore:
+    """
+    In-process token bucket store.
+    Buckets are spread over a fixed set of striped locks, so concurrent requests
+    for different clients rarely wait on each other. Beyond max_keys buckets, the
+    least recently used ones are forgotten (they would mostly be full again anyway).
+    """
+
+    def __init__(self, stripes=64, max_keys=100000):
+        self._buckets = OrderedDict()  # Least recently used first
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._prune_lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        """
+        Take tokens from a bucket.
+        :return: tuple: (allowed, tokens left, seconds until enough tokens are available)
+        """
+        lock = self._locks[zlib.crc32(key.encode()) % len(self._locks)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # Re-inserted at the end, so the dict stays in least recently used order
+            self._buckets.pop(key, None)
+            self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._evict()
+        retry_after = 0 if allowed else (cost - tokens) / refill_rate
+        return allowed, tokens, retry_after
+
+    def _evict(self):
+        # Drop the least recently used buckets down to 90% of max_keys: each eviction
+        # costs the buckets it drops, and runs once per max_keys / 10 new keys
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            target = self.max_keys - self.max_keys // 10
+            while len(self._buckets) > target:
+                try:
+                    self._buckets.popitem(last=False)
+                except KeyError:
+                    break
+        finally:
+            self._prune_lock.release()
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """
+    Token bucket store shared by every worker process of a host, kept in a
+    small SQLite file (separate from the application database).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(path) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            connection.execute(
+                "INSERT INTO bucket (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        retry_after = 0 if allowed else (cost - tokens) / refill_rate
+        return allowed, tokens, retry_after
+
+    def clear(self):
+        self._connection().execute("DELETE FROM bucket")
+
+
+def create_bucket_store(storage):
+    """
+    Create the bucket store described by RATE_LIMIT_STORAGE.
+    :param storage: "memory" or "sqlite:///<path>"
+    :return: A bucket store instance.
+    """
+    if storage.startswith("sqlite:///"):
+        return SQLiteBucketStore(storage[len("sqlite:///"):])
+    if storage == "memory":
+        return MemoryBucketStore()
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE '{storage}'.")
+
+
+def _classify_request():
+    """
+    Find the namespace of the current request and whether it reads a whole collection.
+    :return: tuple: (namespace, is_list) or (None, False) for routes that are not limited.
+    """
+    rule = request.url_rule
+    if rule is None:
+        return None, False
+    parts = rule.rule.strip("/").split("/")
+    if len(parts) < 2 or parts[0] != "api" or parts[1] in EXEMPT_NAMESPACES:
+        return None, False
+    is_list = request.method == "GET" and len(parts) == 2
+    return parts[1], is_list
+
+
+def register_rate_limit(app):
+    """
+    Register per-client and per-route rate limiting for the Flask application.
+    Each (client, namespace, route kind) gets its own token bucket; collection
+    GETs use the stricter RATE_LIMIT_LIST budget. Over-budget requests get a
+    429 response with a Retry-After header.
+    """
+    store = create_bucket_store(app.config["RATE_LIMIT_STORAGE"])
+    app.extensions["rate_limit_store"] = store
+    overrides = parse_rate_overrides(app.config["RATE_LIMITS"])
+    buckets = {}  # Parsed rates, keyed by "<namespace>" or "<namespace>:list"
+
+    def bucket_for(namespace, is_list):
+        key = f"{namespace}:list" if is_list else namespace
+        if key not in buckets:
+            default = app.config["RATE_LIMIT_LIST"] if is_list else app.config["RATE_LIMIT_DEFAULT"]
+            buckets[key] = (key, *parse_rate(overrides.get(key, default)))
+        return buckets[key]
+
+    @app.before_request
+    def limit_request():
+        if not app.config["RATE_LIMIT_ENABLED"]:
+            return None
+        namespace, is_list = _classify_request()
+        if namespace is None:
+            return None
+
+        employee = g.get("current_employee")
+        identity = f"employee:{employee['sub']}" if employee else f"ip:{request.remote_addr}"
+        route_key, capacity, refill_rate = bucket_for(namespace, is_list)
+        allowed, remaining, retry_after = store.consume(f"{identity}:{route_key}", capacity, refill_rate)
+        g.rate_limit = (capacity, int(remaining))
+        if allowed:
+            return None
+
+        response = jsonify({"status": "error", "message": "Too many requests. Please retry later."})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        limit = g.get("rate_limit")
+        if limit:
+            response.headers["X-RateLimit-Limit"] = str(limit[0])
+            response.headers["X-RateLimit-Remaining"] = str(limit[1])
+        return response
@@ -0,0 +1,189 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, request
+from flask_restx.utils import unpack
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from utils.database import db, current_tenant_id
+from utils.utils import selected_embeds
+
+# Tables read by cached responses; changes to other tables are not tracked
+_cached_tables = set()
+
+
+class ListResponseCache:
+    """
+    Thread-safe LRU cache of serialized collection responses, bounded by entries and bytes.
+
+    Keys include the generation of every table the response was read from, so a
+    committed change makes the old entries unreachable; they are evicted as new
+    entries come in.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body, content_type):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (body, content_type)
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+def _changed_tables(session):
+    return session.info.setdefault("changed_cached_tables", set())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_changes(execute_state):
+    # INSERT, UPDATE and DELETE statements (bulk imports, single-statement patches, archival)
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        name = execute_state.statement.table.name
+        if name in _cached_tables:
+            _changed_tables(execute_state.session).add(name)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_changes(session, flush_context):
+    # Objects added, modified or deleted through the unit of work
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        name = type(instance).__table__.name
+        if name in _cached_tables:
+            _changed_tables(session).add(name)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_generations(session):
+    # Pending objects are flushed after this hook: flush them now to see their tables
+    session.flush()
+    # Not cleared on rollback: a rolled back change only costs an extra cache miss
+    changed = session.info.pop("changed_cached_tables", None)
+    if not changed:
+        return
+    from models.table_generation import TableGeneration
+
+    bumped = session.execute(
+        update(TableGeneration).where(TableGeneration.table_name.in_(changed))
+        .values(generation=TableGeneration.generation + 1)
+    ).rowcount
+    if bumped < len(changed):
+        existing = set(session.execute(
+            select(TableGeneration.table_name).where(TableGeneration.table_name.in_(changed))
+        ).scalars())
+        session.execute(insert(TableGeneration), [
+            {"table_name": name, "generation": 1} for name in sorted(changed - existing)
+        ])
+
+
+def table_generations(tables):
+    """
+    Read the current generation of some tables with one query.
+    :param tables: Names of the tables.
+    :return: tuple: The generations, in the order of the tables (0 for tables never changed).
+    """
+    from models.table_generation import TableGeneration
+
+    rows = dict(db.session.execute(
+        select(TableGeneration.table_name, TableGeneration.generation).where(TableGeneration.table_name.in_(tables))
+    ).all())
+    return tuple(rows.get(name, 0) for name in tables)
+
+
+def cached_response(table, embeds=()):
+    """
+    Serve a collection GET from the response cache while its tables are unchanged.
+
+    The cache key is the tenant, path and query string, and the generation of the
+    table plus those of the records embedded with `?embed=`. On a miss the resource
+    runs and its serialized body is stored (see register_response_cache); a hit
+    skips the queries, the marshalling and the JSON encoding. Apply it above the
+    marshalling decorator.
+
+    :param table: Name of the table the collection is read from
+    :param embeds: Embeddable relation paths; the last name of a path is the table it reads
+    :return: Decorator applying the cache
+    """
+    _cached_tables.add(table)
+    _cached_tables.update(path.rpartition('.')[2] for path in embeds)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("response_cache")
+            if cache is None or not current_app.config["RESPONSE_CACHE_ENABLED"]:
+                return func(*args, **kwargs)
+            tables = [table] + sorted({path.rpartition('.')[2] for path in selected_embeds(list(embeds))})
+            key = (
+                current_tenant_id(),
+                request.path,
+                tuple(sorted(request.args.items(multi=True))),
+                tuple(tables),
+                table_generations(tables),
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                response = current_app.response_class(entry[0], status=200, content_type=entry[1])
+                response.headers["X-Cache"] = "HIT"
+                return response
+            result = func(*args, **kwargs)
+            # Only store lists: services report failures with an error dictionary
+            if isinstance(unpack(result)[0], list):
+                g.response_cache_key = key
+            return result
+        return wrapper
+    return decorator
+
+
+def register_response_cache(app):
+    """
+    Register the cache of collection responses (see cached_response) for the Flask application.
+    Must be registered after compression: the uncompressed body is stored, and the
+    compression cache reuses the compressed bytes of repeated bodies.
+    """
+    # Imported here to keep utils free of model imports at load time
+    import models.table_generation  # noqa: F401
+    cache = ListResponseCache(app.config["RESPONSE_CACHE_SIZE"], app.config["RESPONSE_CACHE_BYTES"])
+    app.extensions["response_cache"] = cache
+
+    @app.after_request
+    def store_cached_response(response):
+        key = g.get("response_cache_key")
+        if key is None:
+            return response
+        g.response_cache_key = None
+        if response.status_code == 200 and not response.is_streamed:
+            cache.set(key, response.get_data(), response.content_type)
+            response.headers["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,44 @@
+from flask import g, jsonify, request
+
+# Header naming the tenant (garage) of requests made without a token, e.g. logins
+TENANT_HEADER = "X-Tenant-ID"
+
+# Paths serving no tenant data (the Swagger UI and the health probes)
+UNSCOPED_PATH_PREFIXES = ("/api/docs", "/api/swagger.json", "/api/health/")
+
+
+def register_tenancy(app):
+    """
+    Register tenant resolution for the Flask application.
+    Each API request is scoped to one tenant (garage): the tenant of the access
+    token, or the X-Tenant-ID header for requests without a token. Requests naming
+    neither use DEFAULT_TENANT_ID, unless TENANT_REQUIRED is set.
+    Must be registered after authentication, which provides the token claims.
+    """
+
+    def error(status, message):
+        response = jsonify({"status": "error", "message": message})
+        response.status_code = status
+        return response
+
+    @app.before_request
+    def resolve_tenant():
+        g.tenant_id = None
+        if not request.path.startswith("/api/"):
+            return None
+
+        header = request.headers.get(TENANT_HEADER)
+        if header is not None and (not header.isdigit() or int(header) <= 0):
+            return error(400, f"The {TENANT_HEADER} header must be a positive integer.")
+        requested = int(header) if header else None
+
+        employee = g.get("current_employee")
+        token_tenant = employee.get("tenant") if employee else None
+        if token_tenant is not None and requested is not None and requested != token_tenant:
+            return error(403, "The access token does not belong to this tenant.")
+
+        g.tenant_id = token_tenant or requested
+        if (g.tenant_id is None and app.config["TENANT_REQUIRED"]
+                and not request.path.startswith(UNSCOPED_PATH_PREFIXES)):
+            return error(400, f"Send the {TENANT_HEADER} header or a token to select the tenant.")
+        return None
@@ -1,7 +1,60 @@
 # utils/swagger.py
-from flask_restx import fields
+from functools import wraps
+from flask import current_app, request
+from flask_restx import fields, marshal
+from flask_restx.utils import unpack
 from sqlalchemy import Integer, String, Text, Date, DateTime, Boolean, Float, Numeric
-import logging
+from werkzeug.exceptions import BadRequest, PreconditionRequired
+
+# Swagger documentation of the sparse fieldset query parameter
+FIELDS_PARAM_DOC = {
+    'fields': {
+        'description': 'Comma-separated list of fields to return (e.g. work_id,status). All fields are returned when omitted.',
+        'in': 'query',
+        'type': 'string',
+    }
+}
+
+# Swagger documentation of the Idempotency-Key header accepted by the POST routes
+IDEMPOTENCY_KEY_PARAM_DOC = {
+    'Idempotency-Key': {
+        'description': 'Unique key of the request (e.g. a UUID). A retry with the same key returns the stored response '
+                       'instead of creating the record again.',
+        'in': 'header',
+        'type': 'string',
+    }
+}
+
+# Swagger documentation of the If-Match header used for conditional updates
+IF_MATCH_PARAM_DOC = {
+    'If-Match': {
+        'description': 'ETag returned by a previous GET. The request fails with 409 if the record changed since.',
+        'in': 'header',
+        'type': 'string',
+    }
+}
+
+
+def embed_param_doc(allowed):
+    """
+    Swagger documentation of the `embed` query parameter.
+
+    :param allowed: Names of the relations that can be embedded
+    :return: Dictionary for `api.doc(params=...)`
+    """
+    return {
+        'embed': {
+            'description': 'Comma-separated related records to include in each item '
+                           f'(available: {", ".join(allowed)}), fetched with one query per related table',
+            'type': 'string',
+            'in': 'query',
+        }
+    }
+
+
+# Python types accepted for each Swagger schema type in PATCH bodies
+_JSON_TYPES = {'integer': int, 'number': (int, float), 'boolean': bool, 'string': str}
+
 
 def generate_swagger_model(api, model, exclude_fields=None, readonly_fields=None):
     """
@@ -13,6 +66,18 @@ def generate_swagger_model(api, model, exclude_fields=None, readonly_fields=None
     :param readonly_fields: List of field names to mark as read-only
     :return: Flask-RESTx model
     """
+    return api.model(model.__name__, generate_swagger_fields(model, exclude_fields, readonly_fields))
+
+def generate_swagger_fields(model, exclude_fields=None, readonly_fields=None):
+    """
+    Generate the Flask-RESTx fields of an SQLAlchemy model, without registering a Swagger model
+    (e.g. to marshal a related record embedded in another namespace's responses).
+
+    :param model: SQLAlchemy model class
+    :param exclude_fields: List of field names to exclude
+    :param readonly_fields: List of field names to mark as read-only
+    :return: Dictionary of field names and Flask-RESTx fields
+    """
     exclude_fields = exclude_fields or []
     readonly_fields = readonly_fields or []
 
@@ -45,18 +110,148 @@ def generate_swagger_model(api, model, exclude_fields=None, readonly_fields=None
 
         swagger_model[column.name] = swagger_field
 
-    return api.model(model.__name__, swagger_model)
+    return swagger_model
 
-def configure_logging():
+def selected_fields(swagger_model):
     """
-    Configure the logging system for the application.
-    Logs messages to both the console and a log file.
+    Parse the `fields` query parameter of the current request (sparse fieldsets).
+
+    :param swagger_model: Flask-RESTx model generated by generate_swagger_model
+    :return: List of requested field names, or None when every field is requested
+    :raises BadRequest: If a requested field is not part of the model
     """
-    logging.basicConfig(
-        level=logging.DEBUG,  # You can adjust the level (DEBUG, INFO, etc.)
-        format='%(asctime)s - %(levelname)s - %(message)s',  # Log message format
-        handlers=[
-            #logging.StreamHandler(),  # Logs to console
-            logging.FileHandler('app.log', mode='a')  # Logs to file (app.log)
-        ]
-    )
+    raw_fields = request.args.get('fields')
+    if not raw_fields:
+        return None
+
+    requested = []
+    for name in raw_fields.split(','):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+
+    unknown = [name for name in requested if name not in swagger_model]
+    if unknown:
+        raise BadRequest(
+            f"Unknown field(s): {', '.join(unknown)}. Available fields: {', '.join(swagger_model.keys())}."
+        )
+    return requested or None
+
+
+def selected_embeds(allowed):
+    """
+    Parse the `embed` query parameter of the current request.
+    Embedding a nested relation embeds its parent too ("vehicle.client" implies "vehicle").
+
+    :param allowed: Names of the relations that can be embedded
+    :return: List of relation names to embed (empty when none is requested)
+    :raises BadRequest: If a requested relation cannot be embedded
+    """
+    requested = []
+    for name in request.args.get('embed', '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise BadRequest(f"Cannot embed '{name}'. Available: {', '.join(allowed)}.")
+        parts = name.split('.')
+        for depth in range(1, len(parts) + 1):
+            path = '.'.join(parts[:depth])
+            if path not in requested:
+                requested.append(path)
+    return requested
+
+
+def version_etag(version):
+    """
+    Build the ETag header value of a versioned record.
+
+    :param version: Value of the record's version column
+    :return: Quoted entity tag, e.g. '"3"'
+    """
+    return f'"{version}"'
+
+
+def if_match_version():
+    """
+    Read the record version expected by the client from the If-Match header.
+    Weak tags (W/"3", as sent back after a compressed response) are accepted too.
+
+    :return: The expected version, or None when the header is absent or '*'
+    :raises BadRequest: If the header does not hold a single version tag
+    :raises PreconditionRequired: If the header is missing and REQUIRE_IF_MATCH is set
+    """
+    if_match = request.if_match
+    if if_match.star_tag:
+        return None
+    tags = if_match.as_set(include_weak=True)
+    if not tags:
+        if current_app.config["REQUIRE_IF_MATCH"]:
+            raise PreconditionRequired("This request requires an If-Match header with the record's ETag.")
+        return None
+    if len(tags) != 1 or not next(iter(tags)).isdigit():
+        raise BadRequest("If-Match must hold the single ETag returned by a previous GET.")
+    return int(next(iter(tags)))
+
+
+def patch_changes(swagger_model):
+    """
+    Read the JSON body of a PATCH request: only the fields to change.
+    Read-only fields cannot be changed and null clears a field.
+
+    :param swagger_model: Flask-RESTx model generated by generate_swagger_model
+    :return: Dictionary of field names and new values
+    :raises BadRequest: If the body is empty, or holds unknown, read-only or mistyped fields
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not payload:
+        raise BadRequest("Send a JSON object with the fields to change.")
+
+    writable = [name for name, field in swagger_model.items() if not field.readonly]
+    rejected = [name for name in payload if name not in writable]
+    if rejected:
+        raise BadRequest(f"Field(s) cannot be changed: {', '.join(rejected)}. Writable fields: {', '.join(writable)}.")
+
+    for name, value in payload.items():
+        if value is None:
+            continue
+        expected = _JSON_TYPES.get(swagger_model[name].__schema_type__, str)
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            raise BadRequest(f"Invalid value for '{name}': {value!r}.")
+    return payload
+
+
+def marshal_with_fields(api, swagger_model, as_list=False, code=200, description='Success', embeds=None):
+    """
+    Marshal the response like `api.marshal_with`, but only output the fields
+    selected with the `fields` query parameter, plus the related records
+    requested with the `embed` query parameter.
+
+    :param api: Flask-RESTx namespace the resource belongs to
+    :param swagger_model: Flask-RESTx model used to marshal the response
+    :param as_list: Whether the response is a list of items
+    :param code: HTTP status code documented for the response
+    :param description: Description documented for the response
+    :param embeds: Dictionary of embeddable relation paths ("vehicle", "vehicle.client")
+                   and the fields of their records
+    :return: Decorator applying the marshalling
+    """
+    embeds = embeds or {}
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            data, status, headers = unpack(func(*args, **kwargs))
+            requested = selected_fields(swagger_model)
+            output_fields = {name: swagger_model[name] for name in requested} if requested else dict(swagger_model)
+            nested = {path: dict(embeds[path]) for path in selected_embeds(list(embeds))}
+            for path in sorted(nested, key=lambda path: path.count('.'), reverse=True):
+                parent, _, name = path.rpartition('.')
+                target = nested[parent] if parent else output_fields
+                target[name] = fields.Nested(nested[path], allow_null=True)
+            return marshal(data, output_fields), status, headers
+
+        documented = api.response(code, description, [swagger_model] if as_list else swagger_model)(wrapper)
+        params = {**FIELDS_PARAM_DOC, **embed_param_doc(list(embeds))} if embeds else FIELDS_PARAM_DOC
+        return api.doc(params=params)(documented)
+    return decorator
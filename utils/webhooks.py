@@ -0,0 +1,359 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Client errors worth retrying: the receiver may accept the same request later
+RETRYABLE_STATUSES = {408, 425, 429}
+
+
+def sign(secret, timestamp, body):
+    """
+    Signature of a webhook request: HMAC-SHA256 of "<timestamp>.<body>" with the subscription secret.
+    :return: str: "sha256=<hex digest>", the value of the X-Webhook-Signature header.
+    """
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(secret, timestamp, body, signature, tolerance=300):
+    """
+    Check the signature of a received webhook request, as a receiver should.
+    :param tolerance: Maximum age of the request in seconds (replayed requests are rejected).
+    :return: bool: True if the signature matches and the request is recent.
+    """
+    try:
+        recent = abs(time.time() - int(timestamp)) <= tolerance
+    except (TypeError, ValueError):
+        return False
+    return recent and hmac.compare_digest(sign(secret, timestamp, body), signature or "")
+
+
+def check_url(url, allowed_hosts=(), allow_private=False):
+    """
+    Check that a webhook URL may be requested, so that subscriptions cannot reach the
+    internal network (SSRF): an http(s) URL, whose host is one of allowed_hosts when
+    some are given ("*.example.com" allows the subdomains), and whose addresses are all
+    public unless allow_private is set (e.g. for the local test receiver).
+    :raises ValueError: If the URL is not allowed.
+    :raises OSError: If the host cannot be resolved.
+    """
+    parts = urllib.parse.urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError("The webhook URL must start with http:// or https:// and name a host.")
+    if allowed_hosts and not any(
+            host == allowed or (allowed.startswith("*.") and host.endswith(allowed[1:])) for allowed in allowed_hosts):
+        raise ValueError(f"The webhook host {host} is not allowed (WEBHOOK_ALLOWED_HOSTS).")
+    if allow_private:
+        return
+    for *_, address in socket.getaddrinfo(host, parts.port or (443 if parts.scheme == "https" else 80),
+                                          proto=socket.IPPROTO_TCP):
+        ip = ipaddress.ip_address(address[0].split("%")[0])
+        ip = getattr(ip, "ipv4_mapped", None) or ip
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"The webhook host {host} resolves to a private or reserved address ({ip}).")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect could lead to an address check_url refuses: it is reported as the answer instead
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def post(url, body, headers, timeout):
+    """
+    Send a webhook request (redirects are not followed).
+    :return: tuple: (HTTP status or None, error message or None, Retry-After seconds or None)
+    """
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with _opener.open(request, timeout=timeout) as response:
+            return response.status, None, None
+    except urllib.error.HTTPError as e:
+        retry_after = e.headers.get("Retry-After", "")
+        return e.code, f"HTTP {e.code} {e.reason}", int(retry_after) if retry_after.isdigit() else None
+    except Exception as e:
+        return None, str(getattr(e, "reason", e)), None
+
+
+def webhook_allowed_hosts(config):
+    """The WEBHOOK_ALLOWED_HOSTS of a configuration, as a list of lower-case host patterns."""
+    return [host.strip().lower() for host in config["WEBHOOK_ALLOWED_HOSTS"].split(",") if host.strip()]
+
+
+class WebhookDispatcher:
+    """
+    Sends the queued webhook deliveries from a background thread.
+
+    The dispatcher claims the due deliveries of the outbox in batches and sends the
+    deliveries of each subscription in one request, from a pool of WEBHOOK_WORKERS
+    threads; a subscription never has more than one request in flight, so a slow
+    receiver only delays its own notifications. Failed requests are retried with
+    exponential backoff until WEBHOOK_MAX_ATTEMPTS. The thread is started lazily in
+    each process (pre-forked servers included) and woken up when a transaction
+    queues deliveries; it also polls every WEBHOOK_POLL_INTERVAL seconds for retries.
+    """
+
+    lease_seconds = 300  # Time a claimed batch has to be sent before another dispatcher may claim it again
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.workers = config["WEBHOOK_WORKERS"]
+        self.batch_size = config["WEBHOOK_BATCH_SIZE"]
+        self.timeout = config["WEBHOOK_TIMEOUT"]
+        self.max_attempts = config["WEBHOOK_MAX_ATTEMPTS"]
+        self.retry_delay = config["WEBHOOK_RETRY_DELAY"]
+        self.max_retry_delay = config["WEBHOOK_RETRY_MAX_DELAY"]
+        self.poll_interval = config["WEBHOOK_POLL_INTERVAL"]
+        self.allowed_hosts = webhook_allowed_hosts(config)
+        self.allow_private = config["WEBHOOK_ALLOW_PRIVATE"]
+        self._executor = None
+        self._thread = None
+        self._pid = None
+        self._busy = set()  # Subscriptions with a request queued or in flight
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self.sent = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the dispatcher thread of this process, unless it is running."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook")
+            self._busy = set()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def wake(self):
+        """Have the dispatcher look for due deliveries now."""
+        self.start()
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = self.dispatch()
+            except Exception as e:
+                logger.error(f"Webhook dispatch failed: {e}")
+                claimed = 0
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def dispatch(self):
+        """
+        Claim a batch of due deliveries and queue their requests on the worker pool.
+        :return: int: Number of deliveries claimed.
+        """
+        from services.webhook_service import claim_deliveries
+
+        with self._lock:
+            busy = set(self._busy)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook")
+        if len(busy) >= self.workers * 2:
+            return 0  # Enough requests are waiting for a worker; they wake the dispatcher when done
+        with self.app.app_context():
+            groups = claim_deliveries(self.batch_size, busy, self.lease_seconds)
+        for subscription, deliveries in groups:
+            with self._lock:
+                self._busy.add(deliveries[0]["subscription_id"])
+            self._executor.submit(self._deliver, subscription, deliveries)
+        return sum(len(deliveries) for _, deliveries in groups)
+
+    def drain(self):
+        """
+        Send every due delivery and wait for the requests to finish (for CLI commands and benchmarks).
+        :return: int: Number of deliveries claimed.
+        """
+        total = 0
+        while True:
+            claimed = self.dispatch()
+            total += claimed
+            with self._lock:
+                idle = not self._busy
+            if not claimed and idle:
+                return total
+            if not claimed:
+                time.sleep(0.01)
+
+    def _deliver(self, subscription, deliveries):
+        from services.webhook_service import record_delivery_results
+
+        subscription_id = deliveries[0]["subscription_id"]
+        ids = [delivery["delivery_id"] for delivery in deliveries]
+        try:
+            if subscription is None or not subscription["active"]:
+                outcome = ("failed", None, "The subscription was deleted or deactivated.", None)
+            else:
+                outcome = self._send(subscription, deliveries)
+            with self.app.app_context():
+                record_delivery_results(ids, *outcome)
+        except Exception as e:
+            # The deliveries are sent again once their lease expires
+            logger.error(f"Error delivering webhooks {ids} to subscription {subscription_id}: {e}")
+        finally:
+            with self._lock:
+                self._busy.discard(subscription_id)
+            self._wake.set()
+
+    def _send(self, subscription, deliveries):
+        body = json.dumps({"deliveries": [
+            {
+                "delivery_id": delivery["delivery_id"],
+                "event": delivery["event"],
+                "created_at": delivery["created_at"].isoformat() if delivery["created_at"] else None,
+                "attempt": delivery["attempts"],
+                "data": json.loads(delivery["payload"]),
+            }
+            for delivery in deliveries
+        ]}).encode()
+        try:
+            # Checked again before each request: the host may resolve to another address since it was subscribed
+            check_url(subscription["url"], self.allowed_hosts, self.allow_private)
+        except ValueError as e:
+            self.failed += len(deliveries)
+            return "failed", None, str(e), None
+        except OSError:
+            pass  # Unresolved host: the request fails too, and is retried
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "garage-api-webhooks",
+            "X-Webhook-Timestamp": timestamp,
+            "X-Webhook-Signature": sign(subscription["secret"], timestamp, body),
+        }
+        status, error, retry_after = post(subscription["url"], body, headers, self.timeout)
+        if status is not None and 200 <= status < 300:
+            self.sent += len(deliveries)
+            return "delivered", status, None, None
+
+        attempts = max(delivery["attempts"] for delivery in deliveries)
+        logger.warning(f"Webhook to {subscription['url']} failed (attempt {attempts}): {error}")
+        if attempts >= self.max_attempts or (status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUSES):
+            self.failed += len(deliveries)
+            return "failed", status, error, None
+        # Exponential backoff with jitter, so receivers coming back are not hit by every retry at once
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay) * random.uniform(0.5, 1.0)
+        delay = max(delay, retry_after or 0)
+        return "pending", status, error, datetime.utcnow() + timedelta(seconds=delay)
+
+    def stats(self):
+        with self._lock:
+            busy = len(self._busy)
+        return {"in_flight": busy, "sent": self.sent, "failed": self.failed}
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    # Deliveries queued by the committed transaction (see services.webhook_service)
+    if session.info.pop("webhooks_queued", False) and has_app_context():
+        dispatcher = current_app.extensions.get("webhook_dispatcher")
+        if dispatcher is not None:
+            dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_queued(session):
+    session.info.pop("webhooks_queued", None)
+
+
+def register_webhooks(app):
+    """
+    Register the webhook dispatcher. With WEBHOOK_DISPATCHER = "off", the deliveries
+    are only sent by a separate `flask webhooks-deliver` process.
+    """
+    with app.app_context():
+        import models.webhook  # noqa: F401  Imported here so db.create_all() creates the outbox
+
+    if app.config["WEBHOOK_DISPATCHER"] != "thread":
+        return
+    dispatcher = WebhookDispatcher(app)
+    app.extensions["webhook_dispatcher"] = dispatcher
+
+    @app.before_request
+    def start_webhook_dispatcher():
+        # Sends the deliveries left over by a previous run; a no-op once the thread runs
+        dispatcher.start()
+
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if server.delay:
+            time.sleep(server.delay)
+        if server.secret and not verify_signature(
+                server.secret, self.headers.get("X-Webhook-Timestamp"), body, self.headers.get("X-Webhook-Signature")):
+            status = 401
+        elif random.random() < server.fail_rate:
+            status = 503
+        else:
+            status = 204
+        with server.lock:
+            server.requests += 1
+            if status == 204:
+                server.received.extend(json.loads(body)["deliveries"])
+        if server.on_request:
+            server.on_request(status, body)
+        self.send_response(status)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_receiver(host="127.0.0.1", port=0, secret=None, delay=0.0, fail_rate=0.0, on_request=None):
+    """
+    Local stand-in for a webhook receiver, to try and benchmark the deliveries without a real endpoint.
+    It answers 204, 401 when a secret is given and the signature does not match, or
+    503 for a share of the requests; accepted deliveries are kept in `received`.
+    :param port: Port to listen on (0 picks a free one, see server_address).
+    :param delay: Seconds each response is delayed, like a slow receiver.
+    :param fail_rate: Share of the requests answered with 503.
+    :param on_request: Called with the status and body of each request.
+    :return: ThreadingHTTPServer: Call serve_forever(), e.g. in a thread.
+    """
+    server = ThreadingHTTPServer((host, port), _ReceiverHandler)
+    server.daemon_threads = True
+    server.secret, server.delay, server.fail_rate, server.on_request = secret, delay, fail_rate, on_request
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.received = []
+    return server